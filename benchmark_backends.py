@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Benchmark the psycopg2 and psycopg 3 driver backends on the install workload.
+
+Runs the steps the installer performs against scratch tables: CREATE TABLE,
+the articulos catalogue load (batched upsert and COPY), the small default-data
+inserts and a streaming read back. Connection settings come from the same
+.env variables as debug_script.py.
+
+Usage:
+    python benchmark_backends.py [--rows N] [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(base_dir)
+load_dotenv(dotenv_path=os.path.join(base_dir, '.env'))
+
+from src.database.backends import BACKENDS
+from src.database.connection import DatabaseConnection
+
+
+BENCH_TABLE = "bench_articulos"
+BENCH_SMALL_TABLE = "bench_caja_banco"
+
+
+def load_articulos_rows(limit):
+    """
+    Read articulos rows from the bundled CSV, repeating them up to limit rows.
+
+    Args:
+        limit (int): Number of rows to produce
+
+    Returns:
+        list: (velneo_id, pvsi_clave, nombre) tuples with unique ids
+    """
+    csv_path = os.path.join(base_dir, 'articulos_py.csv')
+    source = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            values = line.rstrip('\n').split(',')
+            if len(values) >= 3:
+                source.append((values[1].strip('"'), values[2][:255]))
+    if not source:
+        source = [('', 'Articulo')]
+
+    return [(i + 1,) + source[i % len(source)] for i in range(limit)]
+
+
+def timed(label, results, func):
+    """Run func, record its duration under label and return its result."""
+    started = time.perf_counter()
+    value = func()
+    results[label] = time.perf_counter() - started
+    return value
+
+
+def run_workload(driver, rows, small_rows):
+    """
+    Run the install workload on one backend.
+
+    Args:
+        driver (str): Backend name
+        rows (list): articulos rows
+        small_rows (list): Rows for the small default-data style inserts
+
+    Returns:
+        dict: Step name to seconds, or None if the connection failed
+    """
+    db = DatabaseConnection(
+        dbname=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+        profile='bulk_load',
+        driver=driver
+    )
+    if not db.connect():
+        return None
+
+    results = {}
+    try:
+        def create():
+            for table in (BENCH_TABLE, BENCH_SMALL_TABLE):
+                db.execute_query(f"DROP TABLE IF EXISTS {table}")
+            db.execute_query(f"""
+            CREATE TABLE {BENCH_TABLE} (
+                velneo_id INT PRIMARY KEY,
+                pvsi_clave VARCHAR(20),
+                nombre VARCHAR(255)
+            )""")
+            db.execute_query(f"CREATE TABLE {BENCH_SMALL_TABLE} (velneo INTEGER, pvsi TEXT, descripcion TEXT)")
+            db.commit()
+
+        def batch_upsert():
+            db.execute_batch(f"""
+            INSERT INTO {BENCH_TABLE} (velneo_id, pvsi_clave, nombre)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (velneo_id) DO UPDATE
+            SET pvsi_clave = EXCLUDED.pvsi_clave, nombre = EXCLUDED.nombre
+            """, rows)
+            db.commit()
+
+        def copy_load(binary):
+            db.execute_query(f"TRUNCATE {BENCH_TABLE}")
+            db.copy_rows(BENCH_TABLE, ['velneo_id', 'pvsi_clave', 'nombre'], rows,
+                         binary=binary, types=['int4', 'varchar', 'varchar'])
+            db.commit()
+
+        def small_inserts():
+            query = f"INSERT INTO {BENCH_SMALL_TABLE} (velneo, pvsi, descripcion) VALUES (%s, %s, %s)"
+            with db.pipeline():
+                for row in small_rows:
+                    db.execute_query(query, row)
+            db.commit()
+
+        def stream_read():
+            return sum(1 for _ in db.iter_query(f"SELECT * FROM {BENCH_TABLE}", chunk_size=5000))
+
+        timed("create tables", results, create)
+        timed("batched upsert", results, batch_upsert)
+        timed("COPY text", results, lambda: copy_load(False))
+        if driver == "psycopg":
+            timed("COPY binary", results, lambda: copy_load(True))
+        timed("row-by-row inserts", results, small_inserts)
+        timed("streaming read", results, stream_read)
+
+        for table in (BENCH_TABLE, BENCH_SMALL_TABLE):
+            db.execute_query(f"DROP TABLE IF EXISTS {table}")
+        db.commit()
+    finally:
+        db.close()
+
+    return results
+
+
+def main():
+    """Run the benchmark on every installed backend and print a comparison."""
+    parser = argparse.ArgumentParser(description="Compare database driver backends")
+    parser.add_argument('--rows', type=int, default=100000, help='articulos rows to load')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per backend (best is kept)')
+    args = parser.parse_args()
+
+    rows = load_articulos_rows(args.rows)
+    small_rows = [(i, f"P{i % 100}", f"FORMA DE PAGO {i}") for i in range(1000)]
+
+    summary = {}
+    for driver, backend_class in BACKENDS.items():
+        try:
+            backend_class()
+        except ImportError:
+            print(f"Skipping {driver}: not installed")
+            continue
+
+        best = {}
+        for _ in range(args.repeat):
+            results = run_workload(driver, rows, small_rows)
+            if results is None:
+                return 1
+            for step, seconds in results.items():
+                best[step] = min(seconds, best.get(step, seconds))
+        summary[driver] = best
+
+    steps = []
+    for results in summary.values():
+        for step in results:
+            if step not in steps:
+                steps.append(step)
+
+    print(f"\nInstall workload: {args.rows} articulos rows, {len(small_rows)} small inserts "
+          f"(best of {args.repeat})")
+    print(f"{'step':<22}" + "".join(f"{driver:>14}" for driver in summary))
+    for step in steps:
+        cells = "".join(
+            f"{summary[driver][step] * 1000:>12.1f}ms" if step in summary[driver] else f"{'-':>14}"
+            for driver in summary
+        )
+        print(f"{step:<22}{cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
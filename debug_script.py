@@ -7,10 +7,9 @@ and imports data from CSV files for articulos and metodo_pago.
 """
 import os
 import sys
-import csv
-import json
-from pathlib import Path
-from dotenv import load_dotenv
+import time
+import traceback
+from datetime import date, timedelta
 
 # Determine the base directory (different for script vs executable)
 if getattr(sys, 'frozen', False):
@@ -23,32 +22,29 @@ else:
 # Add project root to path
 sys.path.append(base_dir)
 
+# --startup-profile (or STARTUP_PROFILE=true) reports the import cost of each module at exit
+from src.startup_profile import enable_if_requested
+enable_if_requested()
+
+from dotenv import load_dotenv
+
 # Load environment variables from .env file
 env_path = os.path.join(base_dir, '.env')
 load_dotenv(dotenv_path=env_path)
 print(f"Looking for .env at: {env_path}")
 
-# Import table classes
-from src.database.articulos_table import ArticulosTable
-from src.database.almacen_table import AlmacenTable
-from src.database.caja_banco_table import CajaBancoTable
-from src.database.clientes_table import ClientesTable
-from src.database.detalle_estado_table import DetalleEstadoTable
-from src.database.errores_table import ErroresTable
-from src.database.estado_factura_venta_table import EstadoFacturaVentaTable
-from src.database.forma_pago_table import FormaPagoTable
-from src.database.forma_pago_caja_banco_table import FormaPagoCajaBancoTable
-from src.database.general_misc_table import GeneralMiscTable
-from src.database.iva_table import IvaTable
-from src.database.metodo_pago_table import MetodoPagoTable
-from src.database.pais_table import PaisTable
-from src.database.proveedor_table import ProveedorTable
-from src.database.recibo_venta_table import ReciboVentaTable
-from src.database.reintentos_fac_venta_table import ReintentosFacturaVentaTable
-from src.database.tipo_movimiento_table import TipoMovimientoTable
-from src.database.vendedores_table import VendedoresTable
+# Import installer modules. Table modules are imported by the registry only for
+# enabled tables; fan-out, parallel install and teardown are imported when used.
+from src.database.registry import (
+    TABLE_MODULES, get_table_class, get_enabled_tables, load_table_config as load_config_file,
+    resolve_order, load_table_data
+)
 from src.database.connection import DatabaseConnection
-from src.config import ARTICULOS_CSV, METODO_PAGO_CSV, GENERAL_MISC_CSV
+from src.database.schema_diff import plan_schema, print_schema_report, apply_schema_plan
+from src.database.install_plan import (
+    load_install_stats, save_install_stats, measure_table, record_table_load,
+    build_install_plan, print_install_plan
+)
 
 def load_table_config():
     """Load table configuration from JSON file."""
@@ -63,28 +59,222 @@ def load_table_config():
     config_path = os.path.join(base_dir, 'table_config.json')
     print(f"Looking for table_config.json at: {config_path}")
     
-    try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as config_file:
-                return json.load(config_file)
-        else:
-            print(f"Warning: Configuration file not found at {config_path}")
-            # Return default configuration (all tables enabled)
-            return {
-                "articulos": True,
-                "metodo_pago": True,
-                "pais": True,
-                "almacen": True
-            }
-    except Exception as e:
-        print(f"Error loading table configuration: {e}")
-        # Return default configuration
-        return {
-            "articulos": True,
-            "metodo_pago": True,
-            "pais": True,
-            "almacen": True
-        }
+    # Tables missing from the configuration are enabled
+    return load_config_file(config_path, default={
+        "articulos": True,
+        "metodo_pago": True,
+        "pais": True,
+        "almacen": True
+    })
+
+def get_json_path(table_name):
+    """
+    Get the profiles JSON file for a json-sourced table.
+    
+    Controlled by USE_<TABLE>_JSON (default true) and <TABLE>_JSON
+    (default tables_setup_values.json) inside JSON_DIRECTORY.
+    
+    Args:
+        table_name (str): Table name
+        
+    Returns:
+        str: Path to the JSON file, or None if JSON import is disabled
+    """
+    prefix = table_name.upper()
+    if os.getenv(f'USE_{prefix}_JSON', 'true').lower() != 'true':
+        return None
+    json_directory = os.getenv('JSON_DIRECTORY', '')
+    json_filename = os.getenv(f'{prefix}_JSON', 'tables_setup_values.json')
+    return os.path.join(base_dir, json_directory, json_filename)
+
+def plan_tables(db_connection, table_names):
+    """
+    Compare the enabled tables with the database and print any drift.
+    
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Tables to install
+        
+    Returns:
+        dict: Table name to schema diff, or empty if the catalog could not be
+              read (every table is then created as before)
+    """
+    plan = plan_schema(db_connection, table_names)
+    if plan is None:
+        print("Warning: could not read the database catalog, creating all tables")
+        return {}
+    print_schema_report(plan)
+    return plan
+
+def get_stats_path():
+    """Get the path of the install history used by the install plan."""
+    return os.getenv('INSTALL_STATS', os.path.join(base_dir, 'install_stats.json'))
+
+def install_table(db_connection, table_name, profiles=None, schema=None, stats=None, include_wal=True):
+    """
+    Create and populate a single table.
+    
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Registered table name
+        profiles (list, optional): Store profiles for almacen and general_misc.
+                                   When omitted they are read from the JSON file.
+        schema (dict, optional): Schema diff of the table; when it already
+                                 exists only the missing columns are added
+        stats (dict, optional): Install history to record the load in
+        include_wal (bool, optional): Record the WAL generated (disable when
+                                      other tables load concurrently)
+        
+    Returns:
+        bool: Success status
+    """
+    if stats is not None:
+        before = measure_table(db_connection, table_name)
+        started = time.perf_counter()
+        success = install_table(db_connection, table_name, profiles, schema)
+        if success:
+            seconds = time.perf_counter() - started
+            record_table_load(stats, table_name, before, measure_table(db_connection, table_name, analyze=True),
+                              seconds, include_wal)
+        return success
+    
+    table = get_table_class(table_name)(db_connection)
+    if schema is None or schema["status"] == "missing":
+        print(f"\nCreating {table_name} table...")
+    else:
+        print(f"\n{table_name.capitalize()} table already exists, skipping CREATE TABLE")
+    if not apply_schema_plan(db_connection, table, schema):
+        print(f"Failed to create {table_name} table")
+        return False
+    if schema is None or schema["status"] == "missing":
+        print(f"{table_name.capitalize()} table created successfully")
+    
+    json_path = get_json_path(table_name) if table.data_source == "json" else None
+    return load_table_data(table, profiles=profiles, json_path=json_path)
+
+def install_tables(db_connection, table_config, profiles=None, stats=None, stop=None):
+    """
+    Create and populate the tables enabled in the configuration.
+    
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_config (dict): Table name to enabled flag
+        profiles (list, optional): Store profiles for almacen and general_misc.
+                                   When omitted they are read from the JSON file.
+        stats (dict, optional): Install history to record each load in
+        stop (threading.Event, optional): When set, no further table is started
+        
+    Returns:
+        list: Names of the tables that failed
+    """
+    failures = []
+    
+    enabled = get_enabled_tables(table_config)
+    for table_name in TABLE_MODULES:
+        if table_name not in enabled:
+            print(f"\nSkipping {table_name} table (disabled in configuration)")
+    
+    # One catalog query decides which tables need DDL at all
+    plan = plan_tables(db_connection, enabled)
+    
+    # Tables are processed after the tables they depend on
+    for table_name in resolve_order(enabled):
+        if stop is not None and stop.is_set():
+            print(f"Stopped before {table_name}")
+            break
+        if not install_table(db_connection, table_name, profiles, plan.get(table_name), stats):
+            failures.append(table_name)
+    
+    return failures
+
+def install_tables_parallel(db_connection, pool, table_config, stats=None):
+    """
+    Create and populate the enabled tables concurrently on a connection pool,
+    then run one consistency check over the result.
+    
+    Args:
+        db_connection (DatabaseConnection): Connection used for the final check
+        pool (DatabaseConnectionPool): Connected pool; its size is the number of workers
+        table_config (dict): Table name to enabled flag
+        stats (dict, optional): Install history to record each load in
+                                (without WAL, which concurrent loads share)
+        
+    Returns:
+        list: Names of the tables that failed
+    """
+    from src.database.parallel_install import run_in_parallel, verify_tables
+    
+    enabled = get_enabled_tables(table_config)
+    plan = plan_tables(db_connection, enabled)
+    print(f"\nInstalling {len(enabled)} tables with {pool.size} parallel workers...")
+    
+    started = time.perf_counter()
+    results = run_in_parallel(
+        pool, enabled,
+        lambda connection, table_name: install_table(connection, table_name, schema=plan.get(table_name),
+                                                     stats=stats, include_wal=False)
+    )
+    elapsed = time.perf_counter() - started
+    
+    print("\nTable install times:")
+    for table_name, result in sorted(results.items(), key=lambda item: -item[1]["seconds"]):
+        status = "OK" if result["success"] else f"FAILED ({result['error']})"
+        print(f"  {table_name:<25} {result['seconds']:>7.2f}s  {status}")
+    print(f"Total wall time: {elapsed:.2f}s")
+    
+    failures = [table_name for table_name, result in results.items() if not result["success"]]
+    
+    # Final consistency check: every table exists and seeded tables have rows
+    succeeded = [table_name for table_name in enabled if table_name not in failures]
+    seeded = [table_name for table_name in succeeded
+              if get_table_class(table_name).data_source is not None]
+    problems = verify_tables(db_connection, succeeded, expect_rows=seeded)
+    for problem in problems:
+        print(f"Consistency check: {problem}")
+        failures.append(problem.split(":")[0])
+    if not problems:
+        print("Consistency check passed")
+    
+    return failures
+
+def run_fanout(table_config, dsns):
+    """
+    Provision several store databases concurrently.
+    
+    Targets come from FANOUT_DSNS (semicolon separated) or from the profiles
+    in tables_setup_values.json that define a "dsn". Each target is loaded
+    with its own profile for almacen and general_misc.
+    
+    Args:
+        table_config (dict): Table name to enabled flag
+        dsns (list): Connection strings; empty to use the JSON profiles
+        
+    Returns:
+        int: Exit code
+    """
+    from src.fanout import load_targets, fan_out, print_report
+    
+    json_directory = os.getenv('JSON_DIRECTORY', '')
+    json_filename = os.getenv('GENERAL_MISC_JSON', 'tables_setup_values.json')
+    json_path = os.path.join(base_dir, json_directory, json_filename)
+    
+    driver = os.getenv('DB_DRIVER')
+    targets = load_targets(dsns, json_path, driver)
+    if not targets:
+        print("No fan-out targets found (set FANOUT_DSNS or add \"dsn\" to the profiles)")
+        return 1
+    
+    timeout = float(os.getenv('FANOUT_TIMEOUT', '0')) or None
+    results = fan_out(
+        targets,
+        lambda db_connection, target, stop: install_tables(db_connection, table_config, target['profiles'],
+                                                           stop=stop),
+        max_workers=int(os.getenv('FANOUT_PARALLELISM', '8')),
+        timeout=timeout,
+        session_profile=os.getenv('DB_SESSION_PROFILE', 'bulk_load'),
+        driver=driver
+    )
+    return 0 if print_report(results) else 1
 
 def main():
     """Main function to run the debug script."""
@@ -111,436 +301,137 @@ def main():
     else:
         print("\nDELETE_TABLES flag is set to false. Tables will not be dropped before creation.")
     
+    # Fan-out mode provisions several store databases instead of the .env one
+    fanout_dsns = [dsn.strip() for dsn in os.getenv('FANOUT_DSNS', '').split(';') if dsn.strip()]
+    if fanout_dsns or os.getenv('FANOUT', 'false').lower() == 'true':
+        if delete_tables:
+            print("DELETE_TABLES is not supported in fan-out mode. Exiting.")
+            return 1
+        return run_fanout(table_config, fanout_dsns)
+    
     # Initialize database connection
-    db_connection = DatabaseConnection(
+    connection_kwargs = dict(
         dbname=os.getenv('DB_NAME'),
         user=os.getenv('DB_USER'),
         password=os.getenv('DB_PASSWORD'),
         host=os.getenv('DB_HOST'),
-        port=os.getenv('DB_PORT')
+        port=os.getenv('DB_PORT'),
+        profile=os.getenv('DB_SESSION_PROFILE', 'bulk_load'),
+        driver=os.getenv('DB_DRIVER')
     )
+    db_connection = DatabaseConnection(**connection_kwargs)
     
     # Connect to database
     if not db_connection.connect():
         print("Failed to connect to database")
-        return
+        return 1
     
     try:
         # Delete tables if DELETE_TABLES flag is set to true
         delete_tables = os.getenv('DELETE_TABLES', 'false').lower() == 'true'
         if delete_tables:
             print("\nDeleting tables based on configuration...")
-            # Create a list of tables to delete in reverse order (to handle foreign key constraints)
-            tables_to_delete = []
-            for table_name, enabled in table_config.items():
-                if enabled:
-                    tables_to_delete.append(table_name)
+            from src.database.schema import SchemaManager
+            # One DROP for every enabled table; bounded lock waits so a sync
+            # worker holding a lock cannot hang the installer
+            lock_timeout = os.getenv('DDL_LOCK_TIMEOUT', '2s')
+            ddl_retries = int(os.getenv('DDL_RETRIES', '5'))
             
-            # Reverse the order to handle foreign key constraints
-            tables_to_delete.reverse()
+            tables_to_delete = resolve_order(get_enabled_tables(table_config))
+            if not SchemaManager(db_connection).drop_tables(tables_to_delete, lock_timeout, ddl_retries):
+                print("Failed to drop tables")
+                return 1
+            print(f"Dropped {len(tables_to_delete)} tables")
             
-            for table_name in tables_to_delete:
-                print(f"Dropping table {table_name}...")
-                query = f"DROP TABLE IF EXISTS {table_name} CASCADE;"
-                cursor = db_connection.execute_query(query)
-                if cursor is None:
-                    print(f"Failed to drop table {table_name}")
-                else:
-                    print(f"Table {table_name} dropped successfully")
-            
-            # Commit the changes
-            db_connection.commit()
             print("Table deletion completed")
             print("DELETE_TABLES flag is set to true. Exiting without creating tables.")
             return 0  # Exit with success code
 
-        # Process each table based on configuration
-        
-        # Process articulos table if enabled
-        if table_config.get("articulos", True):
-            print("\nCreating articulos table...")
-            articulos_table = ArticulosTable(db_connection)
-            if articulos_table.create_table():
-                print("Articulos table created successfully")
-                
-                print("\nImporting data from CSV for articulos...")
-                if articulos_table.import_from_csv():
-                    print("Data imported successfully for articulos")
-                else:
-                    print("Failed to import data from CSV for articulos")
-                    print("Make sure the CSV file exists in the configured directory")
-            else:
-                print("Failed to create articulos table")
-        else:
-            print("\nSkipping articulos table (disabled in configuration)")
-        
-        # Process caja_banco table if enabled
-        if table_config.get("caja_banco", True):
-            print("\nCreating caja_banco table...")
-            caja_banco_table = CajaBancoTable(db_connection)
-            if caja_banco_table.create_table():
-                print("Caja_banco table created successfully")
-                
-                print("\nLoading default data for caja_banco...")
-                if caja_banco_table.insert_default_data():
-                    print("Default data for caja_banco loaded successfully")
-                else:
-                    print("Failed to load default data for caja_banco")
-            else:
-                print("Failed to create caja_banco table")
-        else:
-            print("\nSkipping caja_banco table (disabled in configuration)")
-        
-        # Process clientes table if enabled
-        if table_config.get("clientes", True):
-            print("\nCreating clientes table...")
-            clientes_table = ClientesTable(db_connection)
-            if clientes_table.create_table():
-                print("Clientes table created successfully")
-                
-                print("\nLoading default data for clientes...")
-                if clientes_table.insert_default_data():
-                    print("Default data for clientes loaded successfully")
-                else:
-                    print("Failed to load default data for clientes")
-            else:
-                print("Failed to create clientes table")
-        else:
-            print("\nSkipping clientes table (disabled in configuration)")
-        
-        # Process detalle_estado table if enabled
-        if table_config.get("detalle_estado", True):
-            print("\nCreating detalle_estado table...")
-            detalle_estado_table = DetalleEstadoTable(db_connection)
-            if detalle_estado_table.create_table():
-                print("Detalle_estado table created successfully")
-                
-                print("\nLoading default data for detalle_estado...")
-                if detalle_estado_table.insert_default_data():
-                    print("Default data for detalle_estado loaded successfully")
-                else:
-                    print("Failed to load default data for detalle_estado")
-            else:
-                print("Failed to create detalle_estado table")
-        else:
-            print("\nSkipping detalle_estado table (disabled in configuration)")
-        
-        # Process errores table if enabled
-        if table_config.get("errores", True):
-            print("\nCreating errores table...")
-            errores_table = ErroresTable(db_connection)
-            if errores_table.create_table():
-                print("Errores table created successfully")
-                
-                print("\nLoading default data for errores...")
-                if errores_table.insert_default_data():
-                    print("Default data for errores loaded successfully")
-                else:
-                    print("Failed to load default data for errores")
-            else:
-                print("Failed to create errores table")
-        else:
-            print("\nSkipping errores table (disabled in configuration)")
+        stats = load_install_stats(get_stats_path())
         
-        # Process estado_factura_venta table if enabled
-        if table_config.get("estado_factura_venta", True):
-            print("\nCreating estado_factura_venta table...")
-            estado_factura_venta_table = EstadoFacturaVentaTable(db_connection)
-            if estado_factura_venta_table.create_table():
-                print("Estado_factura_venta table created successfully")
-                
-                print("\nLoading default data for estado_factura_venta...")
-                if estado_factura_venta_table.insert_default_data():
-                    print("Default data for estado_factura_venta loaded successfully")
-                else:
-                    print("Failed to load default data for estado_factura_venta")
-            else:
-                print("Failed to create estado_factura_venta table")
-        else:
-            print("\nSkipping estado_factura_venta table (disabled in configuration)")
-        
-        # Process forma_pago table if enabled
-        if table_config.get("forma_pago", True):
-            print("\nCreating forma_pago table...")
-            forma_pago_table = FormaPagoTable(db_connection)
-            if forma_pago_table.create_table():
-                print("Forma_pago table created successfully")
-                
-                print("\nLoading default data for forma_pago...")
-                if forma_pago_table.insert_default_data():
-                    print("Default data for forma_pago loaded successfully")
-                else:
-                    print("Failed to load default data for forma_pago")
-            else:
-                print("Failed to create forma_pago table")
-        else:
-            print("\nSkipping forma_pago table (disabled in configuration)")
-        
-        # Process forma_pago_caja_banco table if enabled
-        if table_config.get("forma_pago_caja_banco", True):
-            print("\nCreating forma_pago_caja_banco table...")
-            forma_pago_caja_banco_table = FormaPagoCajaBancoTable(db_connection)
-            if forma_pago_caja_banco_table.create_table():
-                print("Forma_pago_caja_banco table created successfully")
-                
-                print("\nLoading default data for forma_pago_caja_banco...")
-                if forma_pago_caja_banco_table.insert_default_data():
-                    print("Default data for forma_pago_caja_banco loaded successfully")
-                else:
-                    print("Failed to load default data for forma_pago_caja_banco")
-            else:
-                print("Failed to create forma_pago_caja_banco table")
-        else:
-            print("\nSkipping forma_pago_caja_banco table (disabled in configuration)")
+        # Dry run: print what the install would do and its estimated cost
+        if os.getenv('INSTALL_PLAN', 'false').lower() == 'true':
+            plan = build_install_plan(db_connection, get_enabled_tables(table_config), stats)
+            if plan is None:
+                print("Failed to build the install plan")
+                return 1
+            window = float(os.getenv('MAINTENANCE_WINDOW', '0')) or None
+            return 0 if print_install_plan(plan, window) else 1
         
-        # Process general_misc table if enabled
-        if table_config.get("general_misc", True):
-            print("\nCreating general_misc table...")
-            general_misc_table = GeneralMiscTable(db_connection)
-            if general_misc_table.create_table():
-                print("General_misc table created successfully")
-                
-                # Check if JSON import is enabled (default to true)
-                use_json = os.getenv('USE_GENERAL_MISC_JSON', 'true').lower() == 'true'
-                if use_json:
-                    print("\nImporting data from JSON for general_misc...")
-                    # Get JSON path from environment variable or use default
-                    json_directory = os.getenv('JSON_DIRECTORY', '')
-                    json_filename = os.getenv('GENERAL_MISC_JSON', 'tables_setup_values.json')
-                    json_path = os.path.join(base_dir, json_directory, json_filename)
-                    
-                    if os.path.exists(json_path):
-                        if general_misc_table.import_from_json(json_path):
-                            print("Data imported successfully for general_misc from JSON")
-                        else:
-                            print("Failed to import data from JSON for general_misc")
-                            print("Falling back to default data...")
-                            if general_misc_table.insert_default_data():
-                                print("Default data for general_misc loaded successfully")
-                            else:
-                                print("Failed to load default data for general_misc")
-                    else:
-                        print(f"JSON file not found at {json_path}")
-                        print("Falling back to default data...")
-                        if general_misc_table.insert_default_data():
-                            print("Default data for general_misc loaded successfully")
-                        else:
-                            print("Failed to load default data for general_misc")
-                # else:
-                #     # Check if CSV import is enabled as fallback
-                #     use_csv = os.getenv('USE_GENERAL_MISC_CSV', 'false').lower() == 'true'
-                #     if use_csv:
-                #         print("\nImporting data from CSV for general_misc...")
-                #         # Get CSV path from environment variable or use default
-                #         csv_directory = os.getenv('CSV_DIRECTORY', 'data/csv')
-                #         csv_filename = os.getenv('GENERAL_MISC_CSV', GENERAL_MISC_CSV)
-                #         csv_path = os.path.join(base_dir, csv_directory, csv_filename)
-                        
-                #         if general_misc_table.import_from_csv(csv_path):
-                #             print("Data imported successfully for general_misc from CSV")
-                #         else:
-                #             print("Failed to import data from CSV for general_misc")
-                #             print("Falling back to default data...")
-                #             if general_misc_table.insert_default_data():
-                #                 print("Default data for general_misc loaded successfully")
-                #             else:
-                #                 print("Failed to load default data for general_misc")
-                #     else:
-                #         print("\nLoading default data for general_misc...")
-                #         if general_misc_table.insert_default_data():
-                #             print("Default data for general_misc loaded successfully")
-                #         else:
-                #             print("Failed to load default data for general_misc")
-            else:
-                print("Failed to create general_misc table")
+        # Process each table based on configuration, optionally on several connections
+        install_workers = int(os.getenv('INSTALL_WORKERS', '1'))
+        if install_workers > 1:
+            from src.database.connection import DatabaseConnectionPool
+            pool = DatabaseConnectionPool(install_workers, **connection_kwargs)
+            if not pool.connect():
+                print("Failed to open the connection pool")
+                return 1
+            try:
+                failures = install_tables_parallel(db_connection, pool, table_config, stats)
+            finally:
+                pool.close()
         else:
-            print("\nSkipping general_misc table (disabled in configuration)")
+            failures = install_tables(db_connection, table_config, stats=stats)
+        save_install_stats(get_stats_path(), stats)
         
-        # Process iva table if enabled
-        if table_config.get("iva", True):
-            print("\nCreating iva table...")
-            iva_table = IvaTable(db_connection)
-            if iva_table.create_table():
-                print("Iva table created successfully")
-                
-                print("\nLoading default data for iva...")
-                if iva_table.insert_default_data():
-                    print("Default data for iva loaded successfully")
-                else:
-                    print("Failed to load default data for iva")
-            else:
-                print("Failed to create iva table")
-        else:
-            print("\nSkipping iva table (disabled in configuration)")
+        # Versioned schema changes on top of the created tables
+        migrations_dir = os.getenv('MIGRATIONS_DIRECTORY', os.path.join(base_dir, 'migrations'))
+        if os.path.isdir(migrations_dir):
+            print("\nApplying schema migrations...")
+            from src.database.schema import SchemaManager
+            if not SchemaManager(db_connection).migrate(migrations_dir, os.getenv('DDL_LOCK_TIMEOUT', '2s'),
+                                                        int(os.getenv('DDL_RETRIES', '5'))):
+                failures.append('schema_migrations')
         
-        # Process metodo_pago table if enabled
-        if table_config.get("metodo_pago", True):
-            print("\nCreating metodo_pago table...")
-            metodo_pago_table = MetodoPagoTable(db_connection)
-            if metodo_pago_table.create_table():
-                print("Metodo_pago table created successfully")
-                
-                print("\nImporting data from CSV for metodo_pago...")
-                if metodo_pago_table.import_from_csv():
-                    print("Data imported successfully for metodo_pago")
-                else:
-                    print("Failed to import data from CSV for metodo_pago")
-                    print("Make sure the CSV file exists in the configured directory")
-            else:
-                print("Failed to create metodo_pago table")
-        else:
-            print("\nSkipping metodo_pago table (disabled in configuration)")
+        # Upcoming monthly partitions and retention of the partitioned tables
+        if os.getenv('PARTITION_MAINTENANCE', 'true').lower() == 'true':
+            from src.database.partitioning import maintain_partitions
+            drop_expired = os.getenv('PARTITION_DROP_EXPIRED', 'false').lower() == 'true'
+            if not maintain_partitions(db_connection, get_enabled_tables(table_config), drop=drop_expired):
+                failures.append('partitions')
         
-        # Process pais table if enabled
-        if table_config.get("pais", True):
-            print("\nCreating pais table...")
-            pais_table = PaisTable(db_connection)
-            if pais_table.create_table():
-                print("Pais table created successfully")
-                
-                print("\nLoading default data for pais...")
-                if pais_table.insert_default_data():
-                    print("Default data for pais loaded successfully")
-                else:
-                    print("Failed to load default data for pais")
-            else:
-                print("Failed to create pais table")
-        else:
-            print("\nSkipping pais table (disabled in configuration)")
-        
-        # Process proveedor table if enabled
-        if table_config.get("proveedor", True):
-            print("\nCreating proveedor table...")
-            proveedor_table = ProveedorTable(db_connection)
-            if proveedor_table.create_table():
-                print("Proveedor table created successfully")
-                
-                print("\nLoading default data for proveedor...")
-                if proveedor_table.insert_default_data():
-                    print("Default data for proveedor loaded successfully")
-                else:
-                    print("Failed to load default data for proveedor")
-            else:
-                print("Failed to create proveedor table")
-        else:
-            print("\nSkipping proveedor table (disabled in configuration)")
+        # Move old log rows to compressed archives in small batches
+        archive_days = os.getenv('ARCHIVE_OLDER_THAN_DAYS')
+        if archive_days:
+            from src.database.archival import archive_tables
+            cutoff = date.today() - timedelta(days=int(archive_days))
+            archive_dir = os.getenv('ARCHIVE_DIRECTORY', os.path.join(base_dir, 'archive'))
+            if not archive_tables(db_connection, get_enabled_tables(table_config), cutoff, archive_dir,
+                                  batch_size=int(os.getenv('ARCHIVE_BATCH_SIZE', '5000')),
+                                  pause=float(os.getenv('ARCHIVE_PAUSE', '0.5'))):
+                failures.append('archive')
         
-        # Process recibo_venta table if enabled
-        if table_config.get("recibo_venta", True):
-            print("\nCreating recibo_venta table...")
-            recibo_venta_table = ReciboVentaTable(db_connection)
-            if recibo_venta_table.create_table():
-                print("Recibo_venta table created successfully")
-                
-                print("\nLoading default data for recibo_venta...")
-                if recibo_venta_table.insert_default_data():
-                    print("Default data for recibo_venta loaded successfully")
-                else:
-                    print("Failed to load default data for recibo_venta")
-            else:
-                print("Failed to create recibo_venta table")
-        else:
-            print("\nSkipping recibo_venta table (disabled in configuration)")
-        
-        # Process reintentos_fac_venta table if enabled
-        if table_config.get("reintentos_fac_venta", True):
-            print("\nCreating reintentos_fac_venta table...")
-            reintentos_fac_venta_table = ReintentosFacturaVentaTable(db_connection)
-            if reintentos_fac_venta_table.create_table():
-                print("Reintentos_fac_venta table created successfully")
-                
-                print("\nLoading default data for reintentos_fac_venta...")
-                if reintentos_fac_venta_table.insert_default_data():
-                    print("Default data for reintentos_fac_venta loaded successfully")
-                else:
-                    print("Failed to load default data for reintentos_fac_venta")
-            else:
-                print("Failed to create reintentos_fac_venta table")
-        else:
-            print("\nSkipping reintentos_fac_venta table (disabled in configuration)")
-        
-        # Process tipo_movimiento table if enabled
-        if table_config.get("tipo_movimiento", True):
-            print("\nCreating tipo_movimiento table...")
-            tipo_movimiento_table = TipoMovimientoTable(db_connection)
-            if tipo_movimiento_table.create_table():
-                print("Tipo_movimiento table created successfully")
-                
-                print("\nLoading default data for tipo_movimiento...")
-                if tipo_movimiento_table.insert_default_data():
-                    print("Default data for tipo_movimiento loaded successfully")
-                else:
-                    print("Failed to load default data for tipo_movimiento")
-            else:
-                print("Failed to create tipo_movimiento table")
-        else:
-            print("\nSkipping tipo_movimiento table (disabled in configuration)")
-        
-        # Process vendedores table if enabled
-        if table_config.get("vendedores", True):
-            print("\nCreating vendedores table...")
-            vendedores_table = VendedoresTable(db_connection)
-            if vendedores_table.create_table():
-                print("Vendedores table created successfully")
-                
-                print("\nLoading default data for vendedores...")
-                if vendedores_table.insert_default_data():
-                    print("Default data for vendedores loaded successfully")
-                else:
-                    print("Failed to load default data for vendedores")
-            else:
-                print("Failed to create vendedores table")
-        else:
-            print("\nSkipping vendedores table (disabled in configuration)")
-            
-        # Process almacen table if enabled
-        if table_config.get("almacen", True):
-            print("\nCreating almacen table...")
-            almacen_table = AlmacenTable(db_connection)
-            if almacen_table.create_table():
-                print("Almacen table created successfully")
-                
-                # Check if JSON import is enabled (default to true)
-                use_json = os.getenv('USE_ALMACEN_JSON', 'true').lower() == 'true'
-                if use_json:
-                    print("\nImporting data from JSON for almacen...")
-                    # Get JSON path from environment variable or use default
-                    json_directory = os.getenv('JSON_DIRECTORY', '')
-                    json_filename = os.getenv('ALMACEN_JSON', 'tables_setup_values.json')
-                    json_path = os.path.join(base_dir, json_directory, json_filename)
-                    
-                    if os.path.exists(json_path):
-                        if almacen_table.import_from_json(json_path):
-                            print("Data imported successfully for almacen from JSON")
-                        else:
-                            print("Failed to import data from JSON for almacen")
-                            print("Falling back to default data...")
-                            if almacen_table.insert_default_data():
-                                print("Default data for almacen loaded successfully")
-                            else:
-                                print("Failed to load default data for almacen")
-                    else:
-                        print(f"JSON file not found at {json_path}")
-                        print("Falling back to default data...")
-                        if almacen_table.insert_default_data():
-                            print("Default data for almacen loaded successfully")
-                        else:
-                            print("Failed to load default data for almacen")
-                else:
-                    print("\nLoading default data for almacen...")
-                    if almacen_table.insert_default_data():
-                        print("Default data for almacen loaded successfully")
-                    else:
-                        print("Failed to load default data for almacen")
-            else:
-                print("Failed to create almacen table")
-        else:
-            print("\nSkipping almacen table (disabled in configuration)")
+        # Statistics, vacuum and buffer cache warm-up for the loaded tables
+        if os.getenv('POST_LOAD', 'false').lower() == 'true':
+            from src.database.post_load import run_post_load
+            loaded = [name for name in get_enabled_tables(table_config)
+                      if name not in failures and get_table_class(name).data_source]
+            post_load_workers = min(int(os.getenv('POST_LOAD_WORKERS', '4')), len(loaded))
+            pool = None
+            if post_load_workers > 1:
+                from src.database.connection import DatabaseConnectionPool
+                pool = DatabaseConnectionPool(post_load_workers, **connection_kwargs)
+                if not pool.connect():
+                    pool = None
+            try:
+                if not run_post_load(db_connection, loaded, pool):
+                    failures.append('post_load')
+            finally:
+                if pool:
+                    pool.close()
+        if failures:
+            print(f"\nTables with errors: {', '.join(failures)}")
+            print("\nDebug script completed with errors")
+            return 1
         
         print("\nDebug script completed successfully")
+        return 0
         
-    except Exception as e:
-        print(f"Error in debug script: {e}")
+    except Exception:
+        # Reported in full and as a failed run, not as a one-line message
+        traceback.print_exc()
+        print("Debug script failed")
+        return 1
     finally:
         # Close database connection
         db_connection.close()
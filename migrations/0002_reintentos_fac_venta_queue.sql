@@ -0,0 +1,8 @@
+-- migrate:requires reintentos_fac_venta
+-- Retry queue as the handler declares it: completado is NOT NULL, and the
+-- pendientes index, replaced by reintentos_fac_venta_proximo_idx, is dropped
+-- since no query uses it.
+UPDATE reintentos_fac_venta SET completado = false WHERE completado IS NULL;
+ALTER TABLE reintentos_fac_venta ALTER COLUMN completado SET NOT NULL;
+
+DROP INDEX IF EXISTS reintentos_fac_venta_pendientes_idx;
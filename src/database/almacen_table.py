@@ -8,6 +8,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class AlmacenTable(TableSimpleBlueprint):
     """Handler for the 'almacen' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "almacen"
+    dependencies = ()
+    data_source = "json"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+    
     def __init__(self, db_connection):
         """Initialize the almacen table handler."""
         super().__init__(db_connection, "almacen")
@@ -58,7 +65,7 @@ class AlmacenTable(TableSimpleBlueprint):
             (velneo, 'x', plaza)
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def insert_from_profiles(self, profiles):
         """
@@ -84,7 +91,7 @@ class AlmacenTable(TableSimpleBlueprint):
                 data.append((almacen, plaza, tienda))
                 
         if data:
-            return self.insert_data(data)
+            return self.seed_data(data)
         return False
     
     def import_from_json(self, json_path):
@@ -0,0 +1,336 @@
+"""
+Batched archival of old rows.
+
+Tables declaring an ``archive_column`` (the row date) and an ``archive_key``
+(an indexed, unique ordering) can have the rows older than a cutoff moved out
+in small key-ordered batches. Each batch is deleted with
+COPY (DELETE ... RETURNING *) TO STDOUT into its own gzip-compressed CSV file,
+which is completed, synced and renamed into place before the transaction
+commits, so a crash can at worst archive a batch twice and never loses rows
+or leaves a truncated archive behind. The files of a cutoff are numbered
+<table>_before_<cutoff>_<batch>.csv.gz and can be read in order as one CSV.
+
+Progress is checkpointed after every batch, and the job pauses between
+batches and while standbys are lagging, so it can run during business hours.
+"""
+import os
+import re
+import gzip
+import json
+import time
+from datetime import datetime
+
+from .registry import get_table_class
+
+
+DEFAULT_BATCH_SIZE = 5000
+# Seconds to sleep between batches
+DEFAULT_PAUSE = 0.5
+# Replay lag of the slowest standby above which batches wait
+DEFAULT_MAX_LAG_BYTES = 64 * 1024 * 1024
+
+CHECKPOINT_FILE = "archive_checkpoint.json"
+
+
+class _CountingWriter:
+    """File wrapper counting the bytes written through it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self.file.write(data)
+
+
+def load_checkpoint(archive_dir):
+    """
+    Load the archival progress of previous runs.
+
+    Args:
+        archive_dir (str): Archive directory
+
+    Returns:
+        dict: Table name to its progress
+    """
+    path = os.path.join(archive_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as checkpoint_file:
+            return json.load(checkpoint_file)
+    except Exception as e:
+        print(f"Warning: could not read archive checkpoint {path}: {e}")
+        return {}
+
+
+def save_checkpoint(archive_dir, checkpoint):
+    """
+    Save the archival progress, replacing the file atomically.
+
+    Args:
+        archive_dir (str): Archive directory
+        checkpoint (dict): Table name to its progress
+    """
+    path = os.path.join(archive_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=4, sort_keys=True, default=str)
+    os.replace(path + ".tmp", path)
+
+
+def get_replication_lag(db_connection):
+    """
+    Get the replay lag of the slowest standby.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+
+    Returns:
+        int: Lag in bytes (0 without standbys), or None if it cannot be read
+    """
+    cursor = db_connection.execute_query(
+        "SELECT COALESCE(max(pg_wal_lsn_diff(pg_current_wal_lsn(), replay_lsn)), 0)::bigint "
+        "FROM pg_stat_replication"
+    )
+    lag = cursor.fetchone()[0] if cursor is not None else None
+    db_connection.connection.rollback()
+    return lag
+
+
+def wait_for_replicas(db_connection, max_lag_bytes, pause):
+    """
+    Sleep while the slowest standby is more than max_lag_bytes behind.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        max_lag_bytes (int): Accepted replay lag
+        pause (float): Seconds between checks (at least one second)
+    """
+    while True:
+        lag = get_replication_lag(db_connection)
+        if lag is None or lag <= max_lag_bytes:
+            return
+        print(f"Standby replay lag is {lag} bytes, waiting...")
+        time.sleep(max(pause, 1.0))
+
+
+def get_archive_prefix(table_name, cutoff):
+    """
+    Get the file name prefix of a table's archives for a cutoff.
+
+    Args:
+        table_name (str): Table name
+        cutoff (date): Archival cutoff
+
+    Returns:
+        str: Prefix the batch number and extension are appended to
+    """
+    return f"{table_name}_before_{cutoff:%Y%m%d}_"
+
+
+def next_archive_number(archive_dir, prefix):
+    """
+    Get the number of the next archive file, after every file on disk.
+
+    Counting the files rather than the checkpoint keeps a batch committed just
+    before a crash from being overwritten by the next run.
+
+    Args:
+        archive_dir (str): Archive directory
+        prefix (str): Archive file name prefix
+
+    Returns:
+        int: Next batch number
+    """
+    pattern = re.compile(re.escape(prefix) + r"(\d+)\.csv\.gz$")
+    numbers = [int(match.group(1)) for match in map(pattern.match, os.listdir(archive_dir)) if match]
+    return max(numbers, default=0) + 1
+
+
+def _sync_directory(path):
+    """Make a rename in a directory durable; not possible (nor needed) on Windows."""
+    if os.name == "nt":
+        return
+    directory = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def archive_batch(db_connection, table_name, column, key, cutoff, last_key, batch_size, archive_path,
+                  lock_timeout="2s"):
+    """
+    Move one batch of rows older than the cutoff to a new archive file.
+
+    The file is written under a temporary name, synced and renamed to
+    archive_path before the DELETE commits.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        column (str): Date column compared with the cutoff
+        key (tuple): Key columns the batches are ordered by
+        cutoff (date): Rows with an earlier date are archived
+        last_key (list): Key of the last archived row, or None to start
+        batch_size (int): Rows per batch
+        archive_path (str): Path of the compressed archive file to create
+        lock_timeout (str, optional): Maximum time to wait for row locks
+
+    Returns:
+        tuple: (rows, last_key, bytes) where rows is 0 when nothing is left
+               and bytes is the CSV row data archived, or None on failure
+    """
+    sql = db_connection.backend.sql
+    table = sql.Identifier(table_name)
+    keys = sql.SQL(", ").join(map(sql.Identifier, key))
+    where = sql.SQL("{column} < {cutoff}").format(column=sql.Identifier(column), cutoff=sql.Literal(cutoff))
+    if last_key is not None:
+        where += sql.SQL(" AND ({keys}) > ({last})").format(
+            keys=keys, last=sql.SQL(", ").join(map(sql.Literal, last_key)))
+
+    db_connection.execute_query("SELECT set_config('lock_timeout', %s, true)", (lock_timeout,))
+    # Last key of the batch: the batch_size-th row if there is one, otherwise the last row left
+    descending = sql.SQL(", ").join(sql.SQL("{} DESC").format(sql.Identifier(column)) for column in key)
+    cursor = db_connection.execute_query(sql.SQL(
+        "(SELECT {keys}, 1 AS bound_rank FROM {table} WHERE {where} ORDER BY {keys} OFFSET {offset} LIMIT 1) "
+        "UNION ALL (SELECT {keys}, 2 FROM {table} WHERE {where} ORDER BY {descending} LIMIT 1) "
+        "ORDER BY bound_rank LIMIT 1"
+    ).format(keys=keys, table=table, where=where, descending=descending, offset=sql.Literal(batch_size - 1)))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    bound = cursor.fetchone()
+    if bound is None:
+        db_connection.connection.rollback()
+        return 0, last_key, 0
+    bound = bound[:-1]
+
+    batch = where + sql.SQL(" AND ({keys}) <= ({bound})").format(
+        keys=keys, bound=sql.SQL(", ").join(map(sql.Literal, bound)))
+    partial_path = archive_path + ".part"
+    try:
+        with open(partial_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+                archive = _CountingWriter(compressed)
+                copied = db_connection.copy_out(
+                    sql.SQL("DELETE FROM {table} WHERE {batch} RETURNING *").format(table=table, batch=batch),
+                    archive)
+            if copied:
+                # Complete on disk before the rows are gone
+                raw.flush()
+                os.fsync(raw.fileno())
+        if not copied:
+            os.remove(partial_path)
+            return None
+        rows = db_connection.cursor.rowcount
+        if rows <= 0:
+            # Deleted by someone else since the bound was read
+            os.remove(partial_path)
+            db_connection.connection.rollback()
+            return 0, last_key, 0
+        os.replace(partial_path, archive_path)
+        _sync_directory(os.path.dirname(os.path.abspath(archive_path)))
+    except OSError as e:
+        print(f"Error writing archive {archive_path}: {e}")
+        db_connection.connection.rollback()
+        return None
+
+    db_connection.commit()
+    return rows, list(bound), archive.bytes
+
+
+def archive_table(db_connection, table_name, cutoff, archive_dir, batch_size=DEFAULT_BATCH_SIZE,
+                  pause=DEFAULT_PAUSE, max_lag_bytes=DEFAULT_MAX_LAG_BYTES, lock_timeout="2s"):
+    """
+    Archive and delete the rows of a table older than the cutoff.
+
+    Every batch goes to a new numbered file. A run with the same cutoff
+    resumes after the last checkpointed key and continues the numbering.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Registered table name
+        cutoff (date): Rows with an earlier date are archived
+        archive_dir (str): Directory of the archive files and checkpoint
+        batch_size (int, optional): Rows per batch
+        pause (float, optional): Seconds to sleep between batches
+        max_lag_bytes (int, optional): Standby replay lag batches wait for
+        lock_timeout (str, optional): Maximum time to wait for row locks
+
+    Returns:
+        dict: 'rows', 'bytes' (CSV row data removed), 'archive' (file name
+              pattern), 'files' and 'archive_bytes' of this run, or None on failure
+    """
+    table = get_table_class(table_name)
+    os.makedirs(archive_dir, exist_ok=True)
+    checkpoint = load_checkpoint(archive_dir)
+    progress = checkpoint.get(table_name, {})
+    if progress.get("cutoff") != cutoff.isoformat():
+        progress = {"cutoff": cutoff.isoformat(), "last_key": None, "rows": 0, "bytes": 0}
+
+    prefix = get_archive_prefix(table_name, cutoff)
+    number = next_archive_number(archive_dir, prefix)
+    result = {"rows": 0, "bytes": 0, "archive": os.path.join(archive_dir, prefix + "*.csv.gz"),
+              "files": 0, "archive_bytes": 0}
+
+    while True:
+        wait_for_replicas(db_connection, max_lag_bytes, pause)
+        archive_path = os.path.join(archive_dir, f"{prefix}{number:06d}.csv.gz")
+        batch = archive_batch(db_connection, table_name, table.archive_column, table.archive_key,
+                              cutoff, progress["last_key"], batch_size, archive_path, lock_timeout)
+        if batch is None:
+            print(f"Archiving '{table_name}' stopped; the next run resumes from the last checkpoint")
+            return None
+        rows, progress["last_key"], written = batch
+        if not rows:
+            break
+
+        number += 1
+        result["rows"] += rows
+        result["bytes"] += written
+        result["files"] += 1
+        result["archive_bytes"] += os.path.getsize(archive_path)
+        progress["rows"] += rows
+        progress["bytes"] += written
+        progress["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        checkpoint[table_name] = progress
+        save_checkpoint(archive_dir, checkpoint)
+        time.sleep(pause)
+
+    return result
+
+
+def archive_tables(db_connection, table_names, cutoff, archive_dir, **options):
+    """
+    Archive the rows older than the cutoff of the archivable tables among
+    the given ones and report what was moved.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Registered table names
+        cutoff (date): Rows with an earlier date are archived
+        archive_dir (str): Directory of the archive files and checkpoint
+        **options: batch_size, pause, max_lag_bytes and lock_timeout for archive_table
+
+    Returns:
+        bool: Success status
+    """
+    success = True
+    for table_name in table_names:
+        if not getattr(get_table_class(table_name), "archive_column", None):
+            continue
+        print(f"Archiving '{table_name}' rows before {cutoff.isoformat()}...")
+        started = time.perf_counter()
+        result = archive_table(db_connection, table_name, cutoff, archive_dir, **options)
+        if result is None:
+            success = False
+            continue
+        if not result["rows"]:
+            print(f"No rows of '{table_name}' to archive")
+            continue
+        print(f"Archived {result['rows']} rows of '{table_name}' in {time.perf_counter() - started:.1f}s: "
+              f"{result['bytes']} bytes of row data reclaimed, {result['archive_bytes']} bytes "
+              f"written to {result['files']} files {result['archive']}")
+    return success
@@ -6,30 +6,47 @@ import sys
 import csv
 from pathlib import Path
 from ..config import CSV_DIRECTORY, ARTICULOS_CSV
+from .row_codecs import get_row_codec, CodecError
 
 
 class ArticulosTable:
     """Handler for the 'articulos' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "articulos"
+    dependencies = ()
+    data_source = "csv"
+    load_strategy = "upsert"
+    prewarm = True
+    
     def __init__(self, db_connection):
         """Initialize the articulos table handler."""
         self.db_connection = db_connection
         self.table_name = "articulos"
     
-    def create_table(self):
+    def get_create_query(self):
         """
-        Create the articulos table.
+        Get the SQL query to create the articulos table.
         
         Returns:
-            bool: Success status
+            str: SQL query
         """
-        query = """
+        return """
         CREATE TABLE IF NOT EXISTS articulos (
             velneo_id INT PRIMARY KEY,
             pvsi_clave VARCHAR(20),
             nombre VARCHAR(255)
         );
         """
+    
+    def create_table(self):
+        """
+        Create the articulos table.
+        
+        Returns:
+            bool: Success status
+        """
+        query = self.get_create_query()
         
         cursor = self.db_connection.execute_query(query)
         if cursor is None:
@@ -120,6 +137,12 @@ class ArticulosTable:
             batch_size = 20000
             batch = []
             
+            # Types and lengths come from the catalog; over-length names are truncated
+            codec = get_row_codec(self.db_connection, "articulos", ["velneo_id", "pvsi_clave", "nombre"],
+                                  on_overflow="truncate")
+            if codec is None:
+                return False
+            
             # Prepare insert query
             query = """
             INSERT INTO articulos (velneo_id, pvsi_clave, nombre)
@@ -131,18 +154,10 @@ class ArticulosTable:
             
             # Process rows in batches
             row_count = 0
-            problematic_rows = []
+            rejected_rows = []
             for row in cleaned_rows:
                 row_count += 1
                 
-                # Check for values exceeding column length limits
-                if len(row['nombre']) > 255:
-                    problematic_rows.append({
-                        'row_number': row_count,
-                        'velneo_id': row['velneo_id'],
-                        'nombre_length': len(row['nombre'])
-                    })
-                
                 # Only print first row for reference
                 if row_count == 1:
                     print("First row values:")
@@ -151,11 +166,11 @@ class ArticulosTable:
                     print(f"nombre: {row['nombre']}")
                     print(f"nombre length: {len(row['nombre'])}")
                 
-                batch.append((
-                    int(row['velneo_id']),
-                    row['pvsi_clave'],
-                    row['nombre'][:255]  # Truncate to 255 chars to avoid error
-                ))
+                try:
+                    batch.append(codec.encode((row['velneo_id'], row['pvsi_clave'], row['nombre'])))
+                except CodecError as e:
+                    rejected_rows.append((row_count, e))
+                    continue
                 
                 # Execute batch insert when batch size is reached
                 if len(batch) >= batch_size:
@@ -171,13 +186,14 @@ class ArticulosTable:
                     return False
             
             # Print summary of problematic rows
-            if problematic_rows:
-                print(f"\nFound {len(problematic_rows)} rows with 'nombre' values exceeding 255 characters:")
-                for i, row in enumerate(problematic_rows[:5]):  # Show first 5 problematic rows
-                    print(f"Row {row['row_number']}, velneo_id: {row['velneo_id']}, nombre length: {row['nombre_length']}")
-                if len(problematic_rows) > 5:
-                    print(f"...and {len(problematic_rows) - 5} more rows with long values")
-                print("All values were truncated to 255 characters for import.")
+            if codec.truncated:
+                print(f"\n{codec.truncated} values exceeded their column length and were truncated for import.")
+            if rejected_rows:
+                print(f"\nSkipped {len(rejected_rows)} invalid rows:")
+                for row_number, error in rejected_rows[:5]:  # Show first 5 problematic rows
+                    print(f"Row {row_number}: {error}")
+                if len(rejected_rows) > 5:
+                    print(f"...and {len(rejected_rows) - 5} more invalid rows")
             
             self.db_connection.commit()
             return True
@@ -0,0 +1,307 @@
+"""
+Driver backends for DatabaseConnection.
+Wraps the differences between psycopg2 and psycopg 3 behind one interface.
+"""
+from contextlib import nullcontext
+
+
+# Characters psycopg2 reads from the row stream per COPY data message
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def _copy_text_value(value):
+    """
+    Encode one value for COPY text format.
+
+    Args:
+        value: Python value
+
+    Returns:
+        str: Escaped text, or \\N for NULL
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = str(value)
+    return (text.replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r"))
+
+
+def encode_copy_text(row):
+    """
+    Encode one row as a line of COPY text format.
+
+    Args:
+        row (tuple): Row values
+
+    Returns:
+        str: Tab separated values ending in a newline
+    """
+    return "\t".join(_copy_text_value(value) for value in row) + "\n"
+
+
+class CopyTextReader:
+    """
+    Read-only text file over rows encoded as COPY text format on demand, so
+    copy_expert streams a large batch in chunks without holding all of it.
+    """
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows (iterable): Row tuples, consumed as the COPY reads
+        """
+        self._lines = map(encode_copy_text, rows)
+        self._pending = ""
+
+    def read(self, size=-1):
+        """
+        Read up to size characters (all that is left when size is negative).
+
+        Returns:
+            str: Encoded rows; empty once every row has been read
+        """
+        chunks = [self._pending]
+        length = len(self._pending)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(chunks)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+class Psycopg2Backend:
+    """Backend using psycopg2 (always available, used as the fallback)."""
+
+    name = "psycopg2"
+
+    def __init__(self):
+        """Import psycopg2 and expose the pieces DatabaseConnection needs."""
+        import psycopg2
+        from psycopg2 import errors, sql
+        from psycopg2.extras import execute_batch
+
+        self.driver = psycopg2
+        self.sql = sql
+        self.Error = psycopg2.Error
+        self.LockNotAvailable = errors.LockNotAvailable
+        self.QueryCanceled = errors.QueryCanceled
+        self._execute_batch = execute_batch
+
+    def connect(self, params):
+        """
+        Open a connection.
+
+        Args:
+            params (dict): libpq connection parameters
+
+        Returns:
+            connection: psycopg2 connection
+        """
+        return self.driver.connect(**params)
+
+    def parse_dsn(self, dsn):
+        """
+        Split a connection string or URI into parameters.
+
+        Args:
+            dsn (str): Connection string
+
+        Returns:
+            dict: Connection parameters
+        """
+        return self.driver.extensions.parse_dsn(dsn)
+
+    def execute_batch(self, cursor, query, params_list):
+        """
+        Execute a query for many parameter sets with few round trips.
+
+        Args:
+            cursor: Cursor to use
+            query (str): SQL query
+            params_list (list): List of parameter tuples
+        """
+        self._execute_batch(cursor, query, params_list)
+
+    def copy_rows(self, cursor, copy_query, rows, types=None):
+        """
+        Stream rows into a COPY ... FROM STDIN statement.
+        psycopg2 only supports text format, so types are ignored.
+
+        Args:
+            cursor: Cursor to use
+            copy_query (str): COPY ... FROM STDIN statement (text format)
+            rows (iterable): Row tuples
+            types (list, optional): Not used by psycopg2
+        """
+        cursor.copy_expert(copy_query, CopyTextReader(rows), size=COPY_CHUNK_SIZE)
+
+    def copy_out(self, cursor, copy_query, file):
+        """
+        Write the output of a COPY ... TO STDOUT statement to a file.
+
+        Args:
+            cursor: Cursor to use
+            copy_query (str): COPY ... TO STDOUT statement
+            file: Binary file object
+        """
+        cursor.copy_expert(copy_query, file)
+
+    def pipeline(self, connection):
+        """
+        psycopg2 has no pipeline mode; statements run one round trip each.
+
+        Args:
+            connection: Open connection
+
+        Returns:
+            context manager: No-op context
+        """
+        return nullcontext()
+
+
+class Psycopg3Backend:
+    """Backend using psycopg 3 (pipeline mode, binary COPY, server-side binding)."""
+
+    name = "psycopg"
+
+    def __init__(self, prepare_threshold=5):
+        """
+        Import psycopg and expose the pieces DatabaseConnection needs.
+
+        Args:
+            prepare_threshold (int, optional): Executions of a query before it is
+                                               turned into a prepared statement
+        """
+        import psycopg
+        from psycopg import errors, sql
+        from psycopg.conninfo import conninfo_to_dict
+
+        self.driver = psycopg
+        self.sql = sql
+        self.Error = psycopg.Error
+        self.LockNotAvailable = errors.LockNotAvailable
+        self.QueryCanceled = errors.QueryCanceled
+        self._conninfo_to_dict = conninfo_to_dict
+        self.prepare_threshold = prepare_threshold
+
+    def connect(self, params):
+        """
+        Open a connection.
+
+        Args:
+            params (dict): libpq connection parameters
+
+        Returns:
+            connection: psycopg connection
+        """
+        connection = self.driver.connect(**params)
+        connection.prepare_threshold = self.prepare_threshold
+        return connection
+
+    def parse_dsn(self, dsn):
+        """
+        Split a connection string or URI into parameters.
+
+        Args:
+            dsn (str): Connection string
+
+        Returns:
+            dict: Connection parameters
+        """
+        return self._conninfo_to_dict(dsn)
+
+    def execute_batch(self, cursor, query, params_list):
+        """
+        Execute a query for many parameter sets.
+        psycopg 3 pipelines executemany, so no helper is needed.
+
+        Args:
+            cursor: Cursor to use
+            query (str): SQL query
+            params_list (list): List of parameter tuples
+        """
+        cursor.executemany(query, params_list)
+
+    def copy_rows(self, cursor, copy_query, rows, types=None):
+        """
+        Stream rows into a COPY ... FROM STDIN statement.
+
+        Args:
+            cursor: Cursor to use
+            copy_query (str): COPY ... FROM STDIN statement
+            rows (iterable): Row tuples
+            types (list, optional): Column type names, required when the query
+                                    uses (FORMAT BINARY)
+        """
+        with cursor.copy(copy_query) as copy:
+            if types:
+                copy.set_types(types)
+            for row in rows:
+                copy.write_row(row)
+
+    def copy_out(self, cursor, copy_query, file):
+        """
+        Write the output of a COPY ... TO STDOUT statement to a file.
+
+        Args:
+            cursor: Cursor to use
+            copy_query (str): COPY ... TO STDOUT statement
+            file: Binary file object
+        """
+        with cursor.copy(copy_query) as copy:
+            for data in copy:
+                file.write(data)
+
+    def pipeline(self, connection):
+        """
+        Enter pipeline mode: queued statements are sent without waiting for
+        each result.
+
+        Args:
+            connection: Open connection
+
+        Returns:
+            context manager: Pipeline context
+        """
+        return connection.pipeline()
+
+
+BACKENDS = {
+    "psycopg2": Psycopg2Backend,
+    "psycopg": Psycopg3Backend,
+}
+
+
+def get_backend(name=None):
+    """
+    Get a driver backend, falling back to psycopg2 when the requested driver
+    is not installed.
+
+    Args:
+        name (str, optional): "psycopg2" or "psycopg"; defaults to psycopg2
+
+    Returns:
+        Backend instance
+    """
+    name = name or "psycopg2"
+    if name not in BACKENDS:
+        print(f"Unknown database driver '{name}', using psycopg2")
+        name = "psycopg2"
+
+    try:
+        return BACKENDS[name]()
+    except ImportError:
+        if name == "psycopg2":
+            raise
+        print(f"Database driver '{name}' is not installed, using psycopg2")
+        return Psycopg2Backend()
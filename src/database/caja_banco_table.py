@@ -7,6 +7,13 @@ from .table_blueprint import TableBlueprint
 class CajaBancoTable(TableBlueprint):
     """Handler for the 'caja_banco' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "caja_banco"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+    
     def __init__(self, db_connection):
         """Initialize the caja_banco table handler."""
         super().__init__(db_connection, "caja_banco")
@@ -20,7 +27,7 @@ class CajaBancoTable(TableBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS caja_banco(
-            velneo INTEGER,
+            velneo INTEGER PRIMARY KEY,
             pvsi TEXT,
             descripcion TEXT
         );
@@ -158,7 +165,7 @@ class CajaBancoTable(TableBlueprint):
             (118, 'KP', 'AMERICAN EXP KUSHKI 12 MESES')
         ]
         
-        return self.insert_manual_data(data)
+        return self.seed_data(data)
     
     def setup(self, csv_file=None, manual_data=None, use_default_data=True):
         """
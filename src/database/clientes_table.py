@@ -7,6 +7,14 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class ClientesTable(TableSimpleBlueprint):
     """Handler for the 'clientes' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "clientes"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+    prewarm = True
+    
     def __init__(self, db_connection):
         """Initialize the clientes table handler."""
         super().__init__(db_connection, "clientes")
@@ -20,7 +28,7 @@ class ClientesTable(TableSimpleBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS clientes (
-            velneo INT ,
+            velneo INT PRIMARY KEY,
             pvsi_clave VARCHAR(10),
             descripcion VARCHAR(100)
         );
@@ -49,7 +57,7 @@ class ClientesTable(TableSimpleBlueprint):
             (1, 'VTPUB', 'Venta publico')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
@@ -7,6 +7,25 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class DetalleEstadoTable(TableSimpleBlueprint):
     """Handler for the 'detalle_estado' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "detalle_estado"
+    dependencies = ("estado_factura_venta",)
+    data_source = None
+    load_strategy = "none"
+    partition_key = "fecha"
+    retention_months = 24
+    archive_column = "fecha"
+    archive_key = ("fecha", "id")
+    # Ids are assigned by the application; writers take them with allocate_ids.
+    # A partitioned table's primary key must include fecha, so nothing but the
+    # block sequence keeps id unique on its own: never write ids from elsewhere.
+    id_blocks = ("id", 1000)
+    indexes = (
+        ("detalle_estado_folio_estado_idx", "(folio, estado)"),
+        ("detalle_estado_hash_detalle_idx", "(hash_detalle)"),
+        ("detalle_estado_fecha_id_idx", "(fecha, id)"),
+    )
+    
     def __init__(self, db_connection):
         """Initialize the detalle_estado table handler."""
         super().__init__(db_connection, "detalle_estado")
@@ -20,14 +39,15 @@ class DetalleEstadoTable(TableSimpleBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS detalle_estado(
-            id NUMERIC NOT NULL PRIMARY KEY,
+            id NUMERIC NOT NULL,
             folio VARCHAR,
             hash_detalle VARCHAR(64),
-            fecha DATE,
+            fecha DATE NOT NULL DEFAULT CURRENT_DATE,
             estado VARCHAR(50),
             accion VARCHAR(50),
-            ref VARCHAR
-        );
+            ref VARCHAR,
+            PRIMARY KEY (id, fecha)
+        ) PARTITION BY RANGE (fecha);
         """
     
     def get_insert_query(self):
@@ -39,8 +59,49 @@ class DetalleEstadoTable(TableSimpleBlueprint):
         """
         return """
         INSERT INTO detalle_estado (id, folio, hash_detalle, fecha, estado, accion, ref) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, COALESCE(%s, CURRENT_DATE), %s, %s, %s)
+        """
+    
+    def find_changed(self, lines, since=None):
+        """
+        Find the invoice lines whose hash is not stored yet, in one query.
+        
+        A line is new or changed when no detalle_estado row of its folio
+        has its hash_detalle. The pairs are sent as two arrays and anti-joined
+        through the hash_detalle index.
+        
+        Args:
+            lines (iterable): (folio, hash_detalle) pairs
+            since (date, optional): Only compare with rows from this date on,
+                                    so older partitions are not scanned
+            
+        Returns:
+            list: The new or changed (folio, hash_detalle) pairs, in input
+                  order and without duplicates, or None on failure
+        """
+        lines = list(dict.fromkeys((folio, hash_detalle) for folio, hash_detalle in lines))
+        if not lines:
+            return []
+        
+        date_filter = "AND d.fecha >= %s" if since is not None else ""
+        query = f"""
+        SELECT l.folio, l.hash_detalle
+        FROM unnest(%s::varchar[], %s::varchar[]) WITH ORDINALITY AS l(folio, hash_detalle, n)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM detalle_estado d
+            WHERE d.hash_detalle = l.hash_detalle AND d.folio = l.folio {date_filter}
+        )
+        ORDER BY l.n
         """
+        params = ([folio for folio, _ in lines], [hash_detalle for _, hash_detalle in lines])
+        if since is not None:
+            params += (since,)
+        # The sync worker calls this between uncommitted writes, which must survive it
+        in_transaction = self.db.in_transaction()
+        cursor = self.db.execute_query(query, params)
+        changed = cursor.fetchall() if cursor is not None else None
+        self.db.end_read(in_transaction)
+        return changed
     
     def insert_default_data(self):
         """
@@ -0,0 +1,281 @@
+"""
+Asynchronous, batched writes to the errores table.
+
+ErrorSink.log only appends to an in-memory buffer, so logging an error never
+waits on the database. A background thread with its own connection writes the
+buffer with COPY when it reaches ``flush_size`` distinct errors or every
+``flush_interval`` seconds. Repeats of the same (clase, descripcion) within a
+flush window are coalesced into one row whose ``repeticiones`` counts them and
+whose ``fecha`` is the first occurrence.
+
+When the database cannot be reached the batch is appended to a local spill
+file (one JSON row per line) instead, and the file is replayed before the next
+batch that can be written. Once the buffer holds ``max_buffer`` distinct
+errors, new ones are dropped and counted until the next flush.
+"""
+import os
+import json
+import threading
+from datetime import datetime
+
+from .connection import DatabaseConnection
+from .row_codecs import get_row_codec
+
+
+COLUMNS = ("fecha", "clase", "descripcion", "repeticiones")
+
+DEFAULT_SPILL_FILE = "errores_spill.jsonl"
+
+
+class ErrorSink:
+    """Non-blocking error logger writing to the errores table in batches."""
+
+    def __init__(self, connection_kwargs, spill_file=DEFAULT_SPILL_FILE, flush_size=500,
+                 flush_interval=2.0, max_buffer=10000):
+        """
+        Initialize the sink; call start() before logging.
+
+        Args:
+            connection_kwargs (dict): Arguments for the sink's own DatabaseConnection
+                                      (dbname, user, password, host, port, driver)
+            spill_file (str, optional): File batches are written to while the
+                                        database is unreachable
+            flush_size (int, optional): Distinct errors that trigger a flush
+            flush_interval (float, optional): Maximum seconds between flushes
+            max_buffer (int, optional): Distinct errors held before new ones are dropped
+        """
+        self.connection_kwargs = connection_kwargs
+        self.spill_file = spill_file
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.written = 0
+        self.spilled = 0
+        self._buffer = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._flush_requests = 0
+        self._flush_count = 0
+        # Rows the writer has taken from the buffer and not yet written or spilled
+        self._in_flight = 0
+        self._stopping = False
+        self._thread = None
+        self._db = None
+        self._codec = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """Start the background writer."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="errores-sink", daemon=True)
+        self._thread.start()
+
+    def log(self, clase, descripcion):
+        """
+        Queue an error without blocking.
+
+        Args:
+            clase (str): Error class or source
+            descripcion (str): Error message
+
+        Returns:
+            bool: False if the buffer was full and the error was dropped
+        """
+        key = (clase, descripcion)
+        with self._lock:
+            entry = self._buffer.get(key)
+            if entry is not None:
+                entry[1] += 1
+                return True
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return False
+            self._buffer[key] = [datetime.now(), 1]
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Write the buffered errors now and wait for the write.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if the flush finished within the timeout
+        """
+        if self._thread is None:
+            self._write(self._take()[0])
+            self._in_flight = 0
+            return True
+        with self._lock:
+            self._flush_requests += 1
+            target = self._flush_requests
+            self._wake.set()
+            return self._flushed.wait_for(lambda: self._flush_count >= target, timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Stop the background writer after a final flush and close its connection.
+
+        A writer still running after the timeout may be in the middle of a
+        COPY, so its connection is left open and the errors not written yet
+        are reported; close() can be called again later.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the writer
+
+        Returns:
+            bool: True if the writer stopped and the connection was closed
+        """
+        if self._thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                with self._lock:
+                    unflushed = len(self._buffer) + self._in_flight
+                print(f"Error sink writer did not stop within {timeout}s; its connection was left "
+                      f"open and {unflushed} errors are not written yet")
+                return False
+            self._thread = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self.dropped:
+            print(f"Error sink dropped {self.dropped} errors while its buffer was full")
+        return True
+
+    def _take(self):
+        """Swap the buffer out and return its rows."""
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+            self._in_flight = len(buffer)
+            target = self._flush_requests
+        rows = [(fecha, clase, descripcion, count)
+                for (clase, descripcion), (fecha, count) in buffer.items()]
+        return rows, target
+
+    def _run(self):
+        """Flush on size, time or request until stopped."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+            rows, target = self._take()
+            self._write(rows)
+            with self._lock:
+                self._in_flight = 0
+                self._flush_count = max(self._flush_count, target)
+                self._flushed.notify_all()
+            if stopping:
+                return
+
+    def _connect(self):
+        """
+        Get the sink's connection, reconnecting if it was lost.
+
+        Returns:
+            DatabaseConnection: Open connection, or None if the database is unreachable
+        """
+        if self._db is not None and self._db.connection is not None and not self._db.connection.closed:
+            return self._db
+        db_connection = DatabaseConnection(**self.connection_kwargs)
+        if not db_connection.connect():
+            return None
+        # Truncates over-long clase values instead of failing the whole COPY
+        codec = get_row_codec(db_connection, "errores", list(COLUMNS), on_overflow="truncate")
+        if codec is None:
+            db_connection.close()
+            return None
+        self._db, self._codec = db_connection, codec
+        return db_connection
+
+    def _copy(self, rows):
+        """
+        COPY rows into errores and commit.
+
+        Returns:
+            bool: Success status
+        """
+        db_connection = self._connect()
+        if db_connection is None:
+            return False
+        try:
+            if db_connection.copy_rows("errores", list(COLUMNS), rows, codec=self._codec):
+                db_connection.commit()
+                return True
+        except db_connection.backend.Error as e:
+            # A lost connection also fails the rollback inside copy_rows
+            print(f"Error writing errores batch: {e}")
+        # Reconnect on the next batch in case the connection is broken
+        db_connection.close()
+        self._db = None
+        return False
+
+    def _write(self, rows):
+        """Write rows, replaying the spill file first, or spill them."""
+        if os.path.exists(self.spill_file) and self._replay() and rows:
+            self._spill(rows)
+            return
+        if not rows:
+            return
+        if self._copy(rows):
+            self.written += len(rows)
+        else:
+            self._spill(rows)
+
+    def _spill(self, rows):
+        """Append rows to the spill file."""
+        try:
+            with open(self.spill_file, 'a', encoding='utf-8') as spill:
+                for fecha, clase, descripcion, count in rows:
+                    spill.write(json.dumps([fecha.isoformat(), clase, descripcion, count],
+                                           ensure_ascii=False) + "\n")
+            self.spilled += len(rows)
+        except OSError as e:
+            print(f"Error writing error spill file {self.spill_file}: {e}")
+            self.dropped += sum(row[3] for row in rows)
+
+    def _replay(self):
+        """
+        Write the spilled rows to the database and remove the spill file.
+
+        Returns:
+            bool: True if the database is still unreachable and the file was kept
+        """
+        rows = []
+        skipped = 0
+        try:
+            with open(self.spill_file, 'r', encoding='utf-8') as spill:
+                for line in spill:
+                    try:
+                        fecha, clase, descripcion, count = json.loads(line)
+                        rows.append((datetime.fromisoformat(fecha), clase, descripcion, count))
+                    except (ValueError, TypeError):
+                        # Blank, or cut short by a crash while spilling
+                        skipped += 1
+        except OSError as e:
+            print(f"Error reading error spill file {self.spill_file}: {e}")
+            return True
+        if skipped:
+            print(f"Skipped {skipped} unreadable lines of {self.spill_file}")
+        if rows and not self._copy(rows):
+            return True
+        os.remove(self.spill_file)
+        if rows:
+            print(f"Replayed {len(rows)} spilled errors into errores")
+            self.written += len(rows)
+        return False
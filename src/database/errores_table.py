@@ -1,5 +1,8 @@
 """
 Implementation of the errores table using the TableSimpleBlueprint class.
+
+Application code should log through error_sink.ErrorSink, which batches and
+coalesces errors off the caller's thread, rather than inserting rows directly.
 """
 from .table_simple_blueprint import TableSimpleBlueprint
 
@@ -7,6 +10,19 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class ErroresTable(TableSimpleBlueprint):
     """Handler for the 'errores' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "errores"
+    dependencies = ()
+    data_source = None
+    load_strategy = "none"
+    partition_key = "fecha"
+    retention_months = 12
+    archive_column = "fecha"
+    archive_key = ("fecha", "id")
+    indexes = (
+        ("errores_fecha_id_idx", "(fecha, id)"),
+    )
+    
     def __init__(self, db_connection):
         """Initialize the errores table handler."""
         super().__init__(db_connection, "errores")
@@ -23,8 +39,9 @@ class ErroresTable(TableSimpleBlueprint):
             id SERIAL,
             fecha TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
             descripcion TEXT,
-            clase VARCHAR(100)
-        );
+            clase VARCHAR(100),
+            repeticiones INTEGER NOT NULL DEFAULT 1
+        ) PARTITION BY RANGE (fecha);
         """
     
     def get_insert_query(self):
@@ -1,12 +1,29 @@
 """
 Implementation of the estado_factura_venta table using the TableSimpleBlueprint class.
 """
+from .row_codecs import get_row_codec
 from .table_simple_blueprint import TableSimpleBlueprint
 
 
 class EstadoFacturaVentaTable(TableSimpleBlueprint):
     """Handler for the 'estado_factura_venta' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "estado_factura_venta"
+    dependencies = ()
+    data_source = None
+    load_strategy = "none"
+    id_blocks = ("id", 1000)
+    # folio identifies an invoice; upsert_many merges on it
+    indexes = (
+        ("estado_factura_venta_folio_key", "UNIQUE (folio)"),
+        ("estado_factura_venta_folio_estado_idx", "(folio, estado)"),
+        ("estado_factura_venta_hash_idx", "(hash)"),
+    )
+    # Row order of get_insert_query and upsert_many
+    columns = ("id", "folio", "total_partidas", "hash", "estado", "fecha_emision",
+               "fecha_procesamiento", "accion")
+    
     def __init__(self, db_connection):
         """Initialize the estado_factura_venta table handler."""
         super().__init__(db_connection, "estado_factura_venta")
@@ -39,10 +56,90 @@ class EstadoFacturaVentaTable(TableSimpleBlueprint):
             str: SQL query
         """
         return """
-        INSERT INTO estado_factura_venta (id, folio, total_partidas, hash, estado, fecha_emision, fecha_proceso, accion) 
+        INSERT INTO estado_factura_venta (id, folio, total_partidas, hash, estado, fecha_emision, fecha_procesamiento, accion) 
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
     
+    def upsert_many(self, rows):
+        """
+        Insert or update a batch of invoice states in one statement.
+        
+        The rows are copied into a temporary staging table and merged on
+        folio. Existing invoices keep their id and are only rewritten when
+        their hash differs from the stored one. Rows with a None id get one
+        from allocate_ids, so callers need no lookup first. When a batch
+        repeats a folio, the last row wins; rows without a folio or that fail
+        validation are skipped and reported.
+        
+        Args:
+            rows (iterable): Tuples in the order of the columns attribute
+            
+        Returns:
+            dict: 'inserted', 'updated' and 'unchanged' lists of folios, or
+                  None on failure
+        """
+        # Last row per folio, so the merge never touches a row twice
+        by_folio = {}
+        skipped = 0
+        for row in rows:
+            if row[1] is None:
+                skipped += 1
+            else:
+                by_folio[row[1]] = row
+        if skipped:
+            print(f"Skipped {skipped} invoice states without a folio")
+        result = {"inserted": [], "updated": [], "unchanged": []}
+        if not by_folio:
+            return result
+        
+        missing = [folio for folio, row in by_folio.items() if row[0] is None]
+        if missing:
+            ids = self.allocate_ids(len(missing))
+            if ids is None:
+                return None
+            for folio, new_id in zip(missing, ids):
+                by_folio[folio] = (new_id, *by_folio[folio][1:])
+        
+        codec = get_row_codec(self.db, "estado_factura_venta", list(self.columns))
+        if codec is None:
+            return None
+        columns = ", ".join(self.columns)
+        assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in self.columns[2:])
+        
+        # Kept for the session and emptied at every commit
+        cursor = self.db.execute_query("""
+        CREATE TEMP TABLE IF NOT EXISTS estado_factura_venta_stage
+            (LIKE estado_factura_venta INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+        """)
+        if cursor is None or not self.db.copy_rows("estado_factura_venta_stage", list(self.columns),
+                                                   by_folio.values(), codec=codec):
+            self.db.connection.rollback()
+            return None
+        
+        # xmax is 0 only on the row versions the INSERT created
+        cursor = self.db.execute_query(f"""
+        WITH merged AS (
+            INSERT INTO estado_factura_venta AS t ({columns})
+            SELECT {columns} FROM estado_factura_venta_stage
+            ON CONFLICT (folio) DO UPDATE SET {assignments}
+                WHERE t.hash IS DISTINCT FROM EXCLUDED.hash
+            RETURNING t.folio, t.xmax = 0
+        )
+        SELECT s.folio, m.inserted
+        FROM estado_factura_venta_stage s
+        LEFT JOIN merged m (folio, inserted) ON m.folio = s.folio
+        """)
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        for folio, inserted in cursor.fetchall():
+            if inserted is None:
+                result["unchanged"].append(folio)
+            else:
+                result["inserted" if inserted else "updated"].append(folio)
+        self.db.commit()
+        return result
+    
     def insert_default_data(self):
         """
         Insert default data into the estado_factura_venta table.
@@ -0,0 +1,294 @@
+"""
+In-memory membership filter of processed folios.
+
+ProcessedFolios answers "has this folio been seen?" for estado_factura_venta
+and reintentos_fac_venta without a query per invoice. It keeps a Bloom filter
+built from one streaming scan of both tables. A folio the filter has never
+seen is new for certain; only probable hits (including about ``error_rate``
+of the new folios) are confirmed against the database.
+
+The filter only learns about folios written through this process after the
+load, so writers call add() for the folios they write. Folios written by other
+processes since the last load are reported as new. Both tables are unique on
+folio and written with upserts on it (EstadoFacturaVentaTable.upsert_many and
+ReintentosFacturaVentaTable.enqueue_many), so for writers using those that
+costs a redundant write, not a duplicate row. Call load() again to pick them up.
+
+The component reads through its own connection, so it never touches a
+transaction of the caller.
+"""
+import math
+import hashlib
+import time
+import threading
+
+from .connection import DatabaseConnection
+
+
+# Head room over the current row count, so later adds keep the error rate
+CAPACITY_FACTOR = 2
+MIN_CAPACITY = 10000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Size the filter for a number of items and false-positive rate.
+
+        Args:
+            capacity (int): Items the filter is sized for
+            error_rate (float, optional): False-positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        """Bit positions of an item, by double hashing one 128-bit digest."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """
+        Add an item.
+
+        Args:
+            item (str): Item
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class ProcessedFolios:
+    """Folio membership over estado_factura_venta and reintentos_fac_venta."""
+
+    def __init__(self, connection_kwargs, error_rate=0.01):
+        """
+        Initialize the component; call load() before checking folios.
+
+        Args:
+            connection_kwargs (dict): Arguments for the component's own
+                                      DatabaseConnection (dbname, user,
+                                      password, host, port, driver)
+            error_rate (float, optional): Share of new folios confirmed in the database
+        """
+        self.connection_kwargs = connection_kwargs
+        self.error_rate = error_rate
+        self.filter = None
+        self.checked = 0
+        self.queried = 0
+        self.false_positives = 0
+        self._db = None
+        self._lock = threading.Lock()
+        # Folios added while a filter is being built, replayed into it before the swap
+        self._pending = None
+
+    def _connect(self):
+        """
+        Get the component's connection, opening it on first use.
+
+        Returns:
+            DatabaseConnection: Open connection, or None on failure
+        """
+        if self._db is None:
+            db_connection = DatabaseConnection(**self.connection_kwargs)
+            if not db_connection.connect():
+                return None
+            self._db = db_connection
+        return self._db
+
+    def close(self):
+        """Close the component's connection."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _build(self, db_connection, minimum=0):
+        """
+        Build a filter with one streaming scan of both tables.
+
+        Args:
+            db_connection (DatabaseConnection): Connection used only for the scan
+            minimum (int, optional): Folios known to exist, in case the
+                                     planner statistics are behind
+
+        Returns:
+            BloomFilter: The filter, or None if the tables are missing or the
+                         scan failed
+        """
+        cursor = db_connection.execute_query("""
+        SELECT count(c.oid), COALESCE(sum(GREATEST(c.reltuples, 0)), 0)::bigint
+        FROM pg_class c
+        WHERE c.oid IN (to_regclass('estado_factura_venta'), to_regclass('reintentos_fac_venta'))
+        """)
+        row = cursor.fetchone() if cursor is not None else None
+        db_connection.connection.rollback()
+        if row is None or row[0] < 2:
+            print("Cannot load the folio filter: estado_factura_venta or reintentos_fac_venta is missing")
+            return None
+
+        bloom = BloomFilter(max(MIN_CAPACITY, max(row[1], minimum) * CAPACITY_FACTOR), self.error_rate)
+        query = """
+        SELECT folio FROM estado_factura_venta WHERE folio IS NOT NULL
+        UNION ALL
+        SELECT folio FROM reintentos_fac_venta
+        """
+        try:
+            for (folio,) in db_connection.iter_query(query, chunk_size=10000):
+                bloom.add(folio)
+        except db_connection.backend.Error:
+            # A partial filter would report processed folios as new
+            print("Folio filter scan failed; the filter was not loaded")
+            return None
+        db_connection.connection.rollback()
+        return bloom
+
+    def _install(self, bloom):
+        """Replay the folios added during the build into a new filter and use it."""
+        with self._lock:
+            for folio in self._pending or ():
+                bloom.add(folio)
+            self._pending = None
+            self.filter = bloom
+
+    def load(self):
+        """
+        Build the filter with one streaming scan of both tables.
+
+        Until it succeeds every folio is checked in the database.
+
+        Returns:
+            bool: Success status
+        """
+        started = time.perf_counter()
+        db_connection = self._connect()
+        if db_connection is None:
+            return False
+        with self._lock:
+            self._pending = []
+        bloom = self._build(db_connection)
+        if bloom is None:
+            with self._lock:
+                self._pending = None
+                self.filter = None
+            return False
+        self._install(bloom)
+        print(f"Loaded {bloom.count} folios into a {bloom.size // 8 // 1024} KiB filter "
+              f"in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def _rebuild(self, minimum):
+        """Build a larger filter on a separate connection, off the caller's thread."""
+        db_connection = DatabaseConnection(**self.connection_kwargs)
+        bloom = self._build(db_connection, minimum) if db_connection.connect() else None
+        db_connection.close()
+        if bloom is None:
+            # The saturated filter is still correct, only less selective
+            with self._lock:
+                self._pending = None
+            return
+        self._install(bloom)
+
+    def add(self, folios):
+        """
+        Record folios that were just written.
+
+        Once the filter holds more folios than it was sized for, a larger one
+        is built in the background; the current one stays in use meanwhile.
+
+        Args:
+            folios (iterable): Folios written to either table
+        """
+        folios = list(folios)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(folios)
+            if self.filter is None:
+                return
+            for folio in folios:
+                self.filter.add(folio)
+            saturated = self.filter.count > self.filter.capacity and self._pending is None
+            if saturated:
+                self._pending = []
+        if saturated:
+            threading.Thread(target=self._rebuild, args=(self.filter.count,),
+                             name="folio-filter-rebuild", daemon=True).start()
+
+    def _probably_seen(self, folio):
+        """Check the filter; without a loaded filter every folio is a probable hit."""
+        bloom = self.filter
+        return bloom is None or folio in bloom
+
+    def _confirm(self, folios):
+        """
+        Look up probable hits in the database.
+
+        Args:
+            folios (list): Folios the filter reports as probably seen
+
+        Returns:
+            set: The folios that exist, or None on failure
+        """
+        db_connection = self._connect()
+        if db_connection is None:
+            return None
+        self.queried += len(folios)
+        cursor = db_connection.execute_query("""
+        SELECT folio FROM estado_factura_venta WHERE folio = ANY(%s::varchar[])
+        UNION
+        SELECT folio FROM reintentos_fac_venta WHERE folio = ANY(%s::varchar[])
+        """, (folios, folios))
+        existing = {row[0] for row in cursor.fetchall()} if cursor is not None else None
+        # The component's own connection; nothing of the caller is pending on it
+        db_connection.connection.rollback()
+        if existing is not None:
+            self.false_positives += len(folios) - len(existing)
+        return existing
+
+    def exists(self, folio):
+        """
+        Check whether a folio has been processed.
+
+        Args:
+            folio (str): Folio
+
+        Returns:
+            bool: True if the folio is in either table, or None on failure
+        """
+        self.checked += 1
+        if not self._probably_seen(folio):
+            return False
+        existing = self._confirm([folio])
+        return None if existing is None else folio in existing
+
+    def filter_new(self, folios):
+        """
+        Keep the folios that have not been processed, confirming all the
+        probable hits in one query.
+
+        Args:
+            folios (iterable): Folios
+
+        Returns:
+            list: Unprocessed folios, in input order, or None on failure
+        """
+        folios = list(folios)
+        self.checked += len(folios)
+        probable = [folio for folio in folios if self._probably_seen(folio)]
+        if not probable:
+            return folios
+        existing = self._confirm(list(set(probable)))
+        if existing is None:
+            return None
+        return [folio for folio in folios if folio not in existing]
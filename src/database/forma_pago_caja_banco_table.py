@@ -7,6 +7,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class FormaPagoCajaBancoTable(TableSimpleBlueprint):
     """Handler for the 'forma_pago_caja_banco' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "forma_pago_caja_banco"
+    dependencies = ("caja_banco", "forma_pago")
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("caja_banco",)
+    
     def __init__(self, db_connection):
         """Initialize the forma_pago_caja_banco table handler."""
         super().__init__(db_connection, "forma_pago_caja_banco")
@@ -20,7 +27,7 @@ class FormaPagoCajaBancoTable(TableSimpleBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS forma_pago_caja_banco (
-            caja_banco VARCHAR,
+            caja_banco VARCHAR PRIMARY KEY,
             forma_pago VARCHAR
         );
         """
@@ -72,7 +79,7 @@ class FormaPagoCajaBancoTable(TableSimpleBlueprint):
             ('default_value','3')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
@@ -7,6 +7,14 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class FormaPagoTable(TableSimpleBlueprint):
     """Handler for the 'forma_pago' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "forma_pago"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("id_velneo",)
+    prewarm = True
+    
     def __init__(self, db_connection):
         """Initialize the forma_pago table handler."""
         super().__init__(db_connection, "forma_pago")
@@ -20,7 +28,7 @@ class FormaPagoTable(TableSimpleBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS forma_pago (
-            id_velneo INT,
+            id_velneo INT PRIMARY KEY,
             pvsi VARCHAR(20),
             nombre VARCHAR(100)
         );
@@ -54,7 +62,7 @@ class FormaPagoTable(TableSimpleBlueprint):
             (6, 'TD', 'Tarjeta Debito')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
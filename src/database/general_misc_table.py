@@ -13,6 +13,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class GeneralMiscTable(TableSimpleBlueprint):
     """Handler for the 'general_misc' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "general_misc"
+    dependencies = ()
+    data_source = "json"
+    load_strategy = "upsert"
+    natural_key = ("title", "plaza", "tienda")
+    
     def __init__(self, db_connection):
         """Initialize the general_misc table handler."""
         super().__init__(db_connection, "general_misc")
@@ -32,7 +39,8 @@ class GeneralMiscTable(TableSimpleBlueprint):
             id_pvsi VARCHAR(10),
             title VARCHAR(50),
             plaza VARCHAR(5),
-            tienda VARCHAR(5)
+            tienda VARCHAR(5),
+            PRIMARY KEY (title, plaza, tienda)
         );
         """
     
@@ -64,7 +72,54 @@ class GeneralMiscTable(TableSimpleBlueprint):
             ('6', 'x', 'serie_compra', 'XALAP', 'ARAUC')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
+        
+    def insert_from_profiles(self, profiles):
+        """
+        Insert data from profiles into the general_misc table.
+        Each profile produces one row per attribute (division, empresa, moneda, serie).
+        
+        Args:
+            profiles (list): List of profile dictionaries
+            
+        Returns:
+            bool: Success status
+        """
+        # Prepare data for insertion
+        data = []
+        for profile in profiles:
+            # For each profile, create multiple rows (one for each attribute)
+            # Each row format: (id_velneo, id_pvsi, title, plaza, tienda)
+            
+            plaza = profile.get('plaza', '')
+            tienda = profile.get('tienda', '')
+            
+            # Add division entry
+            if 'division' in profile:
+                data.append((profile['division'], 'x', 'division', plaza, tienda))
+            
+            # Add empresa entry
+            if 'empresa' in profile:
+                data.append((profile['empresa'], 'x', 'empresa', plaza, tienda))
+            
+            # Add moneda entry (convert to string if it's a number)
+            if 'moneda' in profile:
+                data.append((str(profile['moneda']), 'x', 'moneda', plaza, tienda))
+            
+            # # Add plaza entry
+            # if 'plaza' in profile:
+            #     data.append((plaza, 'x', 'plaza', plaza, tienda))
+            
+            # Add serie entry
+            if 'serie' in profile:
+                data.append((profile['serie'], 'x', 'serie', plaza, tienda))
+                
+        # Insert the data
+        if data:
+            return self.seed_data(data)
+        else:
+            print("No valid data found in profiles")
+            return False
         
     def import_from_json(self, json_path):
         """
@@ -110,41 +165,7 @@ class GeneralMiscTable(TableSimpleBlueprint):
                 print("Warning: No profiles found in JSON file")
                 return False
                 
-            # Prepare data for insertion
-            data = []
-            for profile in profiles:
-                # For each profile, create multiple rows (one for each attribute)
-                # Each row format: (id_velneo, id_pvsi, title, plaza, tienda)
-                
-                plaza = profile.get('plaza', '')
-                tienda = profile.get('tienda', '')
-                
-                # Add division entry
-                if 'division' in profile:
-                    data.append((profile['division'], 'x', 'division', plaza, tienda))
-                
-                # Add empresa entry
-                if 'empresa' in profile:
-                    data.append((profile['empresa'], 'x', 'empresa', plaza, tienda))
-                
-                # Add moneda entry (convert to string if it's a number)
-                if 'moneda' in profile:
-                    data.append((str(profile['moneda']), 'x', 'moneda', plaza, tienda))
-                
-                # # Add plaza entry
-                # if 'plaza' in profile:
-                #     data.append((plaza, 'x', 'plaza', plaza, tienda))
-                
-                # Add serie entry
-                if 'serie' in profile:
-                    data.append((profile['serie'], 'x', 'serie', plaza, tienda))
-                    
-            # Insert the data
-            if data:
-                return self.insert_data(data)
-            else:
-                print("No valid data found in profiles")
-                return False
+            return self.insert_from_profiles(profiles)
                 
         except json.JSONDecodeError as e:
             print(f"Error decoding JSON: {e}")
@@ -0,0 +1,193 @@
+"""
+Block allocation of application-assigned ids.
+
+Tables whose handler declares ``id_blocks = (column, block_size)`` get a
+sequence <table>_<column>_block_seq that steps by block_size, so one nextval
+reserves a whole block of ids. The IdBlockAllocator of a table hands out the
+ids of its current block locally and only goes back to the database when the
+block is used up, so writers neither lock max(id) nor pay a round trip per id.
+get_allocator shares one allocator per database and table across handler
+instances and threads, so short-lived handlers do not each reserve a block.
+Blocks left partly unused leave gaps in the ids.
+
+The sequence is created with the table and starts after the largest existing
+id; every writer of the column must then take its ids from the sequence.
+
+Serial columns such as recibo_venta.id_sql already have a sequence;
+reserve_sequence_values takes many of its values in one round trip.
+"""
+import threading
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_sequence_name(table_name, column):
+    """
+    Get the name of a table's block sequence.
+
+    Args:
+        table_name (str): Table name
+        column (str): Id column
+
+    Returns:
+        str: Sequence name
+    """
+    return f"{table_name}_{column}_block_seq"[:63]
+
+
+def ensure_id_sequence(db_connection, table_name, column, block_size):
+    """
+    Create the block sequence of a table, starting after its largest id.
+
+    An existing sequence keeps its block size and position.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        column (str): Id column
+        block_size (int): Ids reserved per nextval
+
+    Returns:
+        bool: Success status
+    """
+    sequence = get_sequence_name(table_name, column)
+    # Seeded only while no block has been taken; owned so it is dropped with the table
+    query = f"""
+    CREATE SEQUENCE IF NOT EXISTS {sequence} AS bigint INCREMENT BY {int(block_size)} MINVALUE 1
+        OWNED BY {table_name}.{column};
+    SELECT setval('{sequence}', (SELECT COALESCE(max({column}), 0)::bigint + 1 FROM {table_name}), false)
+    FROM {sequence} WHERE NOT is_called
+    """
+    if not db_connection.execute_ddl(query, tables=[table_name]):
+        return False
+    # The table may have been dropped and created again with a new sequence;
+    # a block cached from the old one could repeat its ids
+    params = db_connection.connection_params
+    with _allocators_lock:
+        _allocators.pop((params["host"], str(params["port"]), params["dbname"], table_name, column), None)
+    return True
+
+
+class IdBlockAllocator:
+    """Hands out ids from blocks reserved on a table's block sequence."""
+
+    def __init__(self, table_name, column="id"):
+        """
+        Initialize the allocator; no block is reserved until the first id.
+
+        Args:
+            table_name (str): Table name
+            column (str, optional): Id column
+        """
+        self.sequence = get_sequence_name(table_name, column)
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self, db_connection):
+        """
+        Reserve the next block; nextval is not undone by a rollback.
+
+        Args:
+            db_connection (DatabaseConnection): Connection of the caller
+
+        Returns:
+            bool: Success status
+        """
+        cursor = db_connection.execute_query(
+            "SELECT nextval(%s), increment_by FROM pg_sequences "
+            "WHERE schemaname = current_schema() AND sequencename = %s",
+            (self.sequence, self.sequence)
+        )
+        if cursor is None:
+            # The caller's transaction is aborted either way
+            db_connection.connection.rollback()
+            return False
+        row = cursor.fetchone()
+        if row is None:
+            print(f"Cannot allocate ids: sequence '{self.sequence}' not found")
+            return False
+        self._next, self._end = row[0], row[0] + row[1]
+        return True
+
+    def take(self, db_connection, n):
+        """
+        Get n ids, reserving new blocks as needed.
+
+        Args:
+            db_connection (DatabaseConnection): Connection a new block is
+                                                reserved on, if one is needed
+            n (int): Number of ids
+
+        Returns:
+            list: Ascending ids, or None on failure
+        """
+        ids = []
+        with self._lock:
+            while len(ids) < n:
+                if self._next >= self._end and not self._reserve_block(db_connection):
+                    return None
+                count = min(n - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + count))
+                self._next += count
+        return ids
+
+    def next_id(self, db_connection):
+        """
+        Get one id.
+
+        Args:
+            db_connection (DatabaseConnection): Connection a new block is
+                                                reserved on, if one is needed
+
+        Returns:
+            int: The id, or None on failure
+        """
+        ids = self.take(db_connection, 1)
+        return ids[0] if ids else None
+
+
+def get_allocator(db_connection, table_name, column="id"):
+    """
+    Get the allocator shared by every handler of a table in this process.
+
+    Args:
+        db_connection (DatabaseConnection): Connection identifying the database
+        table_name (str): Table name
+        column (str, optional): Id column
+
+    Returns:
+        IdBlockAllocator: The table's allocator
+    """
+    params = db_connection.connection_params
+    key = (params["host"], str(params["port"]), params["dbname"], table_name, column)
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = _allocators[key] = IdBlockAllocator(table_name, column)
+        return allocator
+
+
+def reserve_sequence_values(db_connection, table_name, column, n):
+    """
+    Take n values of a serial column's sequence in one round trip.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        column (str): Serial column
+        n (int): Number of values
+
+    Returns:
+        list: The values, or None on failure
+    """
+    cursor = db_connection.execute_query(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (table_name, column, n)
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    return [row[0] for row in cursor.fetchall()]
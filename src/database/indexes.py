@@ -0,0 +1,253 @@
+"""
+Secondary indexes declared by the table classes.
+
+Handlers list their lookup indexes in an ``indexes`` class attribute as
+(name, definition) pairs, where the definition is everything after the table
+name, e.g. ("detalle_estado_folio_estado_idx", "(folio, estado)") or
+("reintentos_fac_venta_proximo_idx", "(proximo_intento) WHERE completado = false").
+A definition starting with UNIQUE, e.g. "UNIQUE (folio)", creates a unique index.
+
+A new table gets its indexes right after it is created, while it is still
+empty. Indexes missing from an existing table are built with CREATE INDEX
+CONCURRENTLY, so the sync worker keeps writing to the table during the build;
+on partitioned tables each partition's index is built concurrently and
+attached to the parent index. A unique index is only built once no
+duplicate keys are left; duplicates are reported instead, since a failed
+concurrent build would leave an invalid index behind.
+"""
+import re
+
+
+def get_index_query(table_name, name, definition, concurrently=False):
+    """
+    Build the CREATE INDEX statement of a declared index.
+
+    Args:
+        table_name (str): Table name
+        name (str): Index name
+        definition (str): Columns and optional WHERE clause
+        concurrently (bool, optional): Build without blocking writes
+
+    Returns:
+        str: CREATE INDEX statement
+    """
+    unique, definition = split_unique(definition)
+    mode = "CONCURRENTLY " if concurrently else ""
+    return f"CREATE {unique}INDEX {mode}IF NOT EXISTS {name} ON {table_name} {definition}"
+
+
+def split_unique(definition):
+    """
+    Separate the UNIQUE prefix of an index definition.
+
+    Args:
+        definition (str): Declared definition
+
+    Returns:
+        tuple: ("UNIQUE " or "", definition without the prefix)
+    """
+    if definition.upper().startswith("UNIQUE "):
+        return "UNIQUE ", definition[len("UNIQUE "):].lstrip()
+    return "", definition
+
+
+def find_duplicate_keys(db_connection, table_name, definition, limit=5):
+    """
+    Find the keys a unique index definition would reject.
+
+    Rows with a NULL key column are left out, as a unique index accepts them.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        definition (str): Columns and optional WHERE clause
+        limit (int, optional): Number of example keys returned
+
+    Returns:
+        tuple: (number of duplicated keys, list of (key, rows) examples with
+               the most repeated keys first), or None on failure
+    """
+    match = re.match(r"\((.*?)\)\s*(?:WHERE\s+(.*))?$", split_unique(definition)[1], re.IGNORECASE | re.DOTALL)
+    key_columns = [column.strip() for column in match.group(1).split(",")]
+    columns = ", ".join(key_columns)
+    conditions = [f"{column} IS NOT NULL" for column in key_columns]
+    if match.group(2):
+        conditions.append(f"({match.group(2)})")
+    # The window count runs after HAVING and before LIMIT, so it counts every duplicated key
+    cursor = db_connection.execute_query(
+        f"SELECT count(*) OVER (), ROW({columns})::text, count(*) FROM {table_name} "
+        f"WHERE {' AND '.join(conditions)} GROUP BY {columns} HAVING count(*) > 1 "
+        f"ORDER BY count(*) DESC LIMIT %s",
+        (limit,)
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    rows = cursor.fetchall()
+    db_connection.commit()
+    return (rows[0][0] if rows else 0), [(key, count) for _, key, count in rows]
+
+
+def get_partitioned_index_queries(table_name, partitions, name, definition):
+    """
+    Build the statements that index a partitioned table without blocking writes.
+
+    CREATE INDEX CONCURRENTLY is not supported on a partitioned table, so the
+    index is created invalid on the parent only, built concurrently on each
+    partition and attached; the parent index becomes valid once every
+    partition is attached.
+
+    Args:
+        table_name (str): Partitioned table name
+        partitions (list): Partition names
+        name (str): Index name
+        definition (str): Columns and optional WHERE clause
+
+    Returns:
+        list: Statements, in order
+    """
+    unique, columns = split_unique(definition)
+    statements = [f"CREATE {unique}INDEX IF NOT EXISTS {name} ON ONLY {table_name} {columns}"]
+    for partition in partitions:
+        suffix = partition[len(table_name) + 1:] if partition.startswith(f"{table_name}_") else partition
+        child = f"{name}_{suffix}"[:63]
+        statements.append(get_index_query(partition, child, definition, concurrently=True))
+        statements.append(f"ALTER INDEX {name} ATTACH PARTITION {child}")
+    return statements
+
+
+def fetch_partition_names(db_connection, table_name):
+    """
+    List the partitions of a table.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+
+    Returns:
+        list: Partition names, empty for an ordinary table, or None on failure
+    """
+    cursor = db_connection.execute_query(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(%s) ORDER BY 1",
+        (table_name,)
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    partitions = [row[0] for row in cursor.fetchall()]
+    db_connection.commit()
+    return partitions
+
+
+def fetch_attached_partitions(db_connection, index_name):
+    """
+    List the partitions whose index is already attached to a partitioned index.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        index_name (str): Parent index name
+
+    Returns:
+        set: Partition names, empty if the index does not exist, or None on failure
+    """
+    cursor = db_connection.execute_query(
+        "SELECT x.indrelid::regclass::text FROM pg_inherits i "
+        "JOIN pg_index x ON x.indexrelid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+        (index_name,)
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    attached = {row[0] for row in cursor.fetchall()}
+    db_connection.commit()
+    return attached
+
+
+def fetch_indexes(db_connection, table_names):
+    """
+    Read the indexes of the given tables in one catalog query.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Table names
+
+    Returns:
+        dict: Table name to {index name: valid}, or None on failure
+    """
+    query = """
+    SELECT t.relname, i.relname, x.indisvalid
+    FROM pg_index x
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE t.relname = ANY(%s)
+      AND n.nspname = current_schema()
+    """
+    cursor = db_connection.execute_query(query, (list(table_names),))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+
+    indexes = {}
+    for table_name, index_name, valid in cursor.fetchall():
+        indexes.setdefault(table_name, {})[index_name] = valid
+    db_connection.commit()
+    return indexes
+
+
+def create_indexes(db_connection, table_name, indexes, concurrently=False, lock_timeout="2s"):
+    """
+    Create declared indexes that do not exist yet.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        indexes (tuple): (name, definition) pairs
+        concurrently (bool, optional): Build each index without blocking
+                                       writes; use for tables that hold data
+        lock_timeout (str, optional): Maximum time each statement waits for locks
+
+    Returns:
+        bool: Success status
+    """
+    if not indexes:
+        return True
+
+    if concurrently:
+        # Partitions created after a parent index carry an attached index of
+        # their own under another name; building ours as well would duplicate
+        # it and fail to attach, so valid indexes and attached partitions are skipped
+        existing = fetch_indexes(db_connection, [table_name])
+        if existing is None:
+            return False
+        indexes = [index for index in indexes if not existing.get(table_name, {}).get(index[0])]
+        if not indexes:
+            return True
+        partitions = fetch_partition_names(db_connection, table_name)
+        if partitions is None:
+            return False
+        statements = []
+        for name, definition in indexes:
+            if split_unique(definition)[0]:
+                duplicates = find_duplicate_keys(db_connection, table_name, definition)
+                if duplicates is None:
+                    return False
+                if duplicates[0]:
+                    examples = ", ".join(f"{key} ({count} rows)" for key, count in duplicates[1])
+                    print(f"Cannot build unique index {name} on '{table_name}': {duplicates[0]} keys "
+                          f"appear more than once, e.g. {examples}; remove the duplicates first")
+                    return False
+            print(f"Building index {name} on '{table_name}' concurrently...")
+            if partitions:
+                attached = fetch_attached_partitions(db_connection, name)
+                if attached is None:
+                    return False
+                pending = [partition for partition in partitions if partition not in attached]
+                statements.extend(get_partitioned_index_queries(table_name, pending, name, definition))
+            else:
+                statements.append(get_index_query(table_name, name, definition, concurrently=True))
+        return db_connection.execute_concurrently(statements, lock_timeout)
+
+    statements = [get_index_query(table_name, name, definition) for name, definition in indexes]
+    return db_connection.execute_ddl(";\n".join(statements), tables=[table_name],
+                                     lock_timeout=lock_timeout)
@@ -0,0 +1,319 @@
+"""
+Install plan and cost estimation.
+
+Each install records, per table, the rows and bytes it loaded, how long it
+took and the WAL it generated in install_stats.json. A plan run reads the
+catalog once, decides what the installer would do to each table (create,
+skip, full reload or delta) and estimates rows, bytes, duration and WAL from
+that history, so store installs can be fitted into maintenance windows.
+"""
+import os
+import json
+from datetime import datetime
+
+from ..config import CSV_DIRECTORY, ARTICULOS_CSV, METODO_PAGO_CSV
+from .registry import get_table_class, resolve_order
+from .schema_diff import plan_schema
+
+
+# Used for tables with no recorded history
+DEFAULT_ROWS_PER_SECOND = 5000
+# WAL bytes generated per byte stored (heap, indexes and full page images)
+DEFAULT_WAL_RATIO = 2.0
+
+# Source files of csv tables when no path is given (same defaults as the handlers)
+DEFAULT_CSV_FILES = {
+    "articulos": ARTICULOS_CSV,
+    "metodo_pago": METODO_PAGO_CSV,
+}
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_install_stats(stats_path):
+    """
+    Load the throughput history of previous installs.
+
+    Args:
+        stats_path (str): Path to install_stats.json
+
+    Returns:
+        dict: Table name to its last recorded load
+    """
+    if not os.path.exists(stats_path):
+        return {}
+    try:
+        with open(stats_path, 'r') as stats_file:
+            return json.load(stats_file).get("tables", {})
+    except Exception as e:
+        print(f"Warning: could not read install history from {stats_path}: {e}")
+        return {}
+
+
+def save_install_stats(stats_path, stats):
+    """
+    Save the throughput history.
+
+    Args:
+        stats_path (str): Path to install_stats.json
+        stats (dict): Table name to its last recorded load
+    """
+    try:
+        with open(stats_path, 'w') as stats_file:
+            json.dump({"tables": stats}, stats_file, indent=4, sort_keys=True)
+    except Exception as e:
+        print(f"Warning: could not write install history to {stats_path}: {e}")
+
+
+def _lsn_to_int(lsn):
+    """Convert a pg_lsn text value such as '0/16B3748' to a byte position."""
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def measure_table(db_connection, table_name, analyze=False):
+    """
+    Take a snapshot of a table's size and the current WAL position.
+
+    Rows are the planner estimate (pg_class.reltuples), so no snapshot scans
+    the table; pass analyze=True right after a load to refresh the estimate
+    first. Partitioned tables are measured over their partitions.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        analyze (bool, optional): ANALYZE the table before reading its row estimate
+
+    Returns:
+        dict: 'rows', 'bytes' and 'wal' (byte position), or None on failure
+    """
+    sql = db_connection.backend.sql
+    # Read before ANALYZE, whose catalog writes are not part of the load
+    cursor = db_connection.execute_query("SELECT pg_current_wal_insert_lsn()::text, to_regclass(%s) IS NOT NULL",
+                                         (table_name,))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    lsn, exists = cursor.fetchone()
+    db_connection.connection.rollback()
+    if not exists:
+        return {"rows": 0, "bytes": 0, "wal": _lsn_to_int(lsn)}
+
+    if analyze:
+        if db_connection.execute_query(sql.SQL("ANALYZE {}").format(sql.Identifier(table_name))) is None:
+            db_connection.connection.rollback()
+            return None
+        db_connection.commit()
+
+    # reltuples is -1 until a table is first analyzed
+    cursor = db_connection.execute_query("""
+    SELECT COALESCE(sum(pg_total_relation_size(c.oid)), 0)::bigint,
+           COALESCE(sum(GREATEST(c.reltuples, 0)), 0)::bigint
+    FROM pg_class c
+    WHERE c.relkind <> 'p'
+      AND (c.oid = to_regclass(%s) OR c.oid IN (SELECT relid FROM pg_partition_tree(to_regclass(%s))))
+    """, (table_name, table_name))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    size, rows = cursor.fetchone()
+    db_connection.connection.rollback()
+
+    return {"rows": rows, "bytes": size, "wal": _lsn_to_int(lsn)}
+
+
+def record_table_load(stats, table_name, before, after, seconds, include_wal=True):
+    """
+    Record one table install in the throughput history.
+
+    Args:
+        stats (dict): History to update (see load_install_stats)
+        table_name (str): Table name
+        before (dict): measure_table result taken before the install
+        after (dict): measure_table result taken after the install (with analyze=True)
+        seconds (float): Duration of the install
+        include_wal (bool, optional): Record the WAL difference; disable when
+                                      other tables were loading concurrently
+    """
+    if before is None or after is None:
+        return
+
+    rows = max(after["rows"] - before["rows"], 0)
+    previous = stats.get(table_name, {})
+    # Nothing loaded (e.g. source missing): keep the previous measurements
+    if rows == 0 and previous.get("rows"):
+        return
+
+    entry = {
+        "rows": rows,
+        "bytes": max(after["bytes"] - before["bytes"], 0),
+        "seconds": round(seconds, 3),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if include_wal:
+        entry["wal_bytes"] = after["wal"] - before["wal"]
+        entry["wal_rows"] = rows
+    elif "wal_bytes" in previous:
+        # Keep the last figure measured without concurrent loads
+        entry["wal_bytes"] = previous["wal_bytes"]
+        entry["wal_rows"] = previous["wal_rows"]
+    stats[table_name] = entry
+
+
+def count_csv_rows(csv_path):
+    """
+    Count the data rows and bytes of a CSV file.
+
+    Args:
+        csv_path (str): Path to the CSV file
+
+    Returns:
+        tuple: (rows, bytes), or (None, None) if the file does not exist
+    """
+    if not csv_path or not os.path.exists(csv_path):
+        return None, None
+    with open(csv_path, 'rb') as csv_file:
+        rows = sum(1 for line in csv_file if line.strip()) - 1
+    return max(rows, 0), os.path.getsize(csv_path)
+
+
+def get_action(table, schema):
+    """
+    Decide what an install would do to a table.
+
+    Args:
+        table (type): Handler class
+        schema (dict): Schema diff of the table (see schema_diff.diff_table)
+
+    Returns:
+        str: "create", "skip", "full reload" or "delta"
+    """
+    if schema["status"] == "missing":
+        return "create"
+    if table.data_source is None or table.load_strategy == "none":
+        return "skip"
+    if table.load_strategy == "upsert":
+        return "delta"
+    return "full reload"
+
+
+def build_install_plan(db_connection, table_names, stats, csv_paths=None):
+    """
+    Build the install plan of the given tables.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Enabled tables
+        stats (dict): Throughput history (see load_install_stats)
+        csv_paths (dict, optional): Table name to CSV file for csv tables
+
+    Returns:
+        list: One dictionary per table with 'table', 'action', 'rows', 'bytes',
+              'seconds', 'wal_bytes' and 'estimated' (False when the numbers
+              come from the table's own history or source file), or None if
+              the catalog could not be read
+    """
+    schema_plan = plan_schema(db_connection, table_names)
+    if schema_plan is None:
+        return None
+    csv_paths = csv_paths or {}
+
+    # Overall throughput of previous runs, used for tables without history
+    total_rows = sum(entry.get("rows", 0) for entry in stats.values())
+    total_seconds = sum(entry.get("seconds", 0) for entry in stats.values())
+    rows_per_second = total_rows / total_seconds if total_rows and total_seconds else DEFAULT_ROWS_PER_SECOND
+
+    plan = []
+    for table_name in resolve_order(table_names):
+        table = get_table_class(table_name)
+        action = get_action(table, schema_plan[table_name])
+        history = stats.get(table_name, {})
+        step = {"table": table_name, "action": action, "rows": 0, "bytes": 0,
+                "seconds": 0.0, "wal_bytes": 0, "estimated": False}
+        plan.append(step)
+        if action == "skip":
+            continue
+        if table.data_source is None:
+            # Only the CREATE TABLE
+            step["seconds"] = history.get("seconds", 0.0)
+            continue
+
+        rows, source_bytes = None, None
+        if table.data_source == "csv":
+            csv_path = csv_paths.get(table_name) or os.path.join(
+                PROJECT_DIR, CSV_DIRECTORY, DEFAULT_CSV_FILES.get(table_name, f"{table_name}.csv"))
+            rows, source_bytes = count_csv_rows(csv_path)
+        if rows is None:
+            rows = history.get("rows")
+        if rows is None:
+            step["estimated"] = True
+            continue
+
+        if history.get("rows"):
+            step["bytes"] = int(rows * history["bytes"] / history["rows"])
+            step["seconds"] = rows * history["seconds"] / history["rows"]
+        else:
+            step["bytes"] = source_bytes or 0
+            step["seconds"] = rows / rows_per_second
+            step["estimated"] = True
+
+        if "wal_bytes" in history and history.get("wal_rows"):
+            step["wal_bytes"] = int(rows * history["wal_bytes"] / history["wal_rows"])
+        else:
+            step["wal_bytes"] = int(step["bytes"] * DEFAULT_WAL_RATIO)
+            step["estimated"] = True
+        step["rows"] = rows
+
+    return plan
+
+
+def _format_bytes(size):
+    """Format a byte count for the plan table."""
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _format_duration(seconds):
+    """Format a duration for the plan summary."""
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    return f"{int(seconds // 60)}m {seconds % 60:02.0f}s"
+
+
+def print_install_plan(plan, window_minutes=None):
+    """
+    Print the install plan and its totals.
+
+    Args:
+        plan (list): Result of build_install_plan
+        window_minutes (float, optional): Maintenance window to check the
+                                          estimated duration against
+
+    Returns:
+        bool: False if the install is expected to overrun the window
+    """
+    print(f"\nInstall plan ({len(plan)} tables)")
+    print(f"  {'table':<25}{'action':<13}{'rows':>10}{'bytes':>12}{'time':>10}{'WAL':>12}")
+    for step in plan:
+        marker = " *" if step["estimated"] else ""
+        print(f"  {step['table']:<25}{step['action']:<13}{step['rows']:>10}"
+              f"{_format_bytes(step['bytes']):>12}{step['seconds']:>9.1f}s"
+              f"{_format_bytes(step['wal_bytes']):>12}{marker}")
+
+    total_seconds = sum(step["seconds"] for step in plan)
+    total_wal = sum(step["wal_bytes"] for step in plan)
+    print(f"  {'total':<25}{'':<13}{sum(step['rows'] for step in plan):>10}"
+          f"{_format_bytes(sum(step['bytes'] for step in plan)):>12}{total_seconds:>9.1f}s"
+          f"{_format_bytes(total_wal):>12}")
+    if any(step["estimated"] for step in plan):
+        print("  * no install history for this table, default throughput assumed")
+
+    print(f"Estimated duration {_format_duration(total_seconds)}, WAL {_format_bytes(total_wal)}")
+    if window_minutes:
+        if total_seconds > window_minutes * 60:
+            print(f"EXCEEDS the {window_minutes:g} min maintenance window")
+            return False
+        print(f"Fits the {window_minutes:g} min maintenance window")
+    return True
@@ -7,6 +7,14 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class IvaTable(TableSimpleBlueprint):
     """Handler for the 'iva' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "iva"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+    prewarm = True
+    
     def __init__(self, db_connection):
         """Initialize the iva table handler."""
         super().__init__(db_connection, "iva")
@@ -54,7 +62,7 @@ class IvaTable(TableSimpleBlueprint):
             ('E', 'especial', 2.00, None)
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
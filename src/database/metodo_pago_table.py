@@ -5,30 +5,47 @@ import os
 import csv
 from pathlib import Path
 from ..config import CSV_DIRECTORY, METODO_PAGO_CSV
+from .row_codecs import get_row_codec, CodecError
 
 
 class MetodoPagoTable:
     """Handler for the 'metodo_pago' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "metodo_pago"
+    dependencies = ()
+    data_source = "csv"
+    load_strategy = "upsert"
+    prewarm = True
+    
     def __init__(self, db_connection):
         """Initialize the metodo_pago table handler."""
         self.db_connection = db_connection
         self.table_name = "metodo_pago"
     
-    def create_table(self):
+    def get_create_query(self):
         """
-        Create the metodo_pago table.
+        Get the SQL query to create the metodo_pago table.
         
         Returns:
-            bool: Success status
+            str: SQL query
         """
-        query = """
+        return """
         CREATE TABLE IF NOT EXISTS metodo_pago (
             velneo INT PRIMARY KEY,
             pvsi VARCHAR(10),
             descripcion VARCHAR(100)
         );
         """
+    
+    def create_table(self):
+        """
+        Create the metodo_pago table.
+        
+        Returns:
+            bool: Success status
+        """
+        query = self.get_create_query()
         
         cursor = self.db_connection.execute_query(query)
         if cursor is None:
@@ -73,13 +90,17 @@ class MetodoPagoTable:
                     descripcion = EXCLUDED.descripcion
                 """
                 
+                codec = get_row_codec(self.db_connection, "metodo_pago", ["velneo", "pvsi", "descripcion"])
+                if codec is None:
+                    return False
+                
                 # Process rows in batches
-                for row in reader:
-                    batch.append((
-                        int(row['velneo']),
-                        row['pvsi'],
-                        row['descripcion']
-                    ))
+                for line_num, row in enumerate(reader, 2):
+                    try:
+                        batch.append(codec.encode((row['velneo'], row['pvsi'], row['descripcion'])))
+                    except CodecError as e:
+                        print(f"Warning: skipping line {line_num}: {e}")
+                        continue
                     
                     # Execute batch insert
                     if len(batch) >= batch_size:
@@ -7,6 +7,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class PaisTable(TableSimpleBlueprint):
     """Handler for the 'pais' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "pais"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("id",)
+    
     def __init__(self, db_connection):
         """Initialize the pais table handler."""
         super().__init__(db_connection, "pais")
@@ -50,7 +57,7 @@ class PaisTable(TableSimpleBlueprint):
             (4, 'Guatemala')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
@@ -0,0 +1,111 @@
+"""
+Parallel table provisioning.
+Runs one task per table on a pool of connections, starting each table as soon
+as the tables it depends on have finished.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .registry import get_table_class, resolve_order
+
+
+def run_in_parallel(pool, table_names, task):
+    """
+    Run task(db_connection, table_name) for every table using the pool.
+
+    A table starts once all of its dependencies (within table_names) have
+    succeeded. Tables whose dependencies failed are not run.
+
+    Args:
+        pool (DatabaseConnectionPool): Connected pool; its size is the number of workers
+        table_names (list): Tables to process
+        task (callable): Returns True on success
+
+    Returns:
+        dict: Table name to result dictionary with 'success', 'seconds' and 'error' keys
+    """
+    order = resolve_order(table_names)
+    dependencies = {
+        name: {dep for dep in get_table_class(name).dependencies if dep in order}
+        for name in order
+    }
+    results = {}
+
+    def run(table_name):
+        db_connection = pool.acquire()
+        started = time.perf_counter()
+        try:
+            success = bool(task(db_connection, table_name))
+            error = None if success else "failed"
+        except Exception as e:
+            success = False
+            error = str(e)
+        finally:
+            pool.release(db_connection)
+        return {"success": success, "seconds": time.perf_counter() - started, "error": error}
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        running = {}
+        while len(results) < len(order):
+            for name in order:
+                if name in results or name in running.values():
+                    continue
+                failed_deps = [dep for dep in dependencies[name]
+                               if dep in results and not results[dep]["success"]]
+                if failed_deps:
+                    results[name] = {"success": False, "seconds": 0.0,
+                                     "error": f"skipped, dependency failed: {', '.join(failed_deps)}"}
+                elif all(dep in results for dep in dependencies[name]):
+                    running[executor.submit(run, name)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+
+    return results
+
+
+def verify_tables(db_connection, table_names, expect_rows=()):
+    """
+    Final consistency check after a parallel install.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Tables that must exist
+        expect_rows (iterable, optional): Tables that must contain rows
+
+    Returns:
+        list: Problems found (empty when the install is consistent)
+    """
+    if not table_names:
+        return []
+
+    sql = db_connection.backend.sql
+    cursor = db_connection.execute_query(
+        "SELECT t FROM unnest(%s::text[]) t WHERE to_regclass(t) IS NULL",
+        (list(table_names),)
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return ["consistency check query failed"]
+    missing = [row[0] for row in cursor.fetchall()]
+    problems = [f"{name}: table is missing" for name in missing]
+
+    check = [name for name in table_names if name in set(expect_rows) and name not in missing]
+    if check:
+        query = sql.SQL(" UNION ALL ").join(
+            sql.SQL("SELECT {name}, EXISTS (SELECT 1 FROM {table})").format(
+                name=sql.Literal(name), table=sql.Identifier(name)
+            )
+            for name in check
+        )
+        cursor = db_connection.execute_query(query)
+        if cursor is None:
+            db_connection.connection.rollback()
+            return problems + ["row check query failed"]
+        problems.extend(f"{name}: table is empty" for name, has_rows in cursor.fetchall() if not has_rows)
+
+    db_connection.connection.rollback()
+    return problems
@@ -0,0 +1,233 @@
+"""
+Monthly range partitioning.
+
+Tables declaring a ``partition_key`` are created PARTITION BY RANGE on that
+column, with one partition per month (<table>_pYYYYMM) and a DEFAULT partition
+for rows outside them, including rows with a NULL key.
+
+maintain_partitions pre-creates the coming months and detaches or drops the
+months older than the table's ``retention_months``, so retention is a catalog
+operation instead of a long DELETE. Rows that landed in the DEFAULT partition
+before their month existed are moved into the new month's partition.
+"""
+import re
+from datetime import date
+
+from .registry import get_table_class
+
+
+# Months created ahead of the current one
+PREMAKE_MONTHS = 3
+
+PARTITION_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(day, offset=0):
+    """
+    Get the first day of a month relative to a date.
+
+    Args:
+        day (date): Reference date
+        offset (int, optional): Months to move forward (negative for back)
+
+    Returns:
+        date: First day of the month
+    """
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def fetch_partition_keys(db_connection, table_names):
+    """
+    Read the partition key of the given tables.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Table names
+
+    Returns:
+        dict: Table name to partition key column for partitioned tables,
+              or None on failure
+    """
+    query = """
+    SELECT c.relname, a.attname
+    FROM pg_partitioned_table p
+    JOIN pg_class c ON c.oid = p.partrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE c.relname = ANY(%s)
+      AND n.nspname = current_schema()
+    """
+    cursor = db_connection.execute_query(query, (list(table_names),))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+    keys = dict(cursor.fetchall())
+    db_connection.commit()
+    return keys
+
+
+def fetch_partitions(db_connection, table_name):
+    """
+    List the partitions of a table with their bounds.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Partitioned table name
+
+    Returns:
+        list: Dictionaries with 'name', 'default', 'start' and 'end' (dates,
+              None for the default partition), or None on failure
+    """
+    query = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(%s)
+    ORDER BY c.relname
+    """
+    cursor = db_connection.execute_query(query, (table_name,))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return None
+
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = PARTITION_BOUND.search(bound)
+        partitions.append({
+            "name": name,
+            "default": bound == "DEFAULT",
+            # Timestamp bounds read as '2026-10-01 00:00:00'
+            "start": date.fromisoformat(match.group(1)[:10]) if match else None,
+            "end": date.fromisoformat(match.group(2)[:10]) if match else None,
+        })
+    db_connection.commit()
+    return partitions
+
+
+def create_partitions(db_connection, table_name, months=PREMAKE_MONTHS, today=None):
+    """
+    Create the default partition and the monthly partitions from the current
+    month to `months` months ahead, skipping those that exist.
+
+    A month cannot be attached while the DEFAULT partition holds rows of it,
+    so in the same transaction those rows are taken out of DEFAULT, the
+    partitions created and the rows inserted again through the parent.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Partitioned table name
+        months (int, optional): Months to create ahead of the current one
+        today (date, optional): Reference date (today when omitted)
+
+    Returns:
+        bool: Success status; a table that is not partitioned is skipped
+    """
+    keys = fetch_partition_keys(db_connection, [table_name])
+    if keys is None:
+        return False
+    if table_name not in keys:
+        print(f"Table '{table_name}' is not partitioned, skipping partition maintenance")
+        return True
+    partitions = fetch_partitions(db_connection, table_name)
+    if partitions is None:
+        return False
+
+    key = keys[table_name]
+    default = next((partition["name"] for partition in partitions if partition["default"]), None)
+    statements = []
+    if default is None:
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT")
+
+    first = month_start(today or date.today())
+    existing = {partition["start"] for partition in partitions}
+    months_created = []
+    for offset in range(months + 1):
+        start = month_start(first, offset)
+        if start in existing:
+            continue
+        end = month_start(start, 1)
+        months_created.append(f"({key} >= '{start.isoformat()}' AND {key} < '{end.isoformat()}')")
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_p{start:%Y%m} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    if not statements:
+        return True
+    count = len(statements)
+    if default is not None and months_created:
+        moved = f"{table_name}_moved"[:63]
+        statements = [
+            f"CREATE TEMP TABLE {moved} (LIKE {table_name}) ON COMMIT DROP",
+            f"WITH rows AS (DELETE FROM {default} WHERE {' OR '.join(months_created)} RETURNING *) "
+            f"INSERT INTO {moved} SELECT * FROM rows",
+            *statements,
+            f"INSERT INTO {table_name} SELECT * FROM {moved}",
+        ]
+    print(f"Creating {count} partitions of '{table_name}'")
+    return db_connection.execute_ddl(statements, tables=[table_name])
+
+
+def expire_partitions(db_connection, table_name, retention_months, drop=False, today=None):
+    """
+    Detach, and optionally drop, the monthly partitions that end before the
+    retention cutoff.
+
+    Detached partitions stay in the database as ordinary tables so they can
+    be archived before they are dropped by hand.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Partitioned table name
+        retention_months (int): Full months to keep before the current one
+        drop (bool, optional): Drop the expired partitions instead of detaching them
+        today (date, optional): Reference date (today when omitted)
+
+    Returns:
+        bool: Success status
+    """
+    partitions = fetch_partitions(db_connection, table_name)
+    if partitions is None:
+        return False
+
+    cutoff = month_start(today or date.today(), -retention_months)
+    for partition in partitions:
+        if partition["default"] or partition["end"] is None or partition["end"] > cutoff:
+            continue
+        statement = f"ALTER TABLE {table_name} DETACH PARTITION {partition['name']}"
+        if drop:
+            statement += f";\nDROP TABLE {partition['name']}"
+        action = "Dropping" if drop else "Detaching"
+        print(f"{action} expired partition {partition['name']} (before {cutoff.isoformat()})")
+        if not db_connection.execute_ddl(statement, tables=[table_name, partition["name"]]):
+            return False
+    return True
+
+
+def maintain_partitions(db_connection, table_names, months=PREMAKE_MONTHS, drop=False, today=None):
+    """
+    Run partition maintenance for the partitioned tables among the given ones.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Registered table names
+        months (int, optional): Months to create ahead of the current one
+        drop (bool, optional): Drop expired partitions instead of detaching them
+        today (date, optional): Reference date (today when omitted)
+
+    Returns:
+        bool: Success status
+    """
+    success = True
+    for table_name in table_names:
+        table = get_table_class(table_name)
+        if not getattr(table, "partition_key", None):
+            continue
+        if not create_partitions(db_connection, table_name, months, today):
+            success = False
+            continue
+        if table.retention_months and not expire_partitions(db_connection, table_name,
+                                                            table.retention_months, drop, today):
+            success = False
+    return success
@@ -0,0 +1,186 @@
+"""
+Post-load maintenance.
+
+After an install the tables it loaded have no planner statistics, and the
+upserts of a reload leave dead tuples behind. This stage runs ANALYZE on every
+loaded table, VACUUM (ANALYZE) instead where dead tuples exceed a threshold,
+and loads the hot lookup tables (handlers with ``prewarm = True``) and their
+indexes into shared buffers with pg_prewarm when the extension is available,
+so the first invoices processed after an install run at full speed.
+
+Tables are independent of each other here, so they are processed in parallel
+on a connection pool when one is given.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .registry import get_table_class
+
+
+# Vacuum when dead tuples exceed this share of live tuples...
+DEAD_TUPLE_RATIO = 0.1
+# ...and this absolute number
+DEAD_TUPLE_MIN = 1000
+
+
+def ensure_prewarm(db_connection):
+    """
+    Make pg_prewarm usable, installing the extension when it is available.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+
+    Returns:
+        bool: True if pg_prewarm can be called
+    """
+    cursor = db_connection.execute_query("""
+    SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'),
+           EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_prewarm')
+    """)
+    if cursor is None:
+        db_connection.connection.rollback()
+        return False
+    installed, available = cursor.fetchone()
+    db_connection.connection.rollback()
+    if installed:
+        return True
+    if not available:
+        print("pg_prewarm is not available on this server, skipping prewarm")
+        return False
+
+    if db_connection.execute_query("CREATE EXTENSION IF NOT EXISTS pg_prewarm") is None:
+        db_connection.connection.rollback()
+        print("Could not install pg_prewarm (insufficient privileges?), skipping prewarm")
+        return False
+    db_connection.commit()
+    return True
+
+
+def needs_vacuum(db_connection, table_name):
+    """
+    Check whether a table's dead tuples exceed the vacuum threshold.
+
+    Partitioned tables are judged by the sum over their partitions.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+
+    Returns:
+        bool: True if the table should be vacuumed
+    """
+    cursor = db_connection.execute_query("""
+    SELECT COALESCE(sum(s.n_dead_tup), 0)::bigint, COALESCE(sum(s.n_live_tup), 0)::bigint
+    FROM pg_stat_user_tables s
+    WHERE s.relid = to_regclass(%s)
+       OR s.relid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))
+    """, (table_name, table_name))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return False
+    dead, live = cursor.fetchone()
+    db_connection.connection.rollback()
+    return dead > DEAD_TUPLE_MIN and dead > live * DEAD_TUPLE_RATIO
+
+
+def get_prewarm_queries(db_connection, table_name):
+    """
+    Build the pg_prewarm calls for a table and its indexes.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+
+    Returns:
+        list: SELECT pg_prewarm(...) statements
+    """
+    # Partitioned tables and indexes have no storage; their partitions do
+    cursor = db_connection.execute_query("""
+    SELECT c.oid::regclass::text
+    FROM pg_class c
+    WHERE c.relkind IN ('r', 'i', 'm')
+      AND (c.oid = to_regclass(%s)
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))
+           OR c.oid IN (SELECT x.indexrelid FROM pg_index x
+                        WHERE x.indrelid = to_regclass(%s)
+                           OR x.indrelid IN (SELECT inhrelid FROM pg_inherits
+                                             WHERE inhparent = to_regclass(%s))))
+    ORDER BY c.relkind DESC, 1
+    """, (table_name,) * 4)
+    if cursor is None:
+        db_connection.connection.rollback()
+        return []
+    relations = [row[0] for row in cursor.fetchall()]
+    db_connection.connection.rollback()
+
+    sql = db_connection.backend.sql
+    return [sql.SQL("SELECT pg_prewarm({})").format(sql.Literal(relation)) for relation in relations]
+
+
+def post_load_table(db_connection, table_name, prewarm=False):
+    """
+    Analyze, and if needed vacuum and prewarm, one table.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        prewarm (bool, optional): Load the table and its indexes into shared buffers
+
+    Returns:
+        dict: 'success', 'vacuumed', 'prewarmed' and 'seconds'
+    """
+    started = time.perf_counter()
+    vacuum = needs_vacuum(db_connection, table_name)
+    statements = [f"VACUUM (ANALYZE) {table_name}" if vacuum else f"ANALYZE {table_name}"]
+    if prewarm:
+        statements.extend(get_prewarm_queries(db_connection, table_name))
+
+    # VACUUM cannot run inside a transaction block
+    success = db_connection.execute_concurrently(statements)
+    return {"success": success, "vacuumed": vacuum, "prewarmed": prewarm and success,
+            "seconds": time.perf_counter() - started}
+
+
+def run_post_load(db_connection, table_names, pool=None):
+    """
+    Run the post-load stage for the given tables.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Tables loaded by the install
+        pool (DatabaseConnectionPool, optional): Connected pool to process
+                                                 tables in parallel
+
+    Returns:
+        bool: Success status
+    """
+    table_names = list(dict.fromkeys(table_names))
+    if not table_names:
+        return True
+    hot = {name for name in table_names if getattr(get_table_class(name), "prewarm", False)}
+    can_prewarm = bool(hot) and ensure_prewarm(db_connection)
+
+    def task(table_name):
+        connection = pool.acquire() if pool else db_connection
+        try:
+            return post_load_table(connection, table_name, can_prewarm and table_name in hot)
+        finally:
+            if pool:
+                pool.release(connection)
+
+    print(f"\nPost-load maintenance of {len(table_names)} tables...")
+    started = time.perf_counter()
+    if pool:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            results = dict(zip(table_names, executor.map(task, table_names)))
+    else:
+        results = {name: task(name) for name in table_names}
+
+    for table_name, result in results.items():
+        steps = ["vacuum analyze" if result["vacuumed"] else "analyze"]
+        if result["prewarmed"]:
+            steps.append("prewarm")
+        status = "ok" if result["success"] else "FAILED"
+        print(f"  {table_name:<25}{' + '.join(steps):<25}{result['seconds']:>7.2f}s  {status}")
+    print(f"Post-load maintenance finished in {time.perf_counter() - started:.2f}s")
+    return all(result["success"] for result in results.values())
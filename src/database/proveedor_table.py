@@ -7,6 +7,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class ProveedorTable(TableSimpleBlueprint):
     """Handler for the 'proveedor' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "proveedor"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("id_pvsi",)
+    
     def __init__(self, db_connection):
         """Initialize the proveedor table handler."""
         super().__init__(db_connection, "proveedor")
@@ -49,7 +56,7 @@ class ProveedorTable(TableSimpleBlueprint):
             ('1', 'DIK', ' Ejemplo')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
@@ -2,11 +2,28 @@
 Implementation of the recibo_venta table using the TableSimpleBlueprint class.
 """
 from .table_simple_blueprint import TableSimpleBlueprint
+from .id_blocks import reserve_sequence_values
 
 
 class ReciboVentaTable(TableSimpleBlueprint):
     """Handler for the 'recibo_venta' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "recibo_venta"
+    dependencies = ()
+    data_source = None
+    load_strategy = "none"
+    # Receipts are kept; partitions are only pre-created. The primary key must
+    # include fecha_emision, so id_sql is unique only through its sequence
+    partition_key = "fecha_emision"
+    indexes = (
+        ("recibo_venta_folio_estado_idx", "(folio, estado)"),
+        ("recibo_venta_hash_idx", "(hash)"),
+    )
+    # Row order of get_insert_query and insert_many
+    columns = ("folio", "num_ref", "dtl_cob_apl_t", "dtl_doc_cob_t", "cta_cor_t", "rbo_cob_t",
+               "hash", "estado", "fecha_emision", "fecha_procesamiento")
+    
     def __init__(self, db_connection):
         """Initialize the recibo_venta table handler."""
         super().__init__(db_connection, "recibo_venta")
@@ -20,7 +37,7 @@ class ReciboVentaTable(TableSimpleBlueprint):
         """
         return """
         CREATE TABLE IF NOT EXISTS recibo_venta (
-            id_sql SERIAL PRIMARY KEY,
+            id_sql SERIAL,
             folio VARCHAR,
             num_ref INTEGER,
             dtl_cob_apl_t INTEGER,
@@ -29,9 +46,10 @@ class ReciboVentaTable(TableSimpleBlueprint):
             rbo_cob_t INTEGER, 
             hash VARCHAR(64),
             estado VARCHAR(20),
-            fecha_emision DATE,
-            fecha_procesamiento TIMESTAMP 
-        );
+            fecha_emision DATE NOT NULL DEFAULT CURRENT_DATE,
+            fecha_procesamiento TIMESTAMP,
+            PRIMARY KEY (id_sql, fecha_emision)
+        ) PARTITION BY RANGE (fecha_emision);
         """
     
     def get_insert_query(self):
@@ -43,8 +61,42 @@ class ReciboVentaTable(TableSimpleBlueprint):
         """
         return """
         INSERT INTO recibo_venta (folio, num_ref, dtl_cob_apl_t, dtl_doc_cob_t, cta_cor_t, rbo_cob_t, hash, estado, fecha_emision, fecha_procesamiento) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_DATE), %s)
+        """
+    
+    def insert_many(self, rows):
+        """
+        Insert a batch of receipts with COPY and return their id_sql values.
+        
+        The ids are taken from the id_sql sequence in one round trip before
+        the copy, instead of one INSERT ... RETURNING per receipt. A missing
+        fecha_emision is today's date, as in get_insert_query.
+        
+        Args:
+            rows (list): Tuples in the order of the columns attribute
+            
+        Returns:
+            list: id_sql of each row, in row order, or None on failure
         """
+        if not rows:
+            return []
+        # The partition key is NOT NULL, so one missing date would fail the whole copy
+        position = self.columns.index("fecha_emision")
+        if any(row[position] is None for row in rows):
+            cursor = self.db.execute_query("SELECT CURRENT_DATE")
+            if cursor is None:
+                self.db.connection.rollback()
+                return None
+            today = cursor.fetchone()[0]
+            rows = [row if row[position] is not None else (*row[:position], today, *row[position + 1:])
+                    for row in rows]
+        ids = reserve_sequence_values(self.db, "recibo_venta", "id_sql", len(rows))
+        if ids is None or not self.db.copy_rows("recibo_venta", ["id_sql", *self.columns],
+                                                ((id_sql, *row) for id_sql, row in zip(ids, rows))):
+            self.db.connection.rollback()
+            return None
+        self.db.commit()
+        return ids
     
     def insert_default_data(self):
         """
@@ -0,0 +1,220 @@
+"""
+Table registry.
+Maps every installable table to its handler class and computes the order in
+which tables are created (dependencies first) and dropped (dependents first).
+
+Each handler class declares its own metadata as class attributes:
+    table_name        Name of the table in the database
+    dependencies      Tables that must be installed before this one
+    data_source       "csv", "json", "default" or None when the table starts empty
+    load_strategy     "upsert" (safe to rerun), "append" or "none"
+    natural_key       Columns seed rows are upserted on (seeded tables, see seeding.py)
+    indexes           Secondary (name, definition) indexes (see indexes.py)
+    partition_key     Column the table is partitioned on by month (see partitioning.py)
+    retention_months  Months of partitions kept by partition maintenance
+    archive_column    Date column old rows are archived by (see archival.py)
+    archive_key       Unique key archival batches are ordered by
+    prewarm           Hot lookup table loaded into shared buffers after installs
+    id_blocks         (column, block size) of ids allocated in blocks (see id_blocks.py)
+"""
+import importlib
+import json
+import os
+
+
+# Table name -> (module in this package, handler class), in installation order
+TABLE_MODULES = {
+    "articulos": ("articulos_table", "ArticulosTable"),
+    "caja_banco": ("caja_banco_table", "CajaBancoTable"),
+    "clientes": ("clientes_table", "ClientesTable"),
+    "detalle_estado": ("detalle_estado_table", "DetalleEstadoTable"),
+    "errores": ("errores_table", "ErroresTable"),
+    "estado_factura_venta": ("estado_factura_venta_table", "EstadoFacturaVentaTable"),
+    "forma_pago": ("forma_pago_table", "FormaPagoTable"),
+    "forma_pago_caja_banco": ("forma_pago_caja_banco_table", "FormaPagoCajaBancoTable"),
+    "general_misc": ("general_misc_table", "GeneralMiscTable"),
+    "iva": ("iva_table", "IvaTable"),
+    "metodo_pago": ("metodo_pago_table", "MetodoPagoTable"),
+    "pais": ("pais_table", "PaisTable"),
+    "proveedor": ("proveedor_table", "ProveedorTable"),
+    "recibo_venta": ("recibo_venta_table", "ReciboVentaTable"),
+    "reintentos_fac_venta": ("reintentos_fac_venta_table", "ReintentosFacturaVentaTable"),
+    "tipo_movimiento": ("tipo_movimiento_table", "TipoMovimientoTable"),
+    "vendedores": ("vendedores_table", "VendedoresTable"),
+    "almacen": ("almacen_table", "AlmacenTable"),
+}
+
+
+def _bundled_table_modules():
+    """
+    Never called. get_table_class imports the table modules through
+    importlib, which PyInstaller's analysis cannot follow; these plain imports
+    make it bundle them while startup still imports only the enabled tables.
+    Keep the list in step with TABLE_MODULES.
+    """
+    from . import (  # noqa: F401
+        articulos_table, caja_banco_table, clientes_table, detalle_estado_table,
+        errores_table, estado_factura_venta_table, forma_pago_table,
+        forma_pago_caja_banco_table, general_misc_table, iva_table,
+        metodo_pago_table, pais_table, proveedor_table, recibo_venta_table,
+        reintentos_fac_venta_table, tipo_movimiento_table, vendedores_table,
+        almacen_table,
+    )
+
+
+def get_table_class(table_name):
+    """
+    Import and return the handler class of a table.
+
+    Args:
+        table_name (str): Registered table name
+
+    Returns:
+        type: Handler class
+    """
+    module_name, class_name = TABLE_MODULES[table_name]
+    module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
+
+
+def load_table_config(config_path, default=None):
+    """
+    Load the table on/off switches from table_config.json.
+
+    Args:
+        config_path (str): Path to table_config.json
+        default (dict, optional): Configuration used when the file is missing
+                                  or invalid; all tables enabled when omitted
+
+    Returns:
+        dict: Table name to enabled flag
+    """
+    if default is None:
+        default = {name: True for name in TABLE_MODULES}
+
+    try:
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as config_file:
+                return json.load(config_file)
+        print(f"Warning: Configuration file not found at {config_path}")
+    except Exception as e:
+        print(f"Error loading table configuration: {e}")
+    return dict(default)
+
+
+def get_enabled_tables(table_config, enabled_by_default=True):
+    """
+    Get the registered tables switched on in the configuration.
+
+    Args:
+        table_config (dict): Table name to enabled flag
+        enabled_by_default (bool, optional): Whether tables missing from the
+                                             configuration are enabled
+
+    Returns:
+        list: Table names in registry order
+    """
+    for name in table_config:
+        if name not in TABLE_MODULES:
+            print(f"Warning: '{name}' in table configuration is not a registered table")
+    return [name for name in TABLE_MODULES if table_config.get(name, enabled_by_default)]
+
+
+def resolve_order(table_names, reverse=False):
+    """
+    Sort tables so every table comes after the tables it depends on.
+
+    Dependencies outside table_names are assumed to be installed already.
+    Otherwise tables keep their registry order, each one placed right after
+    its last dependency.
+
+    Args:
+        table_names (list): Registered table names
+        reverse (bool, optional): Return the drop order (dependents first)
+
+    Returns:
+        list: Ordered table names
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    selected = [name for name in TABLE_MODULES if name in set(table_names)]
+    order = []
+    visiting = set()
+
+    def visit(name, path):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular table dependencies: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in get_table_class(name).dependencies:
+            if dep in selected:
+                visit(dep, path + [name])
+        visiting.discard(name)
+        order.append(name)
+
+    for name in selected:
+        visit(name, [])
+
+    if reverse:
+        order.reverse()
+    return order
+
+
+def load_table_data(table, profiles=None, json_path=None, csv_path=None):
+    """
+    Populate a table according to its declared data source.
+
+    Args:
+        table: Handler instance
+        profiles (list, optional): Store profiles for json tables
+        json_path (str, optional): Profiles JSON file for json tables; when
+                                   neither profiles nor json_path is given the
+                                   default data is used
+        csv_path (str, optional): CSV file for csv tables (handler default when omitted)
+
+    Returns:
+        bool: Success status
+    """
+    name = table.table_name
+
+    if table.data_source == "csv":
+        print(f"\nImporting data from CSV for {name}...")
+        if table.import_from_csv(csv_path):
+            print(f"Data imported successfully for {name}")
+            return True
+        print(f"Failed to import data from CSV for {name}")
+        print("Make sure the CSV file exists in the configured directory")
+        return False
+
+    if table.data_source == "json":
+        if profiles is not None:
+            print(f"\nLoading store profile data for {name}...")
+            if table.insert_from_profiles(profiles):
+                print(f"Store profile data for {name} loaded successfully")
+                return True
+            print(f"Failed to load store profile data for {name}")
+            return False
+
+        if json_path is not None:
+            print(f"\nImporting data from JSON for {name}...")
+            if not os.path.exists(json_path):
+                print(f"JSON file not found at {json_path}")
+                print("Falling back to default data...")
+            elif table.import_from_json(json_path):
+                print(f"Data imported successfully for {name} from JSON")
+                return True
+            else:
+                print(f"Failed to import data from JSON for {name}")
+                print("Falling back to default data...")
+
+    if table.data_source in ("json", "default"):
+        print(f"\nLoading default data for {name}...")
+        if table.insert_default_data():
+            print(f"Default data for {name} loaded successfully")
+            return True
+        print(f"Failed to load default data for {name}")
+        return False
+
+    return True
@@ -1,5 +1,16 @@
 """
 Implementation of the reintentos_fac_venta table using the TableSimpleBlueprint class.
+
+The table is the work queue of the retry workers. A worker claims a batch of
+pending folios with claim_batch, which locks them with FOR UPDATE SKIP LOCKED
+so concurrent workers each get different rows instead of waiting on each
+other, and finishes the batch with mark_completed / increment_attempts in the
+same transaction.
+
+Each failed attempt pushes the folio's proximo_intento back exponentially
+(retry_base_delay * 2^intentos seconds, capped at retry_max_delay), and claims
+only scan pending rows that are already due, in proximo_intento order, so a
+growing backlog of failing folios does not slow down polling.
 """
 from .table_simple_blueprint import TableSimpleBlueprint
 
@@ -7,6 +18,19 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class ReintentosFacturaVentaTable(TableSimpleBlueprint):
     """Handler for the 'reintentos_fac_venta' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "reintentos_fac_venta"
+    dependencies = ()
+    data_source = None
+    load_strategy = "none"
+    # Pending retries only, in claim order; completed rows are never looked up again
+    indexes = (
+        ("reintentos_fac_venta_proximo_idx", "(proximo_intento) WHERE completado = false"),
+    )
+    # Seconds before the first retry, doubled after each failed attempt
+    retry_base_delay = 60
+    retry_max_delay = 6 * 60 * 60
+    
     def __init__(self, db_connection):
         """Initialize the reintentos_fac_venta table handler."""
         super().__init__(db_connection, "reintentos_fac_venta")
@@ -23,7 +47,8 @@ class ReintentosFacturaVentaTable(TableSimpleBlueprint):
             folio VARCHAR PRIMARY KEY NOT NULL,
             intentos INTEGER NOT NULL DEFAULT 0,
             fecha_del_registro TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            completado BOOLEAN DEFAULT FALSE
+            completado BOOLEAN NOT NULL DEFAULT FALSE,
+            proximo_intento TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
         );
         """
     
@@ -39,6 +64,135 @@ class ReintentosFacturaVentaTable(TableSimpleBlueprint):
         VALUES (%s, %s, %s, %s)
         """
     
+    def enqueue_many(self, folios):
+        """
+        Queue folios for retry.
+        
+        New folios are inserted pending and due now; folios already completed
+        are queued again with their attempts reset, and pending ones are left
+        as they are.
+        
+        Args:
+            folios (iterable): Folios to retry
+            
+        Returns:
+            int: Folios inserted or requeued, or None on failure
+        """
+        # Sorted and unique, so concurrent enqueues lock rows in the same order
+        folios = sorted(set(folios))
+        if not folios:
+            return 0
+        
+        cursor = self.db.execute_query("""
+        INSERT INTO reintentos_fac_venta (folio)
+        SELECT unnest(%s::varchar[])
+        ON CONFLICT (folio) DO UPDATE
+            SET intentos = 0, fecha_del_registro = CURRENT_TIMESTAMP, completado = false,
+                proximo_intento = CURRENT_TIMESTAMP
+            WHERE reintentos_fac_venta.completado
+        """, (folios,))
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        count = cursor.rowcount
+        self.db.commit()
+        return count
+    
+    def claim_batch(self, n):
+        """
+        Claim up to n pending folios that are due, the longest overdue first.
+        
+        The rows stay locked until the current transaction ends, and rows
+        locked by other workers are skipped. Finish the batch with
+        mark_completed and increment_attempts (the last call commits), or
+        roll back to give the folios back.
+        
+        Args:
+            n (int): Maximum number of folios to claim
+            
+        Returns:
+            list: (folio, intentos) tuples, or None on failure
+        """
+        cursor = self.db.execute_query("""
+        SELECT folio, intentos
+        FROM reintentos_fac_venta
+        WHERE completado = false AND proximo_intento <= CURRENT_TIMESTAMP
+        ORDER BY proximo_intento
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """, (n,))
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        return cursor.fetchall()
+    
+    def _update_folios(self, assignment, folios, commit, params=()):
+        """
+        Apply a SET clause to the given folios in one statement.
+        
+        Args:
+            assignment (str): SET clause
+            folios (iterable): Folios to update
+            commit (bool): Commit the transaction afterwards
+            params (tuple, optional): Parameters of the SET clause
+            
+        Returns:
+            int: Rows updated, or None on failure
+        """
+        folios = sorted(set(folios))
+        if not folios:
+            if commit:
+                self.db.commit()
+            return 0
+        
+        cursor = self.db.execute_query(
+            f"UPDATE reintentos_fac_venta SET {assignment} WHERE folio = ANY(%s::varchar[])",
+            (*params, folios)
+        )
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        count = cursor.rowcount
+        if commit:
+            self.db.commit()
+        return count
+    
+    def increment_attempts(self, folios, commit=True):
+        """
+        Record a failed attempt for each folio and schedule its next one.
+        
+        The folios stay pending but are not claimed again before
+        retry_base_delay * 2^intentos seconds (at most retry_max_delay).
+        
+        Args:
+            folios (iterable): Folios whose retry failed
+            commit (bool, optional): Commit, releasing the claimed rows;
+                                     pass False when another call finishes the batch
+            
+        Returns:
+            int: Rows updated, or None on failure
+        """
+        # The exponent is capped so the power cannot overflow
+        return self._update_folios(
+            "intentos = intentos + 1, proximo_intento = CURRENT_TIMESTAMP"
+            " + least(%s * power(2, least(intentos, 30)), %s) * interval '1 second'",
+            folios, commit, (self.retry_base_delay, self.retry_max_delay)
+        )
+    
+    def mark_completed(self, folios, commit=True):
+        """
+        Mark folios as completed, removing them from the queue.
+        
+        Args:
+            folios (iterable): Folios retried successfully
+            commit (bool, optional): Commit, releasing the claimed rows;
+                                     pass False when another call finishes the batch
+            
+        Returns:
+            int: Rows updated, or None on failure
+        """
+        return self._update_folios("completado = true", folios, commit)
+    
     def insert_default_data(self):
         """
         Insert default data into the reintentos_fac_venta table.
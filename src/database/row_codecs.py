@@ -0,0 +1,283 @@
+"""
+Typed row codecs built from the catalog.
+
+A RowCodec converts raw rows (e.g. CSV strings) into values of the target
+column types and validates them in Python: NULLs in NOT NULL columns, values
+that do not parse and strings longer than a VARCHAR/CHAR limit are caught
+before the batch is sent. Over-length strings are rejected or truncated.
+
+Column definitions are read from pg_attribute once per table and database and
+cached for the life of the process; clear_column_cache drops them after DDL
+that changes a table, which apply_schema_plan, SchemaManager.migrate and
+SchemaManager.drop_tables do themselves. The catalog read does not end a transaction the caller
+has open.
+"""
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+
+INT_RANGES = {
+    "int2": (-2 ** 15, 2 ** 15 - 1),
+    "int4": (-2 ** 31, 2 ** 31 - 1),
+    "int8": (-2 ** 63, 2 ** 63 - 1),
+}
+
+TRUE_VALUES = {"t", "true", "1", "y", "yes", "on", "s", "si"}
+FALSE_VALUES = {"f", "false", "0", "n", "no", "off"}
+
+_column_cache = {}
+
+
+class CodecError(ValueError):
+    """A value that cannot be stored in its column."""
+
+    def __init__(self, column, value, reason):
+        prefix = f"column {column}: " if column else ""
+        super().__init__(f"{prefix}{reason} ({str(value)[:50]!r})")
+        self.column = column
+        self.value = value
+
+
+def fetch_columns(db_connection, table_name):
+    """
+    Read the column definitions of a table, using the process-wide cache.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+
+    Returns:
+        list: Column dictionaries with 'name', 'type' (pg_type name, e.g.
+              "varchar"), 'length' (character limit or None), 'precision',
+              'scale' and 'not_null' in column order, or None if the table
+              does not exist or the catalog could not be read
+    """
+    params = db_connection.connection_params
+    cache_key = (params.get("host"), str(params.get("port")), params.get("dbname"), table_name)
+    if cache_key in _column_cache:
+        return _column_cache[cache_key]
+
+    query = """
+    SELECT a.attname, t.typname, a.atttypmod, a.attnotnull
+    FROM pg_attribute a
+    JOIN pg_type t ON t.oid = a.atttypid
+    WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+    ORDER BY a.attnum
+    """
+    # Called from write paths, so an open transaction of the caller is kept
+    in_transaction = db_connection.in_transaction()
+    cursor = db_connection.execute_query(query, (table_name,))
+    if cursor is None:
+        db_connection.end_read(in_transaction)
+        return None
+    rows = cursor.fetchall()
+    db_connection.end_read(in_transaction)
+    if not rows:
+        return None
+
+    columns = []
+    for name, type_name, typmod, not_null in rows:
+        column = {"name": name, "type": type_name, "length": None, "precision": None,
+                  "scale": None, "not_null": not_null}
+        if type_name in ("varchar", "bpchar") and typmod > 4:
+            column["length"] = typmod - 4
+        elif type_name == "numeric" and typmod > 4:
+            column["precision"] = ((typmod - 4) >> 16) & 0xFFFF
+            column["scale"] = (typmod - 4) & 0xFFFF
+        columns.append(column)
+    _column_cache[cache_key] = columns
+    return columns
+
+
+def clear_column_cache(tables=None):
+    """
+    Forget cached column definitions.
+
+    Args:
+        tables (list, optional): Tables whose definitions changed, in every
+                                 database; all tables when omitted
+    """
+    if tables is None:
+        _column_cache.clear()
+        return
+    for cache_key in [key for key in _column_cache if key[3] in tables]:
+        del _column_cache[cache_key]
+
+
+def _int_converter(type_name):
+    low, high = INT_RANGES[type_name]
+
+    def convert(value):
+        number = value if isinstance(value, int) else int(str(value).strip())
+        if not low <= number <= high:
+            raise ValueError(f"out of range for {type_name}")
+        return number
+    return convert
+
+
+def _numeric_converter(precision, scale):
+    # numeric(p,s) holds values below 10^(p-s) once rounded to s decimals
+    limit = Decimal(10) ** (precision - scale) if precision is not None else None
+    step = Decimal(1).scaleb(-scale) if precision is not None else None
+
+    def convert(value):
+        try:
+            number = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError("not a number")
+        if limit is not None and number.is_finite() and abs(number) >= limit - step / 2:
+            raise ValueError(f"exceeds numeric({precision},{scale})")
+        return number
+    return convert
+
+
+def _bool_converter(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError("not a boolean")
+
+
+def _date_converter(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def _timestamp_converter(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+CONVERTERS = {
+    "bool": _bool_converter,
+    "date": _date_converter,
+    "timestamp": _timestamp_converter,
+    "timestamptz": _timestamp_converter,
+    "float4": float,
+    "float8": float,
+}
+
+
+class RowCodec:
+    """Converts and validates rows for a fixed list of table columns."""
+
+    def __init__(self, table_name, columns, on_overflow="reject"):
+        """
+        Build the per-column converters.
+
+        Args:
+            table_name (str): Table name
+            columns (list): Column dictionaries from fetch_columns, in row order
+            on_overflow (str, optional): "reject" or "truncate" strings longer
+                                         than their column
+        """
+        self.table_name = table_name
+        self.columns = [column["name"] for column in columns]
+        self.types = [column["type"] for column in columns]
+        self.on_overflow = on_overflow
+        self.truncated = 0
+        self._converters = [self._build_converter(column) for column in columns]
+
+    def _build_converter(self, column):
+        """Build the function converting one value of a column."""
+        name, type_name, length = column["name"], column["type"], column["length"]
+        if type_name in INT_RANGES:
+            convert = _int_converter(type_name)
+        elif type_name == "numeric":
+            convert = _numeric_converter(column["precision"], column["scale"])
+        elif type_name in CONVERTERS:
+            convert = CONVERTERS[type_name]
+        else:
+            convert = None
+        is_text = convert is None
+        not_null = column["not_null"]
+        truncate = self.on_overflow == "truncate"
+
+        def encode(value):
+            # An empty CSV field is NULL for every non-text column
+            if value is None or (value == "" and not is_text):
+                if not_null:
+                    raise CodecError(name, value, "NULL in a NOT NULL column")
+                return None
+            if is_text:
+                text = value if isinstance(value, str) else str(value)
+                if length is not None and len(text) > length:
+                    if not truncate:
+                        raise CodecError(name, text, f"{len(text)} characters, limit {length}")
+                    self.truncated += 1
+                    text = text[:length]
+                return text
+            try:
+                return convert(value)
+            except (ValueError, TypeError) as e:
+                raise CodecError(name, value, str(e))
+        return encode
+
+    def encode(self, row):
+        """
+        Convert one row.
+
+        Args:
+            row (sequence): Raw values in column order
+
+        Returns:
+            tuple: Converted values
+
+        Raises:
+            CodecError: If a value cannot be stored
+        """
+        if len(row) != len(self._converters):
+            raise CodecError(None, row, f"{len(row)} values for {len(self._converters)} columns")
+        return tuple(convert(value) for convert, value in zip(self._converters, row))
+
+    def encode_rows(self, rows, errors=None):
+        """
+        Convert rows, skipping the invalid ones.
+
+        Args:
+            rows (iterable): Raw rows
+            errors (list, optional): Receives (row number, error) for each
+                                     skipped row, numbered from 1
+
+        Yields:
+            tuple: Converted rows
+        """
+        for number, row in enumerate(rows, 1):
+            try:
+                yield self.encode(row)
+            except CodecError as e:
+                if errors is not None:
+                    errors.append((number, e))
+
+
+def get_row_codec(db_connection, table_name, columns=None, on_overflow="reject"):
+    """
+    Get a codec for some or all columns of a table.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        columns (list, optional): Column names in row order (all columns when omitted)
+        on_overflow (str, optional): "reject" or "truncate" over-length strings
+
+    Returns:
+        RowCodec: The codec, or None if the table or a column does not exist
+    """
+    definitions = fetch_columns(db_connection, table_name)
+    if definitions is None:
+        print(f"Cannot build a row codec: table '{table_name}' not found")
+        return None
+    if columns is not None:
+        by_name = {column["name"]: column for column in definitions}
+        missing = [name for name in columns if name not in by_name]
+        if missing:
+            print(f"Cannot build a row codec: '{table_name}' has no column {', '.join(missing)}")
+            return None
+        definitions = [by_name[name] for name in columns]
+    return RowCodec(table_name, definitions, on_overflow)
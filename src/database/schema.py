@@ -1,11 +1,154 @@
 """
 Database schema module.
-Defines and creates the database tables using provided SQL queries.
+Defines and creates the database tables using provided SQL queries, and applies
+versioned migrations recorded in the schema_migrations table.
 """
 import os
+import re
 import glob
+import time
+import hashlib
 from pathlib import Path
 from .connection import DatabaseConnection
+from .row_codecs import clear_column_cache
+
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Migration files are named <version>_<description>.sql, e.g. 0001_add_index.sql
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# First-line directive for migrations that must run outside a transaction
+NO_TRANSACTION = "-- migrate:no-transaction"
+
+# Directive listing the tables a migration changes, e.g. "-- migrate:requires clientes"
+REQUIRES = re.compile(r"^--\s*migrate:requires\s+(.+)$", re.IGNORECASE | re.MULTILINE)
+
+
+def load_migrations(migrations_dir):
+    """
+    Read the migration files of a directory.
+    
+    Args:
+        migrations_dir (str): Directory containing <version>_<description>.sql files
+        
+    Returns:
+        list: Migration dictionaries with 'version', 'name', 'checksum', 'sql',
+              'transactional' and 'requires' keys, ordered by version
+        
+    Raises:
+        ValueError: If two files share a version
+    """
+    migrations = {}
+    if not migrations_dir or not os.path.isdir(migrations_dir):
+        return []
+    
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            if filename.endswith(".sql"):
+                print(f"Warning: ignoring {filename} (expected <version>_<description>.sql)")
+            continue
+        
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: "
+                             f"{migrations[version]['name']} and {match.group(2)}")
+        
+        with open(os.path.join(migrations_dir, filename), 'rb') as f:
+            # Same checksum whether the file was checked out with CRLF or LF
+            content = f.read().replace(b"\r\n", b"\n")
+        sql = content.decode("utf-8")
+        code = "\n".join(line for line in sql.splitlines() if not line.lstrip().startswith("--"))
+        
+        migrations[version] = {
+            "version": version,
+            "name": match.group(2),
+            "checksum": hashlib.sha256(content).hexdigest(),
+            "sql": sql,
+            "transactional": not (sql.lstrip().lower().startswith(NO_TRANSACTION)
+                                  or re.search(r"\bCONCURRENTLY\b", code, re.IGNORECASE)),
+            "requires": [table for line in REQUIRES.findall(sql)
+                         for table in re.split(r"[\s,]+", line.strip()) if table],
+        }
+    
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    """
+    Split a SQL script into statements.
+    
+    Semicolons inside quotes, dollar-quoted bodies, -- comments and (nested)
+    /* */ comments do not split. Statements made only of comments are dropped.
+    
+    Args:
+        sql (str): SQL script
+        
+    Returns:
+        list: Statements without the trailing semicolon
+    """
+    statements = []
+    current = []
+    has_code = False
+    i = 0
+    quote = None
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if sql.startswith(quote, i):
+                current.append(quote)
+                i += len(quote)
+                quote = None
+                continue
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = len(sql) if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+        elif sql.startswith("/*", i):
+            # Block comments nest in PostgreSQL
+            depth = 0
+            end = i
+            while end < len(sql):
+                if sql.startswith("/*", end):
+                    depth += 1
+                    end += 2
+                elif sql.startswith("*/", end):
+                    depth -= 1
+                    end += 2
+                    if not depth:
+                        break
+                else:
+                    end += 1
+            current.append(sql[i:end])
+            i = end
+            continue
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "$":
+            match = re.match(r"\$\w*\$", sql[i:])
+            if match:
+                quote = match.group(0)
+                current.append(quote)
+                has_code = True
+                i += len(quote)
+                continue
+        elif char == ";":
+            if has_code:
+                statements.append("".join(current).strip())
+            current = []
+            has_code = False
+            i += 1
+            continue
+        current.append(char)
+        has_code = has_code or not char.isspace()
+        i += 1
+    if has_code:
+        statements.append("".join(current).strip())
+    
+    return statements
 
 
 class SchemaManager:
@@ -115,14 +258,20 @@ class SchemaManager:
             # Add more table creation queries as needed
         }
     
-    def drop_tables(self, tables=None):
+    def drop_tables(self, tables=None, lock_timeout="2s", retries=5):
         """
-        Drop specified tables from the database.
+        Drop specified tables from the database with a single DROP statement.
         Use with caution!
         
+        The views and foreign keys that CASCADE will also remove are printed
+        first. All locks are then taken in one transaction bounded by
+        lock_timeout, retried with backoff if another session holds them.
+        
         Args:
-            tables (list, optional): List of table names to drop.
+            tables (list, optional): List of table names to drop, in creation order.
                                     If None, drops all tables from get_table_creation_queries.
+            lock_timeout (str, optional): Maximum time to wait for the table locks
+            retries (int, optional): Number of attempts
         
         Returns:
             bool: Success status
@@ -132,15 +281,266 @@ class SchemaManager:
             tables = list(self.get_table_creation_queries().keys())
         
         # Reverse the order to handle dependencies correctly
-        tables.reverse()
+        tables = list(reversed(tables))
+        if not tables:
+            return True
         
-        success = True
-        for table in tables:
-            query = f"DROP TABLE IF EXISTS {table} CASCADE"
-            print(f"Dropping table: {table}...")
-            cursor = self.db.execute_query(query)
-            self.db.commit()
-            if cursor is None:
-                success = False
+        dependents = self.db.get_cascade_dependents(tables)
+        if dependents:
+            print("CASCADE will also remove:")
+            for dependent in dependents:
+                print(f"  {dependent['kind']} {dependent['name']} (depends on {dependent['depends_on']})")
         
+        print(f"Dropping tables: {', '.join(tables)}...")
+        query = f"DROP TABLE IF EXISTS {', '.join(tables)} CASCADE"
+        success = self.db.execute_ddl(query, tables=tables, lock_timeout=lock_timeout, retries=retries)
+        clear_column_cache(tables)
         return success
+    
+    def get_applied_migrations(self):
+        """
+        Get the migrations recorded in schema_migrations.
+        
+        Returns:
+            dict: Version to checksum, or None if the query failed
+        """
+        cursor = self.db.execute_query("SELECT to_regclass(%s) IS NOT NULL", (MIGRATIONS_TABLE,))
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        if not cursor.fetchone()[0]:
+            self.db.connection.rollback()
+            return {}
+        
+        cursor = self.db.execute_query(f"SELECT version, checksum FROM {MIGRATIONS_TABLE}")
+        if cursor is None:
+            self.db.connection.rollback()
+            return None
+        applied = dict(cursor.fetchall())
+        self.db.connection.rollback()
+        return applied
+    
+    def get_pending_migrations(self, migrations_dir):
+        """
+        Compare the migration files with schema_migrations.
+        
+        Args:
+            migrations_dir (str): Directory containing the migration files
+            
+        Returns:
+            list: Migrations not applied yet, in version order, or None if an
+                  applied migration file was modified or the check failed
+        """
+        migrations = load_migrations(migrations_dir)
+        applied = self.get_applied_migrations()
+        if applied is None:
+            return None
+        
+        pending = []
+        for migration in migrations:
+            checksum = applied.get(migration["version"])
+            if checksum is None:
+                pending.append(migration)
+            elif checksum != migration["checksum"]:
+                print(f"Migration {migration['version']}_{migration['name']} was modified after "
+                      f"being applied (checksum mismatch); add a new migration instead")
+                return None
+        return pending
+    
+    def migrate(self, migrations_dir, lock_timeout="2s", retries=5):
+        """
+        Apply the pending migrations of a directory in version order.
+        
+        Each migration runs in its own transaction together with its
+        schema_migrations record, so it is applied completely or not at all.
+        Migrations that cannot run in a transaction (CREATE INDEX CONCURRENTLY,
+        or a first line of "-- migrate:no-transaction") run statement by
+        statement and are recorded after the last one succeeds; they must be
+        idempotent (IF NOT EXISTS) so a failed run can be repeated.
+        
+        A migration with a "-- migrate:requires <table> ..." line only changes
+        tables that predate it. When one of them does not exist the migration is
+        recorded without running, since tables are created in their current form.
+        
+        When every migration is already applied this costs one catalog check
+        and one small query. A session advisory lock stops two installers
+        from migrating the same database at once.
+        
+        Args:
+            migrations_dir (str): Directory containing the migration files
+            lock_timeout (str, optional): Maximum time each statement waits for locks
+            retries (int, optional): Attempts for a migration blocked by locks
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            pending = self.get_pending_migrations(migrations_dir)
+        except ValueError as e:
+            print(f"Error reading migrations: {e}")
+            return False
+        if pending is None:
+            return False
+        if not pending:
+            print("Schema is at the latest migration")
+            return True
+        
+        if not self.ensure_migrations_table():
+            return False
+        
+        cursor = self.db.execute_query("SELECT pg_try_advisory_lock(hashtext(%s))", (MIGRATIONS_TABLE,))
+        if cursor is None or not cursor.fetchone()[0]:
+            self.db.connection.rollback()
+            print("Another session is applying migrations to this database")
+            return False
+        self.db.commit()
+        
+        try:
+            # Re-read under the lock in case another installer just finished
+            pending = self.get_pending_migrations(migrations_dir)
+            if pending is None:
+                return False
+            
+            for migration in pending:
+                label = f"{migration['version']}_{migration['name']}"
+                missing = self.get_missing_tables(migration["requires"])
+                if missing is None:
+                    return False
+                if missing:
+                    print(f"Recording migration {label} without running it "
+                          f"(missing tables: {', '.join(missing)})")
+                    if self.db.execute_query(self.get_record_query(migration)) is None:
+                        self.db.connection.rollback()
+                        return False
+                    self.db.commit()
+                    continue
+                print(f"Applying migration {label}...")
+                started = time.perf_counter()
+                if migration["transactional"]:
+                    success = self.apply_migration(migration, lock_timeout, retries)
+                else:
+                    success = self.apply_migration_concurrently(migration, lock_timeout)
+                # Any table may have changed; codecs read the new columns on next use
+                clear_column_cache()
+                if not success:
+                    print(f"Migration {label} failed")
+                    return False
+                print(f"Migration {label} applied in {time.perf_counter() - started:.2f}s")
+            return True
+        finally:
+            self.db.execute_query("SELECT pg_advisory_unlock(hashtext(%s))", (MIGRATIONS_TABLE,))
+            self.db.commit()
+    
+    def get_missing_tables(self, tables):
+        """
+        Get the tables of a list that do not exist.
+        
+        Args:
+            tables (list): Table names
+            
+        Returns:
+            list: Missing table names, or None if the check failed
+        """
+        if not tables:
+            return []
+        cursor = self.db.execute_query(
+            "SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NULL", (list(tables),)
+        )
+        if cursor is None:
+            return None
+        missing = [row[0] for row in cursor.fetchall()]
+        self.db.commit()
+        return missing
+    
+    def ensure_migrations_table(self):
+        """
+        Create the schema_migrations table if it does not exist.
+        
+        Returns:
+            bool: Success status
+        """
+        query = f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            transactional BOOLEAN NOT NULL,
+            execution_ms INTEGER,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        );
+        """
+        return self.db.execute_ddl(query, tables=[MIGRATIONS_TABLE])
+    
+    def get_record_query(self, migration, execution_ms=None):
+        """
+        Build the statement recording a migration as applied.
+        
+        Args:
+            migration (dict): Migration from load_migrations
+            execution_ms (int or Composable, optional): Time the migration
+                                                        took, or an SQL
+                                                        expression computing it
+            
+        Returns:
+            Composable: INSERT statement with the values inlined
+        """
+        sql = self.db.backend.sql
+        if not isinstance(execution_ms, sql.Composable):
+            execution_ms = sql.Literal(execution_ms)
+        return sql.SQL(
+            "INSERT INTO {table} (version, name, checksum, transactional, execution_ms) "
+            "VALUES ({version}, {name}, {checksum}, {transactional}, {execution_ms})"
+        ).format(
+            table=sql.Identifier(MIGRATIONS_TABLE),
+            version=sql.Literal(migration["version"]),
+            name=sql.Literal(migration["name"]),
+            checksum=sql.Literal(migration["checksum"]),
+            transactional=sql.Literal(migration["transactional"]),
+            execution_ms=execution_ms,
+        )
+    
+    def apply_migration(self, migration, lock_timeout="2s", retries=5):
+        """
+        Apply a migration and record it in a single transaction.
+        
+        Only lock waits are bounded: a long ALTER or backfill runs to the end
+        instead of being cancelled and retried by a statement_timeout.
+        
+        Args:
+            migration (dict): Migration from load_migrations
+            lock_timeout (str, optional): Maximum time to wait for locks
+            retries (int, optional): Attempts when blocked by locks
+            
+        Returns:
+            bool: Success status
+        """
+        # Separate statements of one transaction, so the schema change and its
+        # record commit together whatever the migration file ends with; now()
+        # is the start of that transaction, so the record times the migration
+        elapsed_ms = self.db.backend.sql.SQL(
+            "(extract(epoch FROM clock_timestamp() - now()) * 1000)::integer"
+        )
+        return self.db.execute_ddl([migration["sql"], self.get_record_query(migration, elapsed_ms)],
+                                   lock_timeout=lock_timeout, statement_timeout="0", retries=retries)
+    
+    def apply_migration_concurrently(self, migration, lock_timeout="2s"):
+        """
+        Apply a migration outside a transaction, one statement at a time.
+        
+        Args:
+            migration (dict): Migration from load_migrations
+            lock_timeout (str, optional): Maximum time each statement waits for locks
+            
+        Returns:
+            bool: Success status
+        """
+        started = time.perf_counter()
+        if not self.db.execute_concurrently(split_statements(migration["sql"]), lock_timeout):
+            return False
+        
+        execution_ms = int((time.perf_counter() - started) * 1000)
+        if self.db.execute_query(self.get_record_query(migration, execution_ms)) is None:
+            self.db.connection.rollback()
+            return False
+        self.db.commit()
+        return True
@@ -0,0 +1,399 @@
+"""
+Schema diff between the tables declared by the table classes and the tables
+that exist in the database.
+
+The declared schema is parsed from each class's CREATE TABLE query and the
+actual schema is read from pg_catalog in a single query, so the installer only
+sends DDL for tables that are missing or incomplete and reports any drift.
+"""
+import re
+
+from .registry import get_table_class
+from .indexes import create_indexes
+from .id_blocks import ensure_id_sequence, get_sequence_name
+from .row_codecs import clear_column_cache
+
+
+# Declared type spellings -> format_type() spelling
+TYPE_ALIASES = {
+    "int": "integer",
+    "int4": "integer",
+    "integer": "integer",
+    "serial": "integer",
+    "bigint": "bigint",
+    "int8": "bigint",
+    "bigserial": "bigint",
+    "smallint": "smallint",
+    "text": "text",
+    "varchar": "character varying",
+    "character varying": "character varying",
+    "char": "character",
+    "character": "character",
+    "numeric": "numeric",
+    "decimal": "numeric",
+    "date": "date",
+    "timestamp": "timestamp without time zone",
+    "timestamp without time zone": "timestamp without time zone",
+    "timestamp with time zone": "timestamp with time zone",
+    "timestamptz": "timestamp with time zone",
+    "boolean": "boolean",
+    "bool": "boolean",
+}
+
+CONSTRAINT_KEYWORDS = ("PRIMARY", "NOT", "NULL", "DEFAULT", "REFERENCES",
+                       "UNIQUE", "CHECK", "CONSTRAINT", "GENERATED", "COLLATE")
+
+# DEFAULT expression, up to the next column constraint
+DEFAULT_EXPRESSION = re.compile(
+    r"\bDEFAULT\s+(.+?)\s*(?=\b(?:NOT|NULL|PRIMARY|REFERENCES|UNIQUE|CHECK|CONSTRAINT|GENERATED|COLLATE)\b|$)",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def _split_top_level(text):
+    """Split a column list on commas that are not inside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def normalize_type(declared_type):
+    """
+    Convert a declared column type to the spelling used by format_type().
+
+    Args:
+        declared_type (str): e.g. "VARCHAR(20)", "INT", "NUMERIC(5,2)"
+
+    Returns:
+        str: e.g. "character varying(20)", "integer", "numeric(5,2)"
+    """
+    match = re.match(r"^\s*([a-zA-Z ]+?)\s*(\([^)]*\))?\s*$", declared_type)
+    if not match:
+        return declared_type.strip().lower()
+    base = " ".join(match.group(1).lower().split())
+    modifier = (match.group(2) or "").replace(" ", "")
+    return TYPE_ALIASES.get(base, base) + modifier
+
+
+def parse_create_query(query):
+    """
+    Parse the columns of a CREATE TABLE query.
+
+    Args:
+        query (str): CREATE TABLE statement
+
+    Returns:
+        tuple: (table_name, columns) where columns maps column name to a
+               dictionary with 'type', 'not_null', 'primary_key' and 'default'
+               (expression or None) keys
+    """
+    match = re.search(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*?)\)"
+                      r"\s*(?:PARTITION\s+BY\s+.*?)?;?\s*$",
+                      query, re.IGNORECASE | re.DOTALL)
+    if not match:
+        return None, {}
+
+    table_name = match.group(1).lower()
+    columns = {}
+    primary_key = []
+    for definition in _split_top_level(match.group(2)):
+        upper = definition.upper()
+        table_pk = re.match(r"(?:CONSTRAINT\s+\w+\s+)?PRIMARY\s+KEY\s*\(([^)]*)\)", definition, re.IGNORECASE)
+        if table_pk:
+            primary_key.extend(col.strip().lower() for col in table_pk.group(1).split(","))
+            continue
+        if upper.startswith(("CONSTRAINT", "UNIQUE", "CHECK", "FOREIGN", "EXCLUDE")):
+            continue
+
+        tokens = definition.split()
+        name = tokens[0].strip('"').lower()
+        type_tokens = []
+        for token in tokens[1:]:
+            if token.upper() in CONSTRAINT_KEYWORDS:
+                break
+            type_tokens.append(token)
+        declared_type = " ".join(type_tokens)
+        is_pk = "PRIMARY KEY" in upper
+        default = DEFAULT_EXPRESSION.search(definition)
+        columns[name] = {
+            "type": normalize_type(declared_type),
+            "not_null": is_pk or "NOT NULL" in upper or declared_type.upper() in ("SERIAL", "BIGSERIAL"),
+            "primary_key": is_pk,
+            "default": default.group(1) if default else None,
+        }
+
+    for name in primary_key:
+        if name in columns:
+            columns[name]["primary_key"] = True
+            columns[name]["not_null"] = True
+
+    return table_name, columns
+
+
+def get_declared_schema(table_names):
+    """
+    Get the declared columns of registered tables.
+
+    Args:
+        table_names (list): Registered table names
+
+    Returns:
+        dict: Table name to columns (see parse_create_query)
+    """
+    declared = {}
+    for table_name in table_names:
+        table = get_table_class(table_name)(None)
+        _, columns = parse_create_query(table.get_create_query())
+        declared[table_name] = columns
+    return declared
+
+
+def fetch_actual_schema(db_connection, table_names, sequences=()):
+    """
+    Read the columns, indexes and partition keys of the given tables, and
+    which of the given sequences exist, in one catalog query.
+
+    A transaction the caller has open is left alone.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Table names
+        sequences (list, optional): Sequence names
+
+    Returns:
+        tuple: (columns, indexes, partition_keys, sequences) where columns
+               maps each existing table to its columns, indexes maps a table
+               to {index name: valid}, partition_keys maps a partitioned table
+               to its key column and sequences is the set of existing
+               sequences; None on failure
+    """
+    query = """
+    WITH tables AS (
+        SELECT c.oid, c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = ANY(%s)
+          AND c.relkind IN ('r', 'p')
+          AND n.nspname = current_schema()
+    )
+    SELECT 'column', t.relname, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+           COALESCE(a.attnum = ANY(i.indkey::int2[]), false), a.attnum
+    FROM tables t
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_index i ON i.indrelid = t.oid AND i.indisprimary
+    UNION ALL
+    SELECT 'index', t.relname, ic.relname, NULL, x.indisvalid, NULL, NULL
+    FROM tables t
+    JOIN pg_index x ON x.indrelid = t.oid
+    JOIN pg_class ic ON ic.oid = x.indexrelid
+    UNION ALL
+    SELECT 'partition', t.relname, a.attname, NULL, NULL, NULL, NULL
+    FROM tables t
+    JOIN pg_partitioned_table p ON p.partrelid = t.oid
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = p.partattrs[0]
+    UNION ALL
+    SELECT 'sequence', NULL, s.relname, NULL, NULL, NULL, NULL
+    FROM pg_class s
+    JOIN pg_namespace n ON n.oid = s.relnamespace
+    WHERE s.relname = ANY(%s)
+      AND s.relkind = 'S'
+      AND n.nspname = current_schema()
+    ORDER BY 1, 2, 7
+    """
+    in_transaction = db_connection.in_transaction()
+    cursor = db_connection.execute_query(query, (list(table_names), list(sequences)))
+    if cursor is None:
+        db_connection.end_read(in_transaction)
+        return None
+
+    actual, indexes, partition_keys, existing_sequences = {}, {}, {}, set()
+    for kind, table_name, name, column_type, flag, primary_key, _ in cursor.fetchall():
+        if kind == "column":
+            actual.setdefault(table_name, {})[name] = {
+                "type": column_type,
+                "not_null": flag,
+                "primary_key": primary_key,
+            }
+        elif kind == "index":
+            indexes.setdefault(table_name, {})[name] = flag
+        elif kind == "partition":
+            partition_keys[table_name] = name
+        else:
+            existing_sequences.add(name)
+    db_connection.end_read(in_transaction)
+    return actual, indexes, partition_keys, existing_sequences
+
+
+def diff_table(table_name, declared, actual, declared_indexes=(), actual_indexes=None,
+               declared_partition=None, actual_partition=None, id_blocks=None, has_sequence=True):
+    """
+    Compare the declared and actual columns, indexes and id block sequence of
+    one table.
+
+    Args:
+        table_name (str): Table name
+        declared (dict): Declared columns
+        actual (dict): Actual columns, or None if the table does not exist
+        declared_indexes (tuple, optional): Declared (name, definition) indexes
+        actual_indexes (dict, optional): Existing index name to valid flag
+        declared_partition (str, optional): Declared partition key column
+        actual_partition (str, optional): Actual partition key column
+        id_blocks (tuple, optional): Declared (column, block size) of the
+                                     table's id block sequence
+        has_sequence (bool, optional): Whether that sequence exists
+
+    Returns:
+        dict: 'status' ("missing", "ok" or "drift"), 'differences' (list of str),
+              'ddl' (statements that bring the table up to date), 'indexes'
+              (declared indexes that are missing or invalid) and 'id_blocks'
+              (id_blocks when its sequence is missing, else None)
+    """
+    if actual is None:
+        return {"status": "missing", "differences": [], "ddl": [], "indexes": [], "id_blocks": None}
+
+    differences = []
+    ddl = []
+    for column, spec in declared.items():
+        current = actual.get(column)
+        if current is None:
+            differences.append(f"column {column} is missing")
+            # Added as nullable so existing rows do not block it, unless a default
+            # fills them; a non-volatile default is stored once, without a rewrite
+            definition = f"{column} {spec['type']}"
+            if spec.get("default"):
+                definition += f" DEFAULT {spec['default']}"
+                if spec["not_null"]:
+                    definition += " NOT NULL"
+            ddl.append(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {definition}")
+            continue
+        if current["type"] != spec["type"]:
+            differences.append(f"column {column} is {current['type']}, declared {spec['type']}")
+        if current["not_null"] != spec["not_null"]:
+            state = "NOT NULL" if current["not_null"] else "nullable"
+            wanted = "NOT NULL" if spec["not_null"] else "nullable"
+            differences.append(f"column {column} is {state}, declared {wanted}")
+        if current["primary_key"] != spec["primary_key"]:
+            state = "in" if current["primary_key"] else "not in"
+            wanted = "in" if spec["primary_key"] else "not in"
+            differences.append(f"column {column} is {state} the primary key, declared {wanted} it")
+    for column in actual:
+        if column not in declared:
+            differences.append(f"column {column} exists but is not declared")
+    if declared_partition != actual_partition:
+        state = f"partitioned by {actual_partition}" if actual_partition else "not partitioned"
+        wanted = f"partitioned by {declared_partition}" if declared_partition else "not partitioned"
+        # Converting holds the data in place, so it is left to a planned migration
+        differences.append(f"table is {state}, declared {wanted}")
+
+    actual_indexes = actual_indexes or {}
+    indexes = [index for index in declared_indexes if not actual_indexes.get(index[0])]
+
+    return {"status": "drift" if differences else "ok", "differences": differences, "ddl": ddl,
+            "indexes": indexes, "id_blocks": None if has_sequence else id_blocks}
+
+
+def plan_schema(db_connection, table_names):
+    """
+    Compute the schema diff of the given tables with one catalog query.
+
+    The diff covers everything apply_schema_plan checks, so an install with
+    nothing to change costs this one round trip.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Registered table names
+
+    Returns:
+        dict: Table name to diff (see diff_table), or None if the catalog
+              could not be read
+    """
+    id_blocks = {}
+    for table_name in table_names:
+        declared_blocks = getattr(get_table_class(table_name), "id_blocks", None)
+        if declared_blocks:
+            id_blocks[table_name] = declared_blocks
+    sequences = {table_name: get_sequence_name(table_name, blocks[0]) for table_name, blocks in id_blocks.items()}
+
+    catalog = fetch_actual_schema(db_connection, table_names, list(sequences.values()))
+    if catalog is None:
+        return None
+    actual, actual_indexes, partition_keys, existing_sequences = catalog
+
+    declared = get_declared_schema(table_names)
+    plan = {}
+    for table_name in table_names:
+        table = get_table_class(table_name)
+        plan[table_name] = diff_table(table_name, declared[table_name], actual.get(table_name),
+                                      getattr(table, "indexes", ()), actual_indexes.get(table_name),
+                                      getattr(table, "partition_key", None), partition_keys.get(table_name),
+                                      id_blocks.get(table_name), sequences.get(table_name) in existing_sequences)
+    return plan
+
+
+def print_schema_report(plan):
+    """
+    Print which tables will be created and any drift found.
+
+    Args:
+        plan (dict): Result of plan_schema
+    """
+    missing = [name for name, diff in plan.items() if diff["status"] == "missing"]
+    current = [name for name, diff in plan.items() if diff["status"] == "ok"]
+    drifted = [name for name, diff in plan.items() if diff["status"] == "drift"]
+
+    print(f"\nSchema check: {len(missing)} to create, {len(current)} up to date, {len(drifted)} with drift")
+    if missing:
+        print(f"  To create: {', '.join(missing)}")
+    for name in drifted:
+        print(f"  Drift in {name}:")
+        for difference in plan[name]["differences"]:
+            print(f"    - {difference}")
+    indexes = [f"{name}.{index[0]}" for name, diff in plan.items() for index in diff["indexes"]]
+    if indexes:
+        print(f"  Indexes to build concurrently: {', '.join(indexes)}")
+    sequences = [name for name, diff in plan.items() if diff.get("id_blocks")]
+    if sequences:
+        print(f"  Id block sequences to create: {', '.join(sequences)}")
+
+
+def apply_schema_plan(db_connection, table, diff):
+    """
+    Run only the DDL a table needs according to its diff.
+
+    Missing indexes of existing tables are built concurrently, and a
+    declared id block sequence the diff found missing is created. A table
+    the diff found up to date gets no query at all.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table: Handler instance
+        diff (dict): Diff of the table, or None to create unconditionally
+
+    Returns:
+        bool: Success status
+    """
+    if diff is None or diff["status"] == "missing":
+        clear_column_cache([table.table_name])
+        return table.create_table()
+
+    for statement in diff["ddl"]:
+        print(f"Updating {table.table_name}: {statement}")
+        success = db_connection.execute_ddl(statement, tables=[table.table_name])
+        # Row codecs must not keep encoding against the old column layout
+        clear_column_cache([table.table_name])
+        if not success:
+            return False
+    if not create_indexes(db_connection, table.table_name, diff["indexes"], concurrently=True):
+        return False
+    id_blocks = diff.get("id_blocks")
+    return not id_blocks or ensure_id_sequence(db_connection, table.table_name, *id_blocks)
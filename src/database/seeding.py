@@ -0,0 +1,249 @@
+"""
+Idempotent seed data loading.
+
+Seeded tables declare a natural key. Seed rows are upserted on that key and a
+hash of the seed dataset is stored in the seed_manifest table, so rerunning an
+install with unchanged seed data costs one lookup and leaves the table as it is.
+
+The manifest also records the table's relfilenode, which changes when the
+table is dropped and recreated or truncated, so such tables are seeded again.
+"""
+import re
+import json
+import hashlib
+
+
+MANIFEST_TABLE = "seed_manifest"
+
+
+def hash_seed(table_name, natural_key, rows):
+    """
+    Hash a seed dataset.
+
+    Args:
+        table_name (str): Table name
+        natural_key (tuple): Key columns
+        rows (list): Seed row tuples
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([table_name, list(natural_key), [list(row) for row in rows]],
+                         default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_seed_hash(db_connection, table_name):
+    """
+    Get the hash of the last dataset seeded into a table.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+
+    Returns:
+        str: Stored hash, or None if the table was never seeded or has been
+             recreated or truncated since
+    """
+    cursor = db_connection.execute_query("SELECT to_regclass(%s) IS NOT NULL", (MANIFEST_TABLE,))
+    if cursor is None or not cursor.fetchone()[0]:
+        db_connection.connection.rollback()
+        return None
+
+    cursor = db_connection.execute_query(
+        f"""
+        SELECT seed_hash FROM {MANIFEST_TABLE}
+        WHERE table_name = %s AND table_filenode = pg_relation_filenode(to_regclass(%s))
+        """,
+        (table_name, table_name)
+    )
+    row = cursor.fetchone() if cursor is not None else None
+    db_connection.connection.rollback()
+    return row[0] if row else None
+
+
+def ensure_manifest(db_connection):
+    """
+    Create the seed manifest table if it does not exist.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+
+    Returns:
+        bool: Success status
+    """
+    query = f"""
+    CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+        table_name VARCHAR(63) PRIMARY KEY,
+        seed_hash CHAR(64) NOT NULL,
+        table_filenode OID NOT NULL,
+        row_count INTEGER NOT NULL,
+        seeded_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+    """
+    return db_connection.execute_ddl(query, tables=[MANIFEST_TABLE])
+
+
+def ensure_natural_key(db_connection, table_name, natural_key):
+    """
+    Make sure a table has a unique index on its natural key.
+
+    Tables created before the key was declared are migrated once: duplicate
+    rows are removed, keeping one row per key, and the key is added as the
+    primary key. Rows with a NULL key column would make the primary key fail
+    and cannot be told apart, so they are reported and the table is left
+    untouched until they are fixed by hand.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        natural_key (tuple): Key columns
+
+    Returns:
+        bool: Success status
+    """
+    query = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s)
+          AND i.indisunique
+          AND i.indpred IS NULL
+          AND ARRAY(SELECT a.attname::text FROM pg_attribute a
+                    WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                    ORDER BY 1)
+              = ARRAY(SELECT unnest(%s::text[]) ORDER BY 1)
+    )
+    """
+    cursor = db_connection.execute_query(query, (table_name, list(natural_key)))
+    if cursor is None:
+        db_connection.connection.rollback()
+        return False
+    has_key = cursor.fetchone()[0]
+    db_connection.connection.rollback()
+    if has_key:
+        return True
+
+    null_key = " OR ".join(f"{column} IS NULL" for column in natural_key)
+    cursor = db_connection.execute_query(f"SELECT count(*) FROM {table_name} WHERE {null_key}")
+    if cursor is None:
+        db_connection.connection.rollback()
+        return False
+    null_rows = cursor.fetchone()[0]
+    db_connection.connection.rollback()
+    if null_rows:
+        print(f"Cannot add natural key ({', '.join(natural_key)}) to '{table_name}': "
+              f"{null_rows} rows have a NULL key column (WHERE {null_key}); fix or delete them first")
+        return False
+
+    print(f"Adding natural key ({', '.join(natural_key)}) to '{table_name}', removing duplicate rows...")
+    same_key = " AND ".join(f"a.{column} = b.{column}" for column in natural_key)
+    migration = f"""
+    DELETE FROM {table_name} a USING {table_name} b
+    WHERE a.ctid > b.ctid AND {same_key};
+    ALTER TABLE {table_name} ADD PRIMARY KEY ({', '.join(natural_key)});
+    """
+    return db_connection.execute_ddl(migration, tables=[table_name])
+
+
+def parse_insert_query(insert_query):
+    """
+    Split an "INSERT INTO table (columns) VALUES (...)" query.
+
+    Args:
+        insert_query (str): Insert query
+
+    Returns:
+        tuple: (table_name, columns, values) where values is the VALUES list text
+    """
+    match = re.search(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*\(([^)]*)\)",
+                      insert_query, re.IGNORECASE)
+    columns = [column.strip() for column in match.group(2).split(",")]
+    return match.group(1), columns, match.group(3).strip()
+
+
+def build_upsert_query(insert_query, natural_key):
+    """
+    Turn a plain INSERT ... VALUES query into an upsert on the natural key.
+
+    Rows whose values did not change are not rewritten.
+
+    Args:
+        insert_query (str): "INSERT INTO table (columns) VALUES (...)" query
+        natural_key (tuple): Key columns
+
+    Returns:
+        str: Upsert query
+    """
+    table_name, columns, values = parse_insert_query(insert_query)
+    query = (f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({values}) "
+             f"ON CONFLICT ({', '.join(natural_key)}) ")
+    updated = [column for column in columns if column not in natural_key]
+    if not updated:
+        return query + "DO NOTHING"
+
+    current = ", ".join(f"{table_name}.{column}" for column in updated)
+    excluded = ", ".join(f"EXCLUDED.{column}" for column in updated)
+    return (query + "DO UPDATE SET "
+            + ", ".join(f"{column} = EXCLUDED.{column}" for column in updated)
+            + f" WHERE ({current}) IS DISTINCT FROM ({excluded})")
+
+
+def seed_table(db_connection, table_name, insert_query, natural_key, rows):
+    """
+    Load seed rows into a table idempotently.
+
+    Does nothing when the manifest already holds the hash of the same rows.
+    Otherwise the rows are upserted on the natural key and the manifest is
+    updated in the same transaction.
+
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table_name (str): Table name
+        insert_query (str): The table's INSERT ... VALUES query
+        natural_key (tuple): Key columns
+        rows (list): Seed row tuples, in insert query column order
+
+    Returns:
+        bool: Success status
+    """
+    if not rows:
+        print("No data provided for insertion")
+        return False
+
+    seed_hash = hash_seed(table_name, natural_key, rows)
+    if get_seed_hash(db_connection, table_name) == seed_hash:
+        print(f"Seed data for '{table_name}' is unchanged, skipping")
+        return True
+
+    if not ensure_manifest(db_connection) or not ensure_natural_key(db_connection, table_name, natural_key):
+        print(f"Failed to prepare '{table_name}' for seeding")
+        return False
+
+    # One row per key (last wins), so a batch never updates the same row twice
+    query = build_upsert_query(insert_query, natural_key)
+    columns = parse_insert_query(insert_query)[1]
+    key_positions = [columns.index(column) for column in natural_key]
+    unique_rows = list({tuple(row[i] for i in key_positions): row for row in rows}.values())
+
+    if db_connection.execute_batch(query, unique_rows) is None:
+        print(f"Failed to insert data into table '{table_name}'")
+        return False
+
+    cursor = db_connection.execute_query(
+        f"""
+        INSERT INTO {MANIFEST_TABLE} (table_name, seed_hash, table_filenode, row_count, seeded_at)
+        VALUES (%s, %s, pg_relation_filenode(to_regclass(%s)), %s, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET seed_hash = EXCLUDED.seed_hash, table_filenode = EXCLUDED.table_filenode,
+            row_count = EXCLUDED.row_count, seeded_at = now()
+        """,
+        (table_name, seed_hash, table_name, len(unique_rows))
+    )
+    if cursor is None:
+        db_connection.connection.rollback()
+        return False
+
+    db_connection.commit()
+    print(f"Seeded {len(unique_rows)} rows into table '{table_name}'")
+    return True
@@ -0,0 +1,74 @@
+"""
+Session profiles for database connections.
+Each profile tunes the session settings for one kind of workload.
+"""
+
+
+# Settings applied to a session for each workload
+SESSION_PROFILES = {
+    # Installer table creation, CSV imports and default data seeding
+    "bulk_load": {
+        "work_mem": "64MB",
+        "maintenance_work_mem": "512MB",
+        "synchronous_commit": "off",
+        "statement_timeout": "0",
+        "jit": "off",
+        "application_name": "db_installer_bulk_load",
+    },
+    # Sync worker: many small inserts and lookups
+    "oltp_sync": {
+        "work_mem": "4MB",
+        "maintenance_work_mem": "64MB",
+        "synchronous_commit": "on",
+        "statement_timeout": "30s",
+        "jit": "off",
+        "application_name": "db_installer_oltp_sync",
+    },
+    # Exports and reconciliations: few large read queries
+    "reporting": {
+        "work_mem": "128MB",
+        "maintenance_work_mem": "64MB",
+        "synchronous_commit": "on",
+        "statement_timeout": "15min",
+        "jit": "on",
+        "application_name": "db_installer_reporting",
+    },
+}
+
+
+def get_profile_settings(profile, overrides=None):
+    """
+    Get the session settings of a profile.
+    
+    Args:
+        profile (str): Profile name (see SESSION_PROFILES)
+        overrides (dict, optional): Settings replacing the profile values
+        
+    Returns:
+        dict: Setting name to value, or None if the profile is unknown
+    """
+    if profile not in SESSION_PROFILES:
+        print(f"Unknown session profile '{profile}'. Available: {', '.join(SESSION_PROFILES)}")
+        return None
+    
+    settings = dict(SESSION_PROFILES[profile])
+    if overrides:
+        settings.update(overrides)
+    return settings
+
+
+def build_options(settings):
+    """
+    Build a libpq 'options' string so settings are applied at connection time.
+    
+    Args:
+        settings (dict): Setting name to value
+        
+    Returns:
+        str: Options string such as "-c work_mem=64MB -c jit=off"
+    """
+    options = []
+    for name, value in settings.items():
+        value = str(value).replace("\\", "\\\\").replace(" ", "\\ ")
+        options.append(f"-c {name}={value}")
+    return " ".join(options)
@@ -3,6 +3,10 @@ Simplified blueprint table class for easy replication.
 This version is for tables that don't need CSV import functionality.
 Copy this file for each new table and replace the CREATE and INSERT queries.
 """
+from .seeding import seed_table
+from .indexes import create_indexes
+from .partitioning import create_partitions
+from .id_blocks import ensure_id_sequence, get_allocator
 
 
 class TableSimpleBlueprint:
@@ -11,6 +15,23 @@ class TableSimpleBlueprint:
     Copy this class for each new table and replace the queries.
     """
     
+    # Columns identifying a seed row; seed_data upserts on them
+    natural_key = ()
+    # Secondary indexes as (name, definition) pairs (see indexes.py)
+    indexes = ()
+    # Column the table is range partitioned on by month, and the full months
+    # of partitions kept (see partitioning.py)
+    partition_key = None
+    retention_months = None
+    # Date column and unique, indexed key of archivable rows (see archival.py)
+    archive_column = None
+    archive_key = ()
+    # Load the table into shared buffers after installs (see post_load.py)
+    prewarm = False
+    # (column, block size) of an application-assigned id handed out in
+    # blocks by allocate_ids (see id_blocks.py)
+    id_blocks = None
+    
     def __init__(self, db_connection, table_name):
         """
         Initialize the table handler.
@@ -63,6 +84,10 @@ class TableSimpleBlueprint:
         if not query:
             print(f"No creation query defined for table '{self.table_name}'")
             return False
+        
+        # An existing table may hold data, so its missing indexes are built concurrently
+        cursor = self.db.execute_query("SELECT to_regclass(%s) IS NOT NULL", (self.table_name,))
+        existed = cursor is not None and cursor.fetchone()[0]
             
         cursor = self.db.execute_query(query)
         self.db.commit()
@@ -70,11 +95,31 @@ class TableSimpleBlueprint:
         
         if success:
             print(f"Table '{self.table_name}' created successfully")
+            if self.partition_key:
+                success = create_partitions(self.db, self.table_name)
+            success = success and create_indexes(self.db, self.table_name, self.indexes, concurrently=existed)
+            if self.id_blocks:
+                success = success and ensure_id_sequence(self.db, self.table_name, *self.id_blocks)
         else:
             print(f"Failed to create table '{self.table_name}'")
             
         return success
     
+    def allocate_ids(self, n=1):
+        """
+        Get ids for new rows from blocks reserved on the table's block sequence.
+        
+        Args:
+            n (int, optional): Number of ids
+            
+        Returns:
+            list: Ascending ids, or None on failure
+        """
+        if not self.id_blocks:
+            print(f"Table '{self.table_name}' does not declare id_blocks")
+            return None
+        return get_allocator(self.db, self.table_name, self.id_blocks[0]).take(self.db, n)
+    
     def insert_data(self, data_list):
         """
         Insert data into the table.
@@ -105,6 +150,24 @@ class TableSimpleBlueprint:
             print(f"Error inserting data into {self.table_name}: {e}")
             return False
     
+    def seed_data(self, data_list):
+        """
+        Insert seed data idempotently.
+        
+        Rows are upserted on the table's natural key and reruns with the same
+        data are skipped (see seeding.py). Tables without a natural key fall
+        back to insert_data.
+        
+        Args:
+            data_list (list): List of data tuples to insert
+            
+        Returns:
+            bool: Success status
+        """
+        if not self.natural_key:
+            return self.insert_data(data_list)
+        return seed_table(self.db, self.table_name, self.get_insert_query(), self.natural_key, data_list)
+    
     def setup(self, default_data=None):
         """
         Set up the table (create and populate if data provided).
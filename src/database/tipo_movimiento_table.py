@@ -7,6 +7,13 @@ from .table_simple_blueprint import TableSimpleBlueprint
 class TipoMovimientoTable(TableSimpleBlueprint):
     """Handler for the 'tipo_movimiento' table."""
     
+    # Registry metadata (see registry.py)
+    table_name = "tipo_movimiento"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+    
     def __init__(self, db_connection):
         """Initialize the tipo_movimiento table handler."""
         super().__init__(db_connection, "tipo_movimiento")
@@ -52,7 +59,7 @@ class TipoMovimientoTable(TableSimpleBlueprint):
             ('Z', 'R', 'Regularización')
         ]
         
-        return self.insert_data(data)
+        return self.seed_data(data)
     
     def setup(self, use_default_data=True):
         """
@@ -2,11 +2,19 @@
 """Vendedores table module."""
 
 from src.database.connection import DatabaseConnection
+from src.database.seeding import seed_table
 
 
 class VendedoresTable:
     """Vendedores table class."""
 
+    # Registry metadata (see registry.py)
+    table_name = "vendedores"
+    dependencies = ()
+    data_source = "default"
+    load_strategy = "upsert"
+    natural_key = ("velneo",)
+
     def __init__(self, db_connection: DatabaseConnection):
         """Initialize the class with a database connection.
 
@@ -15,19 +23,27 @@ class VendedoresTable:
         """
         self.db_connection = db_connection
 
-    def create_table(self):
-        """Create the vendedores table.
+    def get_create_query(self):
+        """Get the SQL query to create the vendedores table.
 
         Returns:
-            bool: True if successful, False otherwise
+            str: SQL query
         """
-        query = """
+        return """
         CREATE TABLE IF NOT EXISTS vendedores (
-            velneo INTEGER NOT NULL,
+            velneo INTEGER NOT NULL PRIMARY KEY,
             pvsi_clave VARCHAR(10) NOT NULL,
             nombre VARCHAR(100) NOT NULL
         );
         """
+
+    def create_table(self):
+        """Create the vendedores table.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        query = self.get_create_query()
         cursor = self.db_connection.execute_query(query)
         if cursor is None:
             return False
@@ -42,14 +58,10 @@ class VendedoresTable:
         """
         query = """
         INSERT INTO vendedores (velneo, pvsi_clave, nombre)
-        VALUES (1, '1', 'Ejemplo')
-        ON CONFLICT DO NOTHING;
+        VALUES (%s, %s, %s)
         """
-        cursor = self.db_connection.execute_query(query)
-        if cursor is None:
-            return False
-        self.db_connection.commit()
-        return True
+        data = [(1, '1', 'Ejemplo')]
+        return seed_table(self.db_connection, self.table_name, query, self.natural_key, data)
 
     def setup(self):
         """Set up the vendedores table.
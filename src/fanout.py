@@ -0,0 +1,227 @@
+"""
+Concurrent provisioning of several store databases.
+
+Each target is provisioned on its own connection in a worker thread, so a
+slow or failing store never blocks or aborts the others. A single
+aggregated report is printed at the end.
+"""
+import json
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .database.backends import get_backend
+from .database.connection import DatabaseConnection
+
+
+# Seconds stopped targets get to wind down before fan_out stops waiting for them
+STOP_GRACE = 5.0
+
+
+def load_targets(dsns=None, profiles_path=None, driver=None):
+    """
+    Build the list of provisioning targets.
+    
+    Explicit DSNs take precedence. Otherwise every profile in the setup JSON
+    file that has a "dsn" key becomes a target provisioned with that profile.
+    
+    Args:
+        dsns (list, optional): Connection strings to provision
+        profiles_path (str, optional): Path to tables_setup_values.json
+        driver (str, optional): Database driver backend, which parses the DSNs
+        
+    Returns:
+        list: Target dictionaries with 'name', 'dsn' and 'profiles' keys
+    """
+    targets = []
+    if dsns:
+        backend = get_backend(driver)
+        for dsn in dsns:
+            params = backend.parse_dsn(dsn)
+            name = f"{params.get('host', 'localhost')}/{params.get('dbname', 'postgres')}"
+            targets.append({"name": name, "dsn": dsn, "profiles": None})
+        return targets
+    
+    if not profiles_path or not os.path.exists(profiles_path):
+        print(f"Profiles file not found: {profiles_path}")
+        return targets
+    
+    try:
+        with open(profiles_path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        return targets
+    
+    for profile in json_data.get("profiles", []):
+        if not profile.get("dsn"):
+            continue
+        name = profile.get("almacen") or f"{profile.get('plaza', '')}{profile.get('tienda', '')}"
+        targets.append({"name": name, "dsn": profile["dsn"], "profiles": [profile]})
+    
+    return targets
+
+
+def provision_target(target, provision, session_profile=None, registry=None, driver=None, stop=None):
+    """
+    Provision a single target on its own connection.
+    
+    The connection is registered before it connects, and the stop event is
+    checked after connecting and by provision between tables, so the time limit
+    can stop the target at any point.
+    
+    Args:
+        target (dict): Target dictionary from load_targets
+        provision (callable): Called as provision(db_connection, target, stop); returns
+                              a list of failed table names and should return early
+                              once the stop event (threading.Event) is set
+        session_profile (str, optional): Session profile for the connection
+        registry (dict, optional): Shared map of target name to connection, used
+                                   to close the target's connection on timeout
+        driver (str, optional): Database driver backend
+        stop (threading.Event, optional): Set when the target must stop
+        
+    Returns:
+        dict: Result with 'name', 'success', 'seconds', 'failures' and 'error' keys
+    """
+    started = time.perf_counter()
+    result = {"name": target["name"], "success": False, "seconds": 0.0,
+              "failures": [], "error": None}
+    
+    db_connection = DatabaseConnection.from_dsn(target["dsn"], profile=session_profile, driver=driver)
+    stop = stop or threading.Event()
+    if registry is not None:
+        registry[target["name"]] = db_connection
+    try:
+        if not db_connection.connect():
+            result["error"] = "connection failed"
+            return result
+        if stop.is_set():
+            result["error"] = "cancelled at time limit"
+            return result
+        
+        failures = provision(db_connection, target, stop) or []
+        result["failures"] = list(failures)
+        result["success"] = not failures and not stop.is_set()
+        if stop.is_set():
+            result["error"] = "cancelled at time limit"
+    except Exception as e:
+        result["error"] = "cancelled at time limit" if stop.is_set() else str(e)
+    finally:
+        if registry is not None:
+            registry.pop(target["name"], None)
+        db_connection.close()
+        result["seconds"] = time.perf_counter() - started
+    
+    return result
+
+
+def close_connection(db_connection):
+    """
+    Cancel the running statement of a connection used by another thread and
+    close it, so its worker fails fast wherever it is.
+    
+    Args:
+        db_connection (DatabaseConnection): Connection of a running target
+    """
+    connection = db_connection.connection
+    if connection is None:
+        return
+    for stop_call in (connection.cancel, connection.close):
+        try:
+            stop_call()
+        except Exception:
+            pass
+
+
+def fan_out(targets, provision, max_workers=8, timeout=None, session_profile=None, driver=None):
+    """
+    Provision many targets concurrently.
+    
+    When the time limit expires, targets not yet started are skipped and
+    running ones are stopped; fan_out returns at most STOP_GRACE seconds later
+    even if a worker is still stuck, e.g. in a connection attempt.
+    
+    Args:
+        targets (list): Targets from load_targets
+        provision (callable): Called as provision(db_connection, target, stop)
+        max_workers (int, optional): Maximum number of databases provisioned at once
+        timeout (float, optional): Overall time limit in seconds
+        session_profile (str, optional): Session profile for each connection
+        driver (str, optional): Database driver backend
+        
+    Returns:
+        list: Result dictionaries in target order
+    """
+    if not targets:
+        return []
+    
+    print(f"Provisioning {len(targets)} databases with up to {max_workers} in parallel...")
+    registry = {}
+    stops = [threading.Event() for _ in targets]
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [
+        executor.submit(provision_target, target, provision, session_profile, registry, driver, stop)
+        for target, stop in zip(targets, stops)
+    ]
+    _, not_done = wait(futures, timeout=timeout)
+    
+    if not_done:
+        print(f"Time limit reached, stopping {len(not_done)} unfinished targets...")
+        for future in not_done:
+            future.cancel()
+        # Stop flags first: a target still connecting checks its flag afterwards
+        for stop in stops:
+            stop.set()
+        for db_connection in list(registry.values()):
+            close_connection(db_connection)
+        wait(not_done, timeout=STOP_GRACE)
+    executor.shutdown(wait=not not_done)
+    
+    results = []
+    for target, future in zip(targets, futures):
+        if future.cancelled():
+            results.append({"name": target["name"], "success": False, "seconds": 0.0,
+                            "failures": [], "error": "not started before time limit"})
+        elif not future.done():
+            results.append({"name": target["name"], "success": False, "seconds": timeout or 0.0,
+                            "failures": [], "error": "abandoned at time limit"})
+        else:
+            result = future.result()
+            if future in not_done and result["error"] is None:
+                result["success"] = False
+                result["error"] = "cancelled at time limit"
+            results.append(result)
+    return results
+
+
+def print_report(results):
+    """
+    Print the aggregated provisioning report.
+    
+    Args:
+        results (list): Result dictionaries from fan_out
+        
+    Returns:
+        bool: True if every target succeeded
+    """
+    print("\n" + "=" * 70)
+    print("Provisioning report")
+    print("=" * 70)
+    for result in sorted(results, key=lambda r: (r["success"], -r["seconds"])):
+        status = "OK" if result["success"] else "FAILED"
+        detail = ""
+        if result["error"]:
+            detail = f" - {result['error']}"
+        elif result["failures"]:
+            detail = f" - tables with errors: {', '.join(result['failures'])}"
+        print(f"{status:<7} {result['name']:<30} {result['seconds']:>8.1f}s{detail}")
+    
+    succeeded = sum(1 for r in results if r["success"])
+    total_seconds = sum(r["seconds"] for r in results)
+    slowest = max((r["seconds"] for r in results), default=0.0)
+    print("-" * 70)
+    print(f"{succeeded}/{len(results)} databases provisioned successfully")
+    print(f"Slowest target: {slowest:.1f}s, cumulative time: {total_seconds:.1f}s")
+    return succeeded == len(results)
@@ -4,8 +4,14 @@ Helper module to fix imports when running as an executable
 import os
 import sys
 
-def fix_imports():
-    """Add necessary paths to sys.path for proper module resolution"""
+def fix_imports(verbose=None):
+    """
+    Add necessary paths to sys.path for proper module resolution.
+    
+    Args:
+        verbose (bool, optional): Print the resulting sys.path; defaults to
+                                  the DEBUG_IMPORTS environment variable
+    """
     # Get the directory of the executable or script
     if getattr(sys, 'frozen', False):
         # Running as a PyInstaller executable
@@ -24,6 +30,9 @@ def fix_imports():
         sys.path.insert(0, src_dir)
     
     # Print paths for debugging
-    print("Python path:")
-    for path in sys.path:
-        print(f"  {path}")
+    if verbose is None:
+        verbose = os.getenv('DEBUG_IMPORTS', 'false').lower() == 'true'
+    if verbose:
+        print("Python path:")
+        for path in sys.path:
+            print(f"  {path}")
@@ -9,8 +9,9 @@ pyinstaller --clean debug_script.spec
 """
 import os
 import sys
+import time
 import argparse
-from pathlib import Path
+from datetime import date, timedelta
 
 # Import the fix_imports helper
 try:
@@ -24,23 +25,25 @@ except ImportError:
         sys.path.append(src_dir)
     print(f"Added {src_dir} to sys.path")
 
-from database.db_connection import DatabaseConnection
-from config import CSV_DIRECTORY, ensure_csv_directory
-from database.tables import ArticulosTable, MetodoPagoTable
-from database.caja_banco_table import CajaBancoTable
-from database.clientes_table import ClientesTable
-from database.detalle_estado_table import DetalleEstadoTable
-from database.errores_table import ErroresTable
-from database.estado_factura_venta_table import EstadoFacturaVentaTable
-from database.tipo_movimiento_table import TipoMovimientoTable
-from database.reintentos_fac_venta_table import ReintentosFacturaVentaTable
-from database.recibo_venta_table import ReciboVentaTable
-from database.proveedor_table import ProveedorTable
-from database.pais_table import PaisTable
-from database.forma_pago_table import FormaPagoTable
-from database.forma_pago_caja_banco_table import FormaPagoCajaBancoTable
-from database.general_misc_table import GeneralMiscTable
-from database.iva_table import IvaTable
+# Table modules use package-relative imports, so they are imported through the src package
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+# --startup-profile reports the import cost of each module at exit
+from src.startup_profile import enable_if_requested
+enable_if_requested()
+
+from src.database.connection import DatabaseConnection
+from src.config import ensure_csv_directory
+from src.database.registry import (
+    get_table_class, get_enabled_tables, load_table_config, resolve_order, load_table_data
+)
+from src.database.schema_diff import plan_schema, print_schema_report, apply_schema_plan
+from src.database.install_plan import (
+    load_install_stats, save_install_stats, measure_table, record_table_load,
+    build_install_plan, print_install_plan
+)
 
 
 def parse_arguments():
@@ -57,384 +60,235 @@ def parse_arguments():
     parser.add_argument("--import-csv", action="store_true", help="Import data from CSV files")
     parser.add_argument("--articulos-csv", type=str, help="Path to articulos CSV file")
     parser.add_argument("--metodo-pago-csv", type=str, help="Path to metodo_pago CSV file")
+    parser.add_argument("--table-config", type=str,
+                        default=os.path.join(project_dir, 'table_config.json'),
+                        help="Path to table_config.json (tables switched off are skipped)")
     parser.add_argument('--dbname', default='postgres', help='Database name')
     parser.add_argument('--user', default='postgres', help='Database user')
     parser.add_argument('--password', default='postgres', help='Database password')
     parser.add_argument('--host', default='localhost', help='Database host')
     parser.add_argument('--port', default='5432', help='Database port')
+    parser.add_argument('--lock-timeout', default='2s', help='Maximum time DDL waits for table locks')
+    parser.add_argument('--ddl-retries', type=int, default=5, help='Attempts for DDL blocked by locks')
+    parser.add_argument('--profile', default='bulk_load',
+                        help='Session profile: bulk_load, oltp_sync or reporting')
+    parser.add_argument('--driver', default='psycopg2', choices=['psycopg2', 'psycopg'],
+                        help='Database driver (psycopg is psycopg 3)')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print what the install would do and its estimated cost, then exit')
+    parser.add_argument('--maintenance-window', type=float,
+                        help='Minutes available; --plan fails if the estimate exceeds it')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Report the import time of each module at exit')
+    parser.add_argument('--stats-file', default=os.path.join(project_dir, 'install_stats.json'),
+                        help='Install history used for the --plan estimates')
+    parser.add_argument('--migrate', action='store_true', help='Apply pending schema migrations')
+    parser.add_argument('--migrations-dir', default=os.path.join(project_dir, 'migrations'),
+                        help='Directory containing the versioned migration files')
+    parser.add_argument('--maintain-partitions', action='store_true',
+                        help='Create upcoming monthly partitions and detach expired ones')
+    parser.add_argument('--drop-expired-partitions', action='store_true',
+                        help='With --maintain-partitions, drop expired partitions instead of detaching them')
+    parser.add_argument('--archive-older-than', type=int, metavar='DAYS',
+                        help='Archive and delete errores/detalle_estado rows older than DAYS')
+    parser.add_argument('--archive-dir', default=os.path.join(project_dir, 'archive'),
+                        help='Directory of the compressed archives and the archival checkpoint')
+    parser.add_argument('--archive-batch-size', type=int, default=5000, help='Rows archived per batch')
+    parser.add_argument('--archive-pause', type=float, default=0.5, help='Seconds to sleep between batches')
+    parser.add_argument('--post-load', action='store_true',
+                        help='ANALYZE/VACUUM the loaded tables and prewarm hot lookup tables')
+    parser.add_argument('--post-load-workers', type=int, default=4,
+                        help='Connections used by the post-load stage')
     
     return parser.parse_args()
 
 
-def create_tables(db_connection):
+def create_tables(db_connection, table_names):
     """
-    Create database tables.
+    Create database tables, dependencies first.
+    
+    Tables that already exist are not recreated; missing columns are added
+    and any other drift from the declared schema is reported.
     
     Args:
         db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Tables to create
         
     Returns:
         bool: Success status
     """
     success = True
     
-    # Create specific tables for articulos and metodo_pago
-    articulos_table = ArticulosTable(db_connection)
-    if not articulos_table.create_table():
-        print("Failed to create articulos table")
-        success = False
-    
-    metodo_pago_table = MetodoPagoTable(db_connection)
-    if not metodo_pago_table.create_table():
-        print("Failed to create metodo_pago table")
-        success = False
-    
-    # Create caja_banco table
-    caja_banco_table = CajaBancoTable(db_connection)
-    if not caja_banco_table.create_table():
-        print("Failed to create caja_banco table")
-        success = False
-    
-    # Create clientes table
-    clientes_table = ClientesTable(db_connection)
-    if not clientes_table.create_table():
-        print("Failed to create clientes table")
-        success = False
-    
-    # Create detalle_estado table
-    detalle_estado_table = DetalleEstadoTable(db_connection)
-    if not detalle_estado_table.create_table():
-        print("Failed to create detalle_estado table")
-        success = False
-    
-    # Create errores table
-    errores_table = ErroresTable(db_connection)
-    if not errores_table.create_table():
-        print("Failed to create errores table")
-        success = False
-    
-    # Create estado_factura_venta table
-    estado_factura_venta_table = EstadoFacturaVentaTable(db_connection)
-    if not estado_factura_venta_table.create_table():
-        print("Failed to create estado_factura_venta table")
-        success = False
-    
-    # Create tipo_movimiento table
-    tipo_movimiento_table = TipoMovimientoTable(db_connection)
-    if not tipo_movimiento_table.create_table():
-        print("Failed to create tipo_movimiento table")
-        success = False
+    plan = plan_schema(db_connection, table_names) or {}
+    if plan:
+        print_schema_report(plan)
     
-    # Create reintentos_fac_venta table
-    reintentos_fac_venta_table = ReintentosFacturaVentaTable(db_connection)
-    if not reintentos_fac_venta_table.create_table():
-        print("Failed to create reintentos_fac_venta table")
-        success = False
-    
-    # Create recibo_venta table
-    recibo_venta_table = ReciboVentaTable(db_connection)
-    if not recibo_venta_table.create_table():
-        print("Failed to create recibo_venta table")
-        success = False
-    
-    # Create proveedor table
-    proveedor_table = ProveedorTable(db_connection)
-    if not proveedor_table.create_table():
-        print("Failed to create proveedor table")
-        success = False
-    
-    # Create pais table
-    pais_table = PaisTable(db_connection)
-    if not pais_table.create_table():
-        print("Failed to create pais table")
-        success = False
-    
-    # Create forma_pago table
-    forma_pago_table = FormaPagoTable(db_connection)
-    if not forma_pago_table.create_table():
-        print("Failed to create forma_pago table")
-        success = False
-    
-    # Create forma_pago_caja_banco table
-    forma_pago_caja_banco_table = FormaPagoCajaBancoTable(db_connection)
-    if not forma_pago_caja_banco_table.create_table():
-        print("Failed to create forma_pago_caja_banco table")
-        success = False
-    
-    # Create general_misc table
-    general_misc_table = GeneralMiscTable(db_connection)
-    if not general_misc_table.create_table():
-        print("Failed to create general_misc table")
-        success = False
-    
-    # Create iva table
-    iva_table = IvaTable(db_connection)
-    if not iva_table.create_table():
-        print("Failed to create iva table")
-        success = False
+    for table_name in resolve_order(table_names):
+        table = get_table_class(table_name)(db_connection)
+        if not apply_schema_plan(db_connection, table, plan.get(table_name)):
+            print(f"Failed to create {table_name} table")
+            success = False
     
     return success
 
 
-def drop_tables(db_connection):
+def drop_tables(db_connection, table_names, lock_timeout="2s", retries=5):
     """
-    Drop database tables.
+    Drop database tables with one DROP statement.
+    
+    The statement waits at most lock_timeout for its locks and is retried with
+    backoff, so a sync worker holding a lock cannot hang the installer.
     
     Args:
         db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Tables to drop
+        lock_timeout (str, optional): Maximum time to wait for table locks
+        retries (int, optional): Number of attempts
         
     Returns:
         bool: Success status
     """
-    # This is a simplified approach - in a real application, you'd need to handle dependencies
-    # Drop tables in reverse order of creation to handle foreign key constraints
-    success = True
+    from src.database.schema import SchemaManager
     
-    # Drop metodo_pago table
-    query = "DROP TABLE IF EXISTS metodo_pago CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop metodo_pago table")
-        success = False
-    
-    # Drop articulos table
-    query = "DROP TABLE IF EXISTS articulos CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop articulos table")
-        success = False
-    
-    # Drop caja_banco table
-    query = "DROP TABLE IF EXISTS caja_banco CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop caja_banco table")
-        success = False
-    
-    # Drop clientes table
-    query = "DROP TABLE IF EXISTS clientes CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop clientes table")
-        success = False
-    
-    # Drop detalle_estado table
-    query = "DROP TABLE IF EXISTS detalle_estado CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop detalle_estado table")
-        success = False
-    
-    # Drop errores table
-    query = "DROP TABLE IF EXISTS errores CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop errores table")
-        success = False
-    
-    # Drop estado_factura_venta table
-    query = "DROP TABLE IF EXISTS estado_factura_venta CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop estado_factura_venta table")
-        success = False
-    
-    # Drop tipo_movimiento table
-    query = "DROP TABLE IF EXISTS tipo_movimiento CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop tipo_movimiento table")
-        success = False
-    
-    # Drop reintentos_fac_venta table
-    query = "DROP TABLE IF EXISTS reintentos_fac_venta CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop reintentos_fac_venta table")
-        success = False
-    
-    # Drop recibo_venta table
-    query = "DROP TABLE IF EXISTS recibo_venta CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop recibo_venta table")
-        success = False
-    
-    # Drop proveedor table
-    query = "DROP TABLE IF EXISTS proveedor CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop proveedor table")
-        success = False
-    
-    # Drop pais table
-    query = "DROP TABLE IF EXISTS pais CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop pais table")
-        success = False
-    
-    # Drop forma_pago table
-    query = "DROP TABLE IF EXISTS forma_pago CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop forma_pago table")
-        success = False
-    
-    # Drop forma_pago_caja_banco table
-    query = "DROP TABLE IF EXISTS forma_pago_caja_banco CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop forma_pago_caja_banco table")
-        success = False
-    
-    # Drop general_misc table
-    query = "DROP TABLE IF EXISTS general_misc CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop general_misc table")
-        success = False
-    
-    # Drop iva table
-    query = "DROP TABLE IF EXISTS iva CASCADE;"
-    cursor = db_connection.execute_query(query)
-    if cursor is None:
-        print("Failed to drop iva table")
-        success = False
+    # SchemaManager.drop_tables takes creation order and reverses it, so
+    # dependents are dropped first; CASCADE removes anything else depending on them
+    return SchemaManager(db_connection).drop_tables(resolve_order(table_names), lock_timeout, retries)
+
+
+def load_and_record(db_connection, table, stats=None, **kwargs):
+    """
+    Load a table's data, recording rows, bytes, time and WAL in the install history.
     
-    db_connection.commit()
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        table: Handler instance
+        stats (dict, optional): Install history; nothing is recorded when omitted
+        **kwargs: Passed to load_table_data
+        
+    Returns:
+        bool: Success status
+    """
+    if stats is None:
+        return load_table_data(table, **kwargs)
+    
+    before = measure_table(db_connection, table.table_name)
+    started = time.perf_counter()
+    success = load_table_data(table, **kwargs)
+    if success:
+        seconds = time.perf_counter() - started
+        after = measure_table(db_connection, table.table_name, analyze=True)
+        record_table_load(stats, table.table_name, before, after, seconds)
     return success
 
 
-def import_csv_data(db_connection, articulos_csv=None, metodo_pago_csv=None):
+def import_csv_data(db_connection, table_names, articulos_csv=None, metodo_pago_csv=None, stats=None):
     """
     Import data from CSV files.
     
     Args:
         db_connection (DatabaseConnection): Database connection
+        table_names (list): Enabled tables; only those loaded from CSV are used
         articulos_csv (str, optional): Path to articulos CSV file
         metodo_pago_csv (str, optional): Path to metodo_pago CSV file
+        stats (dict, optional): Install history to record each load in
         
     Returns:
         bool: Success status
     """
     success = True
+    csv_paths = {
+        "articulos": articulos_csv,
+        "metodo_pago": metodo_pago_csv
+    }
     
     # Ensure CSV directory exists
     csv_dir = ensure_csv_directory()
     
-    # Import articulos data
-    print("Importing articulos data...")
-    articulos_table = ArticulosTable(db_connection)
-    if not articulos_table.import_from_csv(articulos_csv):
-        print("Failed to import articulos data")
-        success = False
-    else:
-        print("Articulos data imported successfully")
-    
-    # Import metodo_pago data
-    print("Importing metodo_pago data...")
-    metodo_pago_table = MetodoPagoTable(db_connection)
-    if not metodo_pago_table.import_from_csv(metodo_pago_csv):
-        print("Failed to import metodo_pago data")
-        success = False
-    else:
-        print("Metodo_pago data imported successfully")
+    for table_name in resolve_order(table_names):
+        table = get_table_class(table_name)(db_connection)
+        if table.data_source != "csv":
+            continue
+        if not load_and_record(db_connection, table, stats, csv_path=csv_paths.get(table_name)):
+            success = False
     
     return success
 
 
-def load_default_data(db_connection):
+def load_default_data(db_connection, table_names, stats=None):
     """
     Load default data for tables with predefined data.
     
     Args:
         db_connection (DatabaseConnection): Database connection instance
+        table_names (list): Enabled tables; only those with default data are used
+        stats (dict, optional): Install history to record each load in
         
     Returns:
         bool: Success status
     """
     success = True
     
-    # Load default data for caja_banco
-    print("Loading default data for caja_banco...")
-    caja_banco_table = CajaBancoTable(db_connection)
-    if not caja_banco_table.setup(use_default_data=True):
-        print("Failed to load default data for caja_banco")
-        success = False
-    
-    # Load default data for clientes
-    print("Loading default data for clientes...")
-    clientes_table = ClientesTable(db_connection)
-    if not clientes_table.setup(use_default_data=True):
-        print("Failed to load default data for clientes")
-        success = False
-    
-    # Load default data for tipo_movimiento
-    print("Loading default data for tipo_movimiento...")
-    tipo_movimiento_table = TipoMovimientoTable(db_connection)
-    if not tipo_movimiento_table.setup(use_default_data=True):
-        print("Failed to load default data for tipo_movimiento")
-        success = False
-    
-    # Load default data for proveedor
-    print("Loading default data for proveedor...")
-    proveedor_table = ProveedorTable(db_connection)
-    if not proveedor_table.setup(use_default_data=True):
-        print("Failed to load default data for proveedor")
-        success = False
-    
-    # Load default data for pais
-    print("Loading default data for pais...")
-    pais_table = PaisTable(db_connection)
-    if not pais_table.setup(use_default_data=True):
-        print("Failed to load default data for pais")
-        success = False
-    
-    # Load default data for forma_pago
-    print("Loading default data for forma_pago...")
-    forma_pago_table = FormaPagoTable(db_connection)
-    if not forma_pago_table.setup(use_default_data=True):
-        print("Failed to load default data for forma_pago")
-        success = False
-    
-    # Load default data for forma_pago_caja_banco
-    print("Loading default data for forma_pago_caja_banco...")
-    forma_pago_caja_banco_table = FormaPagoCajaBancoTable(db_connection)
-    if not forma_pago_caja_banco_table.setup(use_default_data=True):
-        print("Failed to load default data for forma_pago_caja_banco")
-        success = False
-    
-    # Load default data for general_misc
-    print("Loading default data for general_misc...")
-    general_misc_table = GeneralMiscTable(db_connection)
-    if not general_misc_table.setup(use_default_data=True):
-        print("Failed to load default data for general_misc")
-        success = False
-    
-    # Load default data for iva
-    print("Loading default data for iva...")
-    iva_table = IvaTable(db_connection)
-    if not iva_table.setup(use_default_data=True):
-        print("Failed to load default data for iva")
-        success = False
+    for table_name in resolve_order(table_names):
+        table = get_table_class(table_name)(db_connection)
+        if table.data_source not in ("default", "json"):
+            continue
+        if not table.create_table() or not load_and_record(db_connection, table, stats):
+            success = False
     
     return success
 
 
+def post_load(db_connection, args, table_names):
+    """
+    Run the post-load stage on the tables this run loaded.
+    
+    Args:
+        db_connection (DatabaseConnection): Database connection instance
+        args (Namespace): Parsed command line arguments
+        table_names (list): Enabled tables
+        
+    Returns:
+        bool: Success status
+    """
+    from src.database.post_load import run_post_load
+    
+    loaded = [name for name in table_names
+              if (args.import_csv and get_table_class(name).data_source == "csv")
+              or (args.load_default_data and get_table_class(name).data_source not in (None, "csv"))]
+    if args.post_load_workers <= 1 or len(loaded) <= 1:
+        return run_post_load(db_connection, loaded)
+    
+    from src.database.connection import DatabaseConnectionPool
+    pool = DatabaseConnectionPool(min(args.post_load_workers, len(loaded)), dbname=args.dbname,
+                                  user=args.user, password=args.password, host=args.host,
+                                  port=args.port, profile=args.profile, driver=args.driver)
+    if not pool.connect():
+        print("Failed to open the post-load connection pool")
+        return False
+    try:
+        return run_post_load(db_connection, loaded, pool)
+    finally:
+        pool.close()
+
+
 def main():
     """
     Main function.
     """
     args = parse_arguments()
     
+    # table_config.json is the on/off switch for every table
+    table_names = get_enabled_tables(load_table_config(args.table_config))
+    
     # Create database connection
     db = DatabaseConnection(
         dbname=args.dbname,
         user=args.user,
         password=args.password,
         host=args.host,
-        port=args.port
+        port=args.port,
+        profile=args.profile,
+        driver=args.driver
     )
     
     # Connect to the database
@@ -443,32 +297,70 @@ def main():
         return 1
     
     try:
+        stats = load_install_stats(args.stats_file)
+        
+        if args.plan:
+            csv_paths = {"articulos": args.articulos_csv, "metodo_pago": args.metodo_pago_csv}
+            plan = build_install_plan(db, table_names, stats, csv_paths)
+            if plan is None:
+                print("Failed to build the install plan")
+                return 1
+            return 0 if print_install_plan(plan, args.maintenance_window) else 1
+        
         # Process actions based on arguments
         if args.drop_tables:
             print("Dropping tables...")
-            if not drop_tables(db):
+            if not drop_tables(db, table_names, args.lock_timeout, args.ddl_retries):
                 print("Failed to drop tables")
                 return 1
         
         if args.create_tables:
             print("Creating tables...")
-            if not create_tables(db):
+            if not create_tables(db, table_names):
                 print("Failed to create tables")
                 return 1
         
+        if args.migrate:
+            print("Applying schema migrations...")
+            from src.database.schema import SchemaManager
+            if not SchemaManager(db).migrate(args.migrations_dir, args.lock_timeout, args.ddl_retries):
+                print("Failed to apply migrations")
+                return 1
+        
+        if args.maintain_partitions:
+            print("Maintaining partitions...")
+            from src.database.partitioning import maintain_partitions
+            if not maintain_partitions(db, table_names, drop=args.drop_expired_partitions):
+                print("Failed to maintain partitions")
+                return 1
+        
+        if args.archive_older_than is not None:
+            from src.database.archival import archive_tables
+            cutoff = date.today() - timedelta(days=args.archive_older_than)
+            if not archive_tables(db, table_names, cutoff, args.archive_dir, batch_size=args.archive_batch_size,
+                                  pause=args.archive_pause, lock_timeout=args.lock_timeout):
+                print("Failed to archive old rows")
+                return 1
+        
         if args.load_default_data:
             print("Loading default data for tables...")
-            if not load_default_data(db):
+            if not load_default_data(db, table_names, stats):
                 print("Failed to load default data")
                 return 1
         
         if args.import_csv:
             print("Importing data from CSV files...")
-            if not import_csv_data(db, args.articulos_csv, args.metodo_pago_csv):
+            if not import_csv_data(db, table_names, args.articulos_csv, args.metodo_pago_csv, stats):
                 print("Failed to import data from CSV files")
                 return 1
             print("CSV data imported successfully")
         
+        if args.post_load:
+            if not post_load(db, args, table_names):
+                print("Post-load maintenance failed")
+                return 1
+        
+        save_install_stats(args.stats_file, stats)
         print("Database installation completed successfully.")
         return 0
     
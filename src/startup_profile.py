@@ -0,0 +1,114 @@
+"""
+Startup profiler.
+
+Times the execution of every module imported after it is enabled and prints
+the cost per module when the process exits, so slow imports in the packaged
+executable show up without rebuilding it with -X importtime.
+
+Enabled with --startup-profile or STARTUP_PROFILE=true before the installer
+imports its modules.
+"""
+import os
+import sys
+import time
+import atexit
+import threading
+
+
+class _TimedLoader:
+    """Loader wrapper that times exec_module and delegates everything else."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave()
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class StartupProfiler:
+    """Meta path finder recording self and total import time per module."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = {}
+        self.import_time = 0.0
+        # Worker threads (parallel installs) import table modules concurrently
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Find the module with the remaining finders and wrap its loader."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self, name):
+        """Start timing a module."""
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        """Stop timing the current module and charge its time to the parent."""
+        name, started, children = self._stack.pop()
+        total = time.perf_counter() - started
+        self.records[name] = (total - children, total)
+        if self._stack:
+            self._stack[-1][2] += total
+        else:
+            self.import_time += total
+
+    def report(self, limit=25):
+        """
+        Print the slowest modules.
+
+        Args:
+            limit (int, optional): Number of modules to list
+        """
+        elapsed = time.perf_counter() - self.started
+        print(f"\nStartup profile: {len(self.records)} modules imported in {self.import_time * 1000:.1f} ms "
+              f"({elapsed:.2f} s since profiling started)")
+        print(f"  {'module':<45}{'self ms':>10}{'total ms':>10}")
+        ranked = sorted(self.records.items(), key=lambda item: -item[1][0])
+        for name, (self_time, total) in ranked[:limit]:
+            print(f"  {name:<45}{self_time * 1000:>10.1f}{total * 1000:>10.1f}")
+
+
+def enable_if_requested(argv=None):
+    """
+    Install the profiler when --startup-profile or STARTUP_PROFILE=true is given.
+
+    Args:
+        argv (list, optional): Command line arguments (sys.argv when omitted)
+
+    Returns:
+        StartupProfiler: The installed profiler, or None
+    """
+    argv = sys.argv if argv is None else argv
+    if "--startup-profile" not in argv and os.getenv("STARTUP_PROFILE", "false").lower() != "true":
+        return None
+
+    profiler = StartupProfiler()
+    sys.meta_path.insert(0, profiler)
+    atexit.register(profiler.report)
+    return profiler
@@ -0,0 +1,47 @@
+"""
+Tests for the COPY text encoding of the driver backends (no database needed).
+"""
+import unittest
+
+from src.database.backends import CopyTextReader, encode_copy_text
+
+
+class EncodeCopyTextTest(unittest.TestCase):
+
+    def test_escapes_and_nulls(self):
+        self.assertEqual(encode_copy_text((1, None, "a\tb\\c\nd", True)), "1\t\\N\ta\\tb\\\\c\\nd\tt\n")
+
+
+class CopyTextReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [(i, f"fila {i}", None) for i in range(50)]
+        self.expected = "".join(map(encode_copy_text, self.rows))
+
+    def read_all(self, reader, size):
+        chunks = []
+        while True:
+            chunk = reader.read(size)
+            if not chunk:
+                return chunks
+            self.assertLessEqual(len(chunk), size)
+            chunks.append(chunk)
+
+    def test_chunks_concatenate_to_the_encoding(self):
+        for size in (1, 7, 64, 10000):
+            self.assertEqual("".join(self.read_all(CopyTextReader(self.rows), size)), self.expected, size)
+
+    def test_rows_are_encoded_on_demand(self):
+        reader = CopyTextReader(iter(self.rows))
+        reader.read(10)
+        self.assertEqual(len(list(reader._lines)), 49)
+
+    def test_read_everything(self):
+        reader = CopyTextReader(self.rows)
+        self.assertEqual(reader.read(5) + reader.read(), self.expected)
+        self.assertEqual(reader.read(), "")
+        self.assertEqual(CopyTextReader([]).read(100), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
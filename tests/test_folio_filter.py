@@ -0,0 +1,39 @@
+"""
+Tests for the Bloom filter behind ProcessedFolios (no database needed).
+"""
+import unittest
+
+from src.database.folio_filter import BloomFilter
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000)
+        folios = [f"F{i}" for i in range(5000)]
+        for folio in folios:
+            bloom.add(folio)
+        self.assertTrue(all(folio in bloom for folio in folios))
+        self.assertEqual(bloom.count, 5000)
+
+    def test_false_positive_rate_at_capacity(self):
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f"F{i}")
+        false_positives = sum(f"N{i}" in bloom for i in range(20000))
+        # 1% expected; allow for sampling noise
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_empty_filter_contains_nothing(self):
+        bloom = BloomFilter(100)
+        self.assertNotIn("F1", bloom)
+
+    def test_sizing(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        # About 9.6 bits and 7 hashes per item for 1%
+        self.assertEqual(bloom.hashes, 7)
+        self.assertAlmostEqual(bloom.size / 1000, 9.59, places=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
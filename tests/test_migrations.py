@@ -0,0 +1,80 @@
+"""
+Tests for the migration file loader and statement splitter (no database needed).
+"""
+import os
+import tempfile
+import unittest
+
+from src.database.schema import load_migrations, split_statements
+
+
+class SplitStatementsTest(unittest.TestCase):
+
+    def test_simple_statements(self):
+        self.assertEqual(split_statements("select 1; select 2;"), ["select 1", "select 2"])
+
+    def test_semicolons_in_quotes(self):
+        self.assertEqual(split_statements("select 'a;b'; select \"c;d\" from t"),
+                         ["select 'a;b'", "select \"c;d\" from t"])
+        self.assertEqual(split_statements("select 'it''s; fine'"), ["select 'it''s; fine'"])
+
+    def test_dollar_quoted_body(self):
+        body = "CREATE FUNCTION f() RETURNS int AS $fn$ BEGIN RETURN 1; END $fn$ LANGUAGE plpgsql"
+        self.assertEqual(split_statements(body + "; select 2"), [body, "select 2"])
+
+    def test_line_comments(self):
+        self.assertEqual(split_statements("select 1; -- a; b\nselect 2"), ["select 1", "-- a; b\nselect 2"])
+
+    def test_block_comments(self):
+        self.assertEqual(split_statements("select 1; /* a; b */ select 2"), ["select 1", "/* a; b */ select 2"])
+        self.assertEqual(split_statements("select /* x /* y; */ z; */ 1; select 2"),
+                         ["select /* x /* y; */ z; */ 1", "select 2"])
+
+    def test_comment_only_statements_dropped(self):
+        self.assertEqual(split_statements("-- header\n/* note; */\n;select 1;\n-- trailing"), ["select 1"])
+        self.assertEqual(split_statements("  ;\n"), [])
+
+
+class LoadMigrationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, filename, content):
+        with open(os.path.join(self.directory.name, filename), 'wb') as f:
+            f.write(content)
+
+    def test_checksum_ignores_line_endings(self):
+        self.write("0001_a.sql", b"CREATE TABLE a (id int);\r\nCREATE TABLE b (id int);\r\n")
+        crlf = load_migrations(self.directory.name)[0]["checksum"]
+        self.write("0001_a.sql", b"CREATE TABLE a (id int);\nCREATE TABLE b (id int);\n")
+        self.assertEqual(load_migrations(self.directory.name)[0]["checksum"], crlf)
+
+    def test_checksum_follows_content(self):
+        self.write("0001_a.sql", b"CREATE TABLE a (id int);\n")
+        before = load_migrations(self.directory.name)[0]["checksum"]
+        self.write("0001_a.sql", b"CREATE TABLE a (id bigint);\n")
+        self.assertNotEqual(load_migrations(self.directory.name)[0]["checksum"], before)
+
+    def test_order_and_directives(self):
+        self.write("0010_later.sql", b"-- migrate:requires clientes, pais\nALTER TABLE clientes ADD x int;\n")
+        self.write("0002_index.sql", b"-- CONCURRENTLY in a comment\nCREATE INDEX CONCURRENTLY i ON t (a);\n")
+        self.write("0001_plain.sql", b"-- not CONCURRENTLY\nCREATE TABLE t (a int);\n")
+        self.write("notes.txt", b"ignored")
+        migrations = load_migrations(self.directory.name)
+        self.assertEqual([(m["version"], m["name"]) for m in migrations],
+                         [(1, "plain"), (2, "index"), (10, "later")])
+        self.assertEqual([m["transactional"] for m in migrations], [True, False, True])
+        self.assertEqual(migrations[2]["requires"], ["clientes", "pais"])
+
+    def test_duplicate_version(self):
+        self.write("0001_a.sql", b"select 1;")
+        self.write("1_b.sql", b"select 2;")
+        self.assertRaises(ValueError, load_migrations, self.directory.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Tests for ReciboVentaTable.insert_many against a recording connection (no database needed).
+"""
+import unittest
+from datetime import date
+
+from src.database.recibo_venta_table import ReciboVentaTable
+
+
+class RecordingCursor:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+class RecordingConnection:
+    """Answers the queries of insert_many and keeps what was copied."""
+
+    today = date(2026, 10, 19)
+
+    def __init__(self):
+        self.queries = []
+        self.copied = None
+        self.committed = False
+        self.connection = self
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+        if query == "SELECT CURRENT_DATE":
+            return RecordingCursor([(self.today,)])
+        return RecordingCursor([(100 + i,) for i in range(params[2])])
+
+    def copy_rows(self, table_name, columns, rows):
+        self.copied = (table_name, columns, list(rows))
+        return True
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def receipt(folio, fecha_emision):
+    return (folio, 1, 2, 3, 4, 5, "hash", "nuevo", fecha_emision, None)
+
+
+class InsertManyTest(unittest.TestCase):
+
+    def test_missing_partition_key_is_today(self):
+        db = RecordingConnection()
+        ids = ReciboVentaTable(db).insert_many([receipt("A", date(2026, 1, 5)), receipt("B", None)])
+        self.assertEqual(ids, [100, 101])
+        table_name, columns, rows = db.copied
+        self.assertEqual(columns[0], "id_sql")
+        fecha = columns.index("fecha_emision")
+        self.assertEqual([row[fecha] for row in rows], [date(2026, 1, 5), db.today])
+        self.assertEqual(rows[1][:2], (101, "B"))
+        self.assertTrue(db.committed)
+
+    def test_no_date_query_when_every_row_has_one(self):
+        db = RecordingConnection()
+        ReciboVentaTable(db).insert_many([receipt("A", date(2026, 1, 5))])
+        self.assertNotIn("SELECT CURRENT_DATE", db.queries)
+
+    def test_empty_batch(self):
+        db = RecordingConnection()
+        self.assertEqual(ReciboVentaTable(db).insert_many([]), [])
+        self.assertEqual(db.queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
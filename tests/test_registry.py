@@ -0,0 +1,26 @@
+"""
+Tests for the table registry (no database needed).
+"""
+import ast
+import inspect
+import unittest
+
+from src.database import registry
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_bundled_imports_match_table_modules(self):
+        # The packaged executable only contains the modules imported statically
+        tree = ast.parse(inspect.getsource(registry._bundled_table_modules))
+        imported = {alias.name for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)
+                    for alias in node.names}
+        self.assertEqual(imported, {module for module, _ in registry.TABLE_MODULES.values()})
+
+    def test_every_table_class_resolves(self):
+        for table_name in registry.TABLE_MODULES:
+            self.assertEqual(registry.get_table_class(table_name).table_name, table_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for the catalog-driven row codecs (no database needed).
+"""
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from src.database import row_codecs
+from src.database.row_codecs import RowCodec, CodecError, clear_column_cache
+
+
+def column(name, type_name, length=None, precision=None, scale=None, not_null=False):
+    return {"name": name, "type": type_name, "length": length, "precision": precision,
+            "scale": scale, "not_null": not_null}
+
+
+class RowCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = [
+            column("id", "int4", not_null=True),
+            column("nombre", "varchar", length=5),
+            column("precio", "numeric", precision=5, scale=2),
+            column("activo", "bool"),
+            column("fecha", "date"),
+            column("registro", "timestamp"),
+        ]
+
+    def test_converts_csv_strings(self):
+        codec = RowCodec("t", self.columns)
+        row = codec.encode(["7", "abc", "12.5", "si", "2026-10-19", "2026-10-19 08:30:00"])
+        self.assertEqual(row, (7, "abc", Decimal("12.5"), True, date(2026, 10, 19),
+                               datetime(2026, 10, 19, 8, 30)))
+
+    def test_empty_field_is_null_except_for_text(self):
+        codec = RowCodec("t", self.columns)
+        self.assertEqual(codec.encode(["1", "", "", "", "", ""]), (1, "", None, None, None, None))
+
+    def test_null_in_not_null_column(self):
+        codec = RowCodec("t", self.columns)
+        with self.assertRaises(CodecError) as raised:
+            codec.encode(["", "a", "1", "t", "2026-01-01", "2026-01-01"])
+        self.assertEqual(raised.exception.column, "id")
+
+    def test_integer_range(self):
+        codec = RowCodec("t", [column("n", "int2")])
+        self.assertEqual(codec.encode(["32767"]), (32767,))
+        self.assertRaises(CodecError, codec.encode, ["32768"])
+
+    def test_numeric_precision(self):
+        codec = RowCodec("t", [column("n", "numeric", precision=5, scale=2)])
+        self.assertEqual(codec.encode(["999.99"]), (Decimal("999.99"),))
+        # Rounds to 1000.00, which needs six digits
+        self.assertRaises(CodecError, codec.encode, ["999.995"])
+        self.assertRaises(CodecError, codec.encode, ["1e30"])
+        self.assertRaises(CodecError, codec.encode, ["abc"])
+
+    def test_overflow_rejected_or_truncated(self):
+        self.assertRaises(CodecError, RowCodec("t", [column("s", "varchar", length=3)]).encode, ["abcd"])
+        codec = RowCodec("t", [column("s", "varchar", length=3)], on_overflow="truncate")
+        self.assertEqual(codec.encode(["abcd"]), ("abc",))
+        self.assertEqual(codec.truncated, 1)
+
+    def test_wrong_number_of_values(self):
+        self.assertRaises(CodecError, RowCodec("t", self.columns).encode, ["1"])
+
+    def test_encode_rows_skips_and_reports(self):
+        codec = RowCodec("t", [column("n", "int4"), column("b", "bool")])
+        errors = []
+        rows = list(codec.encode_rows([["1", "t"], ["x", "t"], ["3", "maybe"], ["4", "f"]], errors))
+        self.assertEqual(rows, [(1, True), (4, False)])
+        self.assertEqual([number for number, _ in errors], [2, 3])
+        self.assertEqual(errors[1][1].column, "b")
+
+    def test_types_follow_columns(self):
+        codec = RowCodec("t", self.columns)
+        self.assertEqual(codec.columns, ["id", "nombre", "precio", "activo", "fecha", "registro"])
+        self.assertEqual(codec.types, ["int4", "varchar", "numeric", "bool", "date", "timestamp"])
+
+
+class ClearColumnCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        row_codecs._column_cache.update({
+            ("h", "5432", "a", "clientes"): [],
+            ("h", "5432", "b", "clientes"): [],
+            ("h", "5432", "a", "pais"): [],
+        })
+
+    def tearDown(self):
+        clear_column_cache()
+
+    def test_clears_only_the_given_tables(self):
+        clear_column_cache(["clientes"])
+        self.assertEqual(list(row_codecs._column_cache), [("h", "5432", "a", "pais")])
+
+    def test_clears_everything(self):
+        clear_column_cache()
+        self.assertEqual(row_codecs._column_cache, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for the declared-schema parser and the table diff (no database needed).
+"""
+import unittest
+
+from src.database.schema_diff import normalize_type, parse_create_query, diff_table, get_declared_schema
+from src.database.registry import TABLE_MODULES
+
+
+class NormalizeTypeTest(unittest.TestCase):
+
+    def test_aliases(self):
+        self.assertEqual(normalize_type("INT"), "integer")
+        self.assertEqual(normalize_type("serial"), "integer")
+        self.assertEqual(normalize_type("BIGSERIAL"), "bigint")
+        self.assertEqual(normalize_type("bool"), "boolean")
+        self.assertEqual(normalize_type("TIMESTAMPTZ"), "timestamp with time zone")
+
+    def test_multi_word_types(self):
+        self.assertEqual(normalize_type("TIMESTAMP  WITHOUT TIME ZONE"), "timestamp without time zone")
+        self.assertEqual(normalize_type("character varying(10)"), "character varying(10)")
+
+    def test_modifiers(self):
+        self.assertEqual(normalize_type("VARCHAR(20)"), "character varying(20)")
+        self.assertEqual(normalize_type("NUMERIC(5, 2)"), "numeric(5,2)")
+        self.assertEqual(normalize_type("char (3)"), "character(3)")
+
+    def test_unknown_types_are_lowercased(self):
+        self.assertEqual(normalize_type("JSONB"), "jsonb")
+        self.assertEqual(normalize_type("INTEGER[]"), "integer[]")
+
+
+class ParseCreateQueryTest(unittest.TestCase):
+
+    def test_columns_and_constraints(self):
+        name, columns = parse_create_query("""
+        CREATE TABLE IF NOT EXISTS ejemplo (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(50) NOT NULL,
+            precio NUMERIC(10, 2) DEFAULT 0,
+            creado TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN NOT NULL DEFAULT FALSE,
+            CONSTRAINT ejemplo_nombre_key UNIQUE (nombre)
+        );
+        """)
+        self.assertEqual(name, "ejemplo")
+        self.assertEqual(list(columns), ["id", "nombre", "precio", "creado", "activo"])
+        self.assertEqual(columns["id"], {"type": "integer", "not_null": True, "primary_key": True, "default": None})
+        self.assertEqual(columns["nombre"]["type"], "character varying(50)")
+        self.assertTrue(columns["nombre"]["not_null"])
+        self.assertEqual(columns["precio"]["type"], "numeric(10,2)")
+        self.assertEqual(columns["precio"]["default"], "0")
+        self.assertEqual(columns["creado"]["type"], "timestamp without time zone")
+        self.assertEqual(columns["creado"]["default"], "CURRENT_TIMESTAMP")
+        self.assertEqual(columns["activo"]["default"], "FALSE")
+        self.assertTrue(columns["activo"]["not_null"])
+
+    def test_table_primary_key_and_partitioning(self):
+        name, columns = parse_create_query("""
+        CREATE TABLE IF NOT EXISTS particionada(
+            id NUMERIC NOT NULL,
+            fecha DATE NOT NULL DEFAULT CURRENT_DATE,
+            nota TEXT,
+            PRIMARY KEY (id, fecha)
+        ) PARTITION BY RANGE (fecha);
+        """)
+        self.assertEqual(name, "particionada")
+        self.assertTrue(columns["id"]["primary_key"])
+        self.assertTrue(columns["fecha"]["primary_key"])
+        self.assertFalse(columns["nota"]["primary_key"])
+        self.assertFalse(columns["nota"]["not_null"])
+
+    def test_not_a_create_query(self):
+        self.assertEqual(parse_create_query("SELECT 1"), (None, {}))
+
+    def test_every_registered_table_parses(self):
+        declared = get_declared_schema(list(TABLE_MODULES))
+        for table_name, columns in declared.items():
+            self.assertTrue(columns, table_name)
+
+
+class DiffTableTest(unittest.TestCase):
+
+    def test_missing_column_keeps_default(self):
+        declared = parse_create_query(
+            "CREATE TABLE t (id INT PRIMARY KEY, n INT NOT NULL DEFAULT 0, m INT)")[1]
+        actual = {"id": {"type": "integer", "not_null": True, "primary_key": True}}
+        diff = diff_table("t", declared, actual)
+        self.assertEqual(diff["status"], "drift")
+        self.assertEqual(diff["ddl"], ["ALTER TABLE t ADD COLUMN IF NOT EXISTS n integer DEFAULT 0 NOT NULL",
+                                       "ALTER TABLE t ADD COLUMN IF NOT EXISTS m integer"])
+
+    def test_missing_table_and_indexes(self):
+        declared = parse_create_query("CREATE TABLE t (id INT)")[1]
+        self.assertEqual(diff_table("t", declared, None)["status"], "missing")
+        actual = {"id": {"type": "integer", "not_null": False, "primary_key": False}}
+        indexes = (("t_a_idx", "(id)"), ("t_b_idx", "(id) WHERE id > 0"))
+        diff = diff_table("t", declared, actual, indexes, {"t_a_idx": True, "t_b_idx": False})
+        self.assertEqual(diff["status"], "ok")
+        self.assertEqual(diff["indexes"], [("t_b_idx", "(id) WHERE id > 0")])
+
+    def test_missing_id_sequence(self):
+        declared = parse_create_query("CREATE TABLE t (id INT)")[1]
+        actual = {"id": {"type": "integer", "not_null": False, "primary_key": False}}
+        self.assertEqual(diff_table("t", declared, actual, id_blocks=("id", 100), has_sequence=False)["id_blocks"],
+                         ("id", 100))
+        self.assertIsNone(diff_table("t", declared, actual, id_blocks=("id", 100))["id_blocks"])
+        self.assertIsNone(diff_table("t", declared, None, id_blocks=("id", 100), has_sequence=False)["id_blocks"])
+
+
+if __name__ == "__main__":
+    unittest.main()